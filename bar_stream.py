@@ -0,0 +1,218 @@
+import heapq
+import numpy as np
+import pandas as pd
+from price_parser import PriceParser
+
+
+def _to_nanoseconds(date):
+    """
+    Converts a date (datetime, string or pandas Timestamp) to int64 nanoseconds since the epoch.
+    """
+    return pd.Timestamp(date).value
+
+
+class TickerBars(object):
+    """
+    TickerBars holds the bars of a single ticker as NumPy arrays: a sorted array of int64 timestamps (nanoseconds since
+    the epoch) and a (rows x 5) int64 array of the open, high, low, close and volume of each bar. Prices are already
+    parsed into the PriceParser fixed-point representation.
+    """
+
+    def __init__(self, ticker, timestamps, values, skipped=0):
+        """
+        :param ticker: The ticker symbol, e.g. 'AAPL'
+        :param timestamps: Sorted int64 array of bar timestamps in nanoseconds
+        :param values: int64 array of shape (len(timestamps), 5) holding OHLCV
+        :param skipped: Number of bars that were skipped as their prices could not be parsed
+        """
+        self.ticker = ticker
+        self.timestamps = timestamps
+        self.values = values
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_frame(cls, ticker, df, columns, start_date=None, end_date=None):
+        '''
+        Creates the arrays from a DataFrame indexed by a DatetimeIndex, keeping only the bars within
+        [start_date, end_date). The prices of the whole frame are parsed in one pass. Bars with a NaN or infinite open,
+        high, low or close are skipped, as they cannot be parsed, and counted in skipped.
+
+        :param ticker: The ticker symbol
+        :param df: DataFrame of bars
+        :param columns: The OHLCV column names, in that order
+        :param start_date: Date to start retrieving bars from
+        :param end_date: Date to stop retrieving bars from
+        :return: TickerBars
+        '''
+        timestamps = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        prices = df[columns[:4]].values.astype(np.float64)
+        volumes = df[columns[4]].values.astype(np.float64)
+        finite = np.isfinite(prices).all(axis=1)
+        skipped = int(len(finite) - np.count_nonzero(finite))
+        if skipped > 0:
+            timestamps = timestamps[finite]
+            prices = prices[finite]
+            volumes = volumes[finite]
+
+        values = np.empty((len(timestamps), 5), dtype=np.int64)
+        values[:, :4] = PriceParser.parse_array(prices)
+        values[:, 4] = np.nan_to_num(volumes).astype(np.int64)
+
+        # Stable sort keeps rows with an identical timestamp in their original order
+        order = np.argsort(timestamps, kind='mergesort')
+        timestamps = timestamps[order]
+        values = values[order]
+
+        start = 0
+        end = len(timestamps)
+        if start_date is not None:
+            start = np.searchsorted(timestamps, _to_nanoseconds(start_date), side='left')
+        if end_date is not None:
+            end = np.searchsorted(timestamps, _to_nanoseconds(end_date), side='left')
+        return cls(ticker, timestamps[start:end], values[start:end], skipped)
+
+
+class BarStreamMerger(object):
+    """
+    BarStreamMerger streams the bars of many tickers in (timestamp, ticker) order with a k-way heap merge. Only the
+    head of each ticker is held on the heap, so the bars are never concatenated into a single frame and every step
+    costs O(log N) in the number of tickers, rather than the construction of a pandas Series.
+
+    Tickers can be added to or removed from a running stream in O(log N). An added ticker is spliced in from its first
+    bar after the last bar streamed. A removed ticker is dropped lazily, when its stale head reaches the top of the
+    heap.
+    """
+
+    def __init__(self, ticker_bars):
+        '''
+        :param ticker_bars: Iterable of TickerBars
+        '''
+        self._bars = {}
+        self._generations = {}
+        self._heap = []
+        self._last = None
+        for bars in ticker_bars:
+            if len(bars) > 0:
+                self._bars[bars.ticker] = bars
+                self._generations[bars.ticker] = 0
+                self._heap.append((bars.timestamps.item(0), bars.ticker, 0, 0))
+        heapq.heapify(self._heap)
+
+    def __iter__(self):
+        return self
+
+    def __contains__(self, ticker):
+        return ticker in self._bars
+
+    def add_ticker(self, bars):
+        '''
+        Splices the bars of a ticker into the stream, starting from its first bar that comes after the last bar streamed
+        in (timestamp, ticker) order.
+
+        :param bars: TickerBars of the ticker to add
+        :return: The index of the first bar of the ticker that will be streamed, len(bars) if none will
+        '''
+        ticker = bars.ticker
+        if ticker in self._bars:
+            self.remove_ticker(ticker)
+
+        start = 0
+        if self._last is not None:
+            last_timestamp, last_ticker = self._last
+            side = 'left' if ticker > last_ticker else 'right'
+            start = int(np.searchsorted(bars.timestamps, last_timestamp, side=side))
+        if start >= len(bars):
+            return len(bars)
+
+        generation = self._generations.get(ticker, -1) + 1
+        self._bars[ticker] = bars
+        self._generations[ticker] = generation
+        heapq.heappush(self._heap, (bars.timestamps.item(start), ticker, start, generation))
+        return start
+
+    def remove_ticker(self, ticker):
+        '''
+        Drops the remaining bars of a ticker from the stream.
+
+        :param ticker: The ticker to remove
+        :return:
+        '''
+        if self._bars.pop(ticker, None) is not None:
+            self._generations[ticker] += 1
+
+    def _discard_stale(self):
+        '''
+        Pops the heads of removed tickers off the top of the heap.
+        '''
+        while self._heap:
+            ticker = self._heap[0][1]
+            if ticker in self._bars and self._generations[ticker] == self._heap[0][3]:
+                return
+            heapq.heappop(self._heap)
+
+    def _pop(self):
+        '''
+        Removes the head of the heap, replacing it with the next bar of the same ticker.
+
+        :return: Tuple of (timestamp, TickerBars, row)
+        '''
+        timestamp, ticker, i, generation = self._heap[0]
+        bars = self._bars[ticker]
+        if i + 1 < len(bars):
+            heapq.heapreplace(self._heap, (bars.timestamps.item(i + 1), ticker, i + 1, generation))
+        else:
+            heapq.heappop(self._heap)
+            del self._bars[ticker]
+        self._last = (timestamp, ticker)
+        return timestamp, bars, i
+
+    def __next__(self):
+        '''
+        Returns the next bar as a tuple of (timestamp, ticker, [open, high, low, close, volume]).
+        '''
+        self._discard_stale()
+        if not self._heap:
+            raise StopIteration
+
+        timestamp, bars, i = self._pop()
+        return pd.Timestamp(timestamp), bars.ticker, bars.values[i].tolist()
+
+    def next(self):
+        return self.__next__()
+
+    def ticker_bars(self):
+        '''
+        Returns the TickerBars of the tickers that are still being streamed.
+        '''
+        return list(self._bars.values())
+
+    def peek(self):
+        '''
+        Returns the timestamp of the next bar, without streaming it, or None once every bar has been streamed.
+        '''
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return pd.Timestamp(self._heap[0][0])
+
+    def next_slice(self):
+        '''
+        Returns every bar sharing the next timestamp, ordered by ticker, as a tuple of (timestamp, tickers, values),
+        where values is an int64 array of shape (len(tickers), 5) holding OHLCV.
+        '''
+        self._discard_stale()
+        if not self._heap:
+            raise StopIteration
+
+        slice_timestamp = self._heap[0][0]
+        tickers = []
+        rows = []
+        while self._heap and self._heap[0][0] == slice_timestamp:
+            timestamp, bars, i = self._pop()
+            tickers.append(bars.ticker)
+            rows.append(bars.values[i])
+            self._discard_stale()
+        return pd.Timestamp(slice_timestamp), tickers, np.array(rows, dtype=np.int64)
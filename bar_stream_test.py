@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from bar_stream import TickerBars
+from price_panel import PricePanel
+from price_parser import PriceParser
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def make_frame(periods=5):
+    index = pd.bdate_range('2018-01-01', periods=periods)
+    close = np.arange(10.0, 10.0 + periods)
+    return pd.DataFrame({'open': close, 'high': close + 1.0, 'low': close - 1.0, 'close': close,
+                         'volume': 1000.0}, index=index)
+
+
+def test_bars_with_a_nan_high_are_skipped(capsys):
+    df = make_frame()
+    df.iloc[2, df.columns.get_loc('high')] = np.nan
+    bars = TickerBars.from_frame('AAA', df, COLUMNS)
+    assert len(bars) == 4
+    assert bars.skipped == 1
+    assert capsys.readouterr().out == ''
+    assert pd.Timestamp(df.index[2]).value not in bars.timestamps
+    assert bars.values[:, 3].tolist() == PriceParser.parse_array(df['close'].drop(df.index[2]).values).tolist()
+
+
+def test_a_nan_high_does_not_fail_the_universe():
+    good = make_frame()
+    bad = make_frame()
+    bad.iloc[1, bad.columns.get_loc('high')] = np.nan
+    bad.iloc[3, bad.columns.get_loc('low')] = np.inf
+    panel = PricePanel.from_tickers_data({'AAA': good, 'BBB': bad})
+    assert panel.has_bar.sum(axis=0).tolist() == [5, 3]
@@ -0,0 +1,79 @@
+import argparse
+import contextlib
+import os
+import queue
+import time
+from event import BarEvent
+from event_bus import BacktestEventBus
+from price_handler_base import AbstractBarPriceHandler
+from statistics_base import AbstractStatistics
+from strategy_base import AbstractStrategy
+from trading_session import TradingSession
+
+
+class SyntheticBarPriceHandler(AbstractBarPriceHandler):
+    '''
+    Streams a fixed number of generated daily bars, round robin over a set of tickers, so that the event loop can be
+    measured without reading any data.
+    '''
+    def __init__(self, events_que, bars, tickers=10):
+        self.events_que = events_que
+        self.bars = bars
+        self.streamed = 0
+        self.continue_backtest = True
+        self.symbols = ['T{0}'.format(i) for i in range(tickers)]
+        self.tickers = {ticker: {'close': None, 'timestamp': None} for ticker in self.symbols}
+
+    def stream_next(self):
+        if self.streamed >= self.bars:
+            self.continue_backtest = False
+            return
+        ticker = self.symbols[self.streamed % len(self.symbols)]
+        price = 100000000 + self.streamed
+        bar_event = BarEvent(ticker, self.streamed // len(self.symbols), 86400, price, price, price, price, 1000)
+        self.streamed += 1
+        self._store_event(bar_event)
+        self.events_que.put(bar_event)
+
+
+class IdleStrategy(AbstractStrategy):
+    def calculate_signals(self, event):
+        pass
+
+
+class NullStatistics(AbstractStatistics):
+    def update(self, timestamp, portfolio_handler):
+        pass
+
+    def get_results(self):
+        return {}
+
+
+def run(events_queue, bars):
+    '''
+    Runs a session over the synthetic bars and returns the number of events handled per second.
+    '''
+    price_handler = SyntheticBarPriceHandler(events_queue, bars)
+    session = TradingSession(config=None, strategy=IdleStrategy(), tickers=price_handler.symbols, equity=0,
+                             start_date=None, end_date=None, events_queue=events_queue,
+                             price_handler=price_handler, statistics=NullStatistics(),
+                             title=['Event bus benchmark'])
+
+    # The polling loop prints every event, which is part of its cost, so it is sent to os.devnull
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        session._run_session()
+        elapsed = time.perf_counter() - start
+    return bars / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the events/sec of the session event loop')
+    parser.add_argument('--bars', type=int, default=2000000, help='Number of bars to stream')
+    args = parser.parse_args()
+
+    before = run(queue.Queue(), args.bars)
+    print('queue.Queue polling:  {0:>12,.0f} events/sec'.format(before))
+    after = run(BacktestEventBus(), args.bars)
+    print('BacktestEventBus:     {0:>12,.0f} events/sec'.format(after))
+    print('Speed-up:             {0:>12.2f}x'.format(after / before))
@@ -0,0 +1,77 @@
+import argparse
+import time
+import tracemalloc
+from event import BarEvent, EventType, FillEvent, OrderEvent, SignalEvent
+
+
+class DictBarEvent(object):
+    '''
+    The former layout of BarEvent, with a per-instance __dict__ and the readable period built from a lookup dict
+    allocated on every bar, for comparison.
+    '''
+    def __init__(self, ticker, time, period, open_price, high_price, low_price, close_price, volume,
+                 adj_close_price=None):
+        self.type = EventType.BAR
+        self.ticker = ticker
+        self.time = time
+        self.period = period
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+        self.adj_close_price = adj_close_price
+        lut = {1: "1sec", 5: "5sec", 10: "10sec", 15: "15sec", 30: "30sec", 60: "1min", 300: "5min", 600: "10min",
+               900: "15min", 1800: "30min", 3600: "1hr", 86400: "1day", 604800: "1wk"}
+        self.period_readable = lut[period] if period in lut else "%ssec" % str(period)
+
+
+def bar_args(i):
+    return ('AAPL', i, 86400, 1000000000, 1010000000, 990000000, 1005000000, 1000)
+
+
+EVENTS = [
+    ('BarEvent (__dict__)', DictBarEvent, bar_args),
+    ('BarEvent', BarEvent, bar_args),
+    ('SignalEvent', SignalEvent, lambda i: ('AAPL', 'BOT', 100)),
+    ('OrderEvent', OrderEvent, lambda i: ('AAPL', 'BOT', 100)),
+    ('FillEvent', FillEvent, lambda i: (i, 'AAPL', 'BOT', 100, 'SIMULATED', 1005000000, 10000000)),
+]
+
+
+def bytes_per_event(cls, make_args, count):
+    '''
+    Measures the memory allocated per live event. The arguments are built beforehand, so that only the events
+    themselves are counted.
+    '''
+    args = [make_args(i) for i in range(count)]
+    events = [None] * count
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        events[i] = cls(*args[i])
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / count
+
+
+def events_per_second(cls, make_args, count):
+    '''
+    Measures how many events are constructed per second.
+    '''
+    args = [make_args(i) for i in range(count)]
+    start = time.perf_counter()
+    for a in args:
+        cls(*a)
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the memory and construction cost of the event classes')
+    parser.add_argument('--events', type=int, default=1000000, help='Number of events to construct per class')
+    args = parser.parse_args()
+
+    print('{0:<22}{1:>14}{2:>18}'.format('Event', 'bytes/event', 'events/sec'))
+    for name, cls, make_args in EVENTS:
+        print('{0:<22}{1:>14,.0f}{2:>18,.0f}'.format(name, bytes_per_event(cls, make_args, args.events),
+                                                       events_per_second(cls, make_args, args.events)))
@@ -0,0 +1,117 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from event import SignalEvent
+from position_sizer_naive import NaivePositionSizer
+from price_panel import PricePanel
+from strategy_base import AbstractStrategy
+from trading_session import TradingSession
+
+
+def _write_ticker_json(json_dir, ticker, df):
+    '''
+    Writes the bars of a ticker to the JSON data directory, one <year>/<letter>/_<ticker>.json file per year.
+    '''
+    paths = []
+    for year, year_df in df.groupby(df.index.year):
+        directory = os.path.join(json_dir, str(year), ticker[0])
+        os.makedirs(directory, exist_ok=True)
+        records = [{'start': start.strftime('%Y-%m-%dT%H:%M:%S.000000-05:00'),
+                    'end': start.strftime('%Y-%m-%dT%H:%M:%S.000000-05:00'),
+                    'open': None if pd.isnull(row['open']) else row['open'],
+                    'high': None if pd.isnull(row['high']) else row['high'],
+                    'low': None if pd.isnull(row['low']) else row['low'],
+                    'close': None if pd.isnull(row['close']) else row['close'],
+                    'volume': row['volume']}
+                   for start, row in year_df.iterrows()]
+        path = os.path.join(directory, '_{0}.json'.format(ticker))
+        with open(path, 'w') as fd:
+            json.dump(records, fd)
+        paths.append(path)
+    return paths
+
+
+def _make_bars(offset, start='2016-01-01', end='2019-01-01'):
+    '''
+    Daily bars whose close rises by one cent a day from 10 plus offset, so every bar of every ticker is distinct.
+    '''
+    index = pd.bdate_range(start, end, inclusive='left')
+    close = np.round(10.0 + offset + 0.01 * np.arange(len(index)), 2)
+    return pd.DataFrame({'open': close, 'high': close + 0.5, 'low': close - 0.5, 'close': close, 'volume': 1000.0},
+                        index=index)
+
+
+class AlternatingStrategy(AbstractStrategy):
+    '''
+    Buys every tenth bar of a ticker and sells it back five bars later.
+    '''
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.bars = {}
+
+    def calculate_signals(self, event):
+        count = self.bars.get(event.ticker, 0) + 1
+        self.bars[event.ticker] = count
+        if count % 10 == 5:
+            self.events_queue.put(SignalEvent(event.ticker, 'BOT', 100))
+        elif count % 10 == 0:
+            self.events_queue.put(SignalEvent(event.ticker, 'SLD', 100))
+
+
+def _make_session(price_handler, events_queue, strategy=None, **kwargs):
+    '''
+    A testing session of the AlternatingStrategy over every ticker of the price handler, sized by the
+    NaivePositionSizer.
+    '''
+    strategy = strategy if strategy is not None else AlternatingStrategy(events_queue)
+    kwargs.setdefault('position_sizer', NaivePositionSizer())
+    return TradingSession(None, strategy, list(price_handler.tickers), 100000.0, None, None, events_queue,
+                          price_handler=price_handler, title=['Test'], **kwargs)
+
+
+@pytest.fixture
+def tickers_data():
+    '''
+    DataFrames of bars of the tickers AAA, BBB and CCC, random walks over 120 business days from 2018.
+    '''
+    rng = np.random.default_rng(0)
+    tickers_data = {}
+    for ticker in ('AAA', 'BBB', 'CCC'):
+        index = pd.bdate_range('2018-01-01', periods=120)
+        close = 20.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, len(index))))
+        tickers_data[ticker] = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                                             'close': close, 'volume': 1000.0}, index=index)
+    return tickers_data
+
+
+@pytest.fixture
+def panel(tickers_data):
+    return PricePanel.from_tickers_data(tickers_data)
+
+
+@pytest.fixture
+def make_session():
+    return _make_session
+
+
+@pytest.fixture
+def write_ticker_json():
+    return _write_ticker_json
+
+
+@pytest.fixture
+def make_bars():
+    return _make_bars
+
+
+@pytest.fixture
+def json_dir(tmp_path):
+    '''
+    A JSON data directory of the tickers AAA.TO, BBB.TO and CCC.TO from 2016 to 2018.
+    '''
+    json_dir = str(tmp_path / 'eod')
+    for offset, ticker in enumerate(('AAA.TO', 'BBB.TO', 'CCC.TO')):
+        _write_ticker_json(json_dir, ticker, _make_bars(offset))
+    return json_dir
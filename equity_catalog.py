@@ -0,0 +1,162 @@
+import json
+import os
+from price_handler_daily_bar import _read_ticker_json
+from price_manifest import JsonDataManifest
+
+
+class EquityCatalog(object):
+    """
+    EquityCatalog records, once during ingest, a summary of the data quality of every ticker in the JSON data
+    directory: its first and last bar dates, its row count, whether it contains null open or close prices (meaning it
+    is not active), its listing exchange and, per year, its average daily volume and dollar volume.
+
+    This allows a universe to be filtered on exchange, liquidity and activity within a window without opening any
+    price files.
+    """
+
+    def __init__(self, catalog_file=None):
+        """
+        Loads the catalog from catalog_file if it exists.
+
+        :param catalog_file: Optional file the catalog is loaded from and saved to
+        """
+        self.catalog_file = catalog_file
+        self.tickers = {}
+        if self.catalog_file is not None and os.path.isfile(self.catalog_file):
+            with open(self.catalog_file, 'r') as fd:
+                self.tickers = json.load(fd)
+
+    def save(self, catalog_file=None):
+        '''
+        Saves the catalog as JSON.
+
+        :param catalog_file: The file to save to, defaults to the catalog_file the catalog was created with
+        :return:
+        '''
+        if catalog_file is None:
+            catalog_file = self.catalog_file
+        tmp_file = catalog_file + '.tmp'
+        with open(tmp_file, 'w') as fd:
+            json.dump(self.tickers, fd)
+        os.replace(tmp_file, catalog_file)
+
+    @classmethod
+    def build(cls, json_dir, catalog_file=None, listings=None, manifest=None, tickers=None):
+        '''
+        Builds the catalog by reading the JSON files of every ticker once, and saves it if catalog_file is given.
+
+        :param json_dir: Directory of JSON data files
+        :param catalog_file: Optional file to save the catalog to
+        :param listings: Optional dictionary of ticker to listing exchange
+        :param manifest: Optional JsonDataManifest of json_dir
+        :param tickers: Optional list of tickers to catalog, defaults to every ticker of the manifest
+        :return: EquityCatalog
+        '''
+        if manifest is None:
+            manifest = JsonDataManifest(json_dir)
+        if tickers is None:
+            tickers = sorted(manifest.tickers)
+
+        catalog = cls()
+        catalog.catalog_file = catalog_file
+        for ticker in tickers:
+            df = _read_ticker_json(manifest.ticker_paths(ticker))
+            if df is not None:
+                exchange = listings.get(ticker) if listings is not None else None
+                catalog.update_ticker(ticker, df, exchange)
+
+        if catalog_file is not None:
+            catalog.save()
+        return catalog
+
+    def update_ticker(self, ticker, df, exchange=None):
+        '''
+        Records the summary of a single ticker from its cleaned DataFrame of bars.
+
+        :param ticker: The ticker symbol
+        :param df: DataFrame of OHLCV bars indexed by a DatetimeIndex
+        :param exchange: The listing exchange of the ticker
+        :return:
+        '''
+        if len(df) == 0:
+            return
+
+        null_price = df['open'].isnull() | df['close'].isnull()
+        volume = df['volume'].fillna(0)
+        dollar_volume = (df['close'] * volume).fillna(0)
+        years = {}
+        for year, rows in df.groupby(df.index.year).groups.items():
+            years[str(year)] = {
+                'rows': int(len(rows)),
+                'adv': float(volume.loc[rows].mean()),
+                'dollar_adv': float(dollar_volume.loc[rows].mean()),
+                'null_price': bool(null_price.loc[rows].any()),
+            }
+
+        self.tickers[ticker] = {
+            'exchange': exchange,
+            'first': df.index.min().strftime('%Y-%m-%d'),
+            'last': df.index.max().strftime('%Y-%m-%d'),
+            'rows': int(len(df)),
+            'null_open': bool(df['open'].isnull().any()),
+            'null_close': bool(df['close'].isnull().any()),
+            'years': years,
+        }
+
+    @staticmethod
+    def _years_in_window(entry, start, end):
+        '''
+        Returns the yearly summaries of an entry that overlap [start, end), as strings of 'YYYY-MM-DD'.
+        '''
+        return [summary for year, summary in entry['years'].items()
+                if (start is None or year + '-12-31' >= start) and (end is None or year + '-01-01' < end)]
+
+    def select(self, tickers=None, exchanges=None, min_adv=None, min_dollar_adv=None, active_start=None,
+               active_end=None, include_inactive=False):
+        '''
+        Returns the sorted list of catalogued tickers that pass every given filter.
+
+        The average daily volumes are taken over the years that overlap the active window, or over every year if no
+        window is given. A ticker with null prices in those years is treated as not active.
+
+        :param tickers: Optional list of tickers to choose from, defaults to every catalogued ticker
+        :param exchanges: Optional list of listing exchanges
+        :param min_adv: Minimum average daily volume
+        :param min_dollar_adv: Minimum average daily dollar volume
+        :param active_start: The ticker must have bars on or after this date
+        :param active_end: The ticker must have bars before this date
+        :param include_inactive: Keep tickers with null prices
+        :return: List of tickers
+        '''
+        start = str(active_start)[:10] if active_start is not None else None
+        end = str(active_end)[:10] if active_end is not None else None
+        if tickers is None:
+            tickers = self.tickers
+
+        selected = []
+        for ticker in tickers:
+            entry = self.tickers.get(ticker)
+            if entry is None:
+                continue
+            if exchanges is not None and entry['exchange'] not in exchanges:
+                continue
+            if start is not None and entry['last'] < start:
+                continue
+            if end is not None and entry['first'] >= end:
+                continue
+
+            years = self._years_in_window(entry, start, end)
+            if not include_inactive and any(summary['null_price'] for summary in years):
+                continue
+            rows = sum(summary['rows'] for summary in years)
+            if min_adv is not None or min_dollar_adv is not None:
+                if rows == 0:
+                    continue
+                adv = sum(summary['adv'] * summary['rows'] for summary in years) / rows
+                dollar_adv = sum(summary['dollar_adv'] * summary['rows'] for summary in years) / rows
+                if min_adv is not None and adv < min_adv:
+                    continue
+                if min_dollar_adv is not None and dollar_adv < min_dollar_adv:
+                    continue
+            selected.append(ticker)
+        return sorted(selected)
@@ -1,26 +1,79 @@
 import settings
 import pandas as pd
+from equity_catalog import EquityCatalog
 
 
 class EquityHandler(object):
-    def __init__(self, listingexchange=None, volumemin=500000):
+    def __init__(self, listingexchange=None, volumemin=500000, catalog=None):
         '''
         Initialise an EquityHandler object
 
         :param listingExchange: A list containing the exchanges to be queried
+        :param volumemin: The minimum average daily volume of a symbol, applied when a catalog is given
+        :param catalog: Optional EquityCatalog, or the file it is saved to, used to filter the symbols without opening
+                        any price files
         '''
         self.listingExchange = listingexchange
+        self.volumemin = volumemin
+        if catalog is not None and not isinstance(catalog, EquityCatalog):
+            catalog = EquityCatalog(catalog)
+        self.catalog = catalog
 
-    def get_symbols(self):
+    def _get_listings(self):
+        testing = False
+        config = settings.from_file(settings.DEFAULT_CONFIG_FILENAME, testing)
+        listing_file = config.backtester.listings_file
+        return pd.read_json(listing_file, orient='index')
+
+    def build_catalog(self, json_dir, catalog_file=None):
+        '''
+        Builds the catalog of every symbol in the JSON data directory, recording the listing exchange of each symbol,
+        and uses it from then on.
+
+        :param json_dir: Directory of JSON data files
+        :param catalog_file: Optional file to save the catalog to
+        :return: EquityCatalog
+        '''
+        listings = self._get_listings()
+        self.catalog = EquityCatalog.build(json_dir, catalog_file,
+                                           listings=listings['listingExchange'].to_dict())
+        return self.catalog
+
+    def get_symbols(self, min_adv=None, min_dollar_adv=None, active_start=None, active_end=None,
+                    include_inactive=False):
         '''
         Gets and returns all symbols that are apart of the requested exchange(s)
 
+        If a catalog was given, the symbols are answered from the catalog and can be filtered further on their average
+        daily volume (defaulting to volumemin), average daily dollar volume and whether they are active within a window.
+        Without a catalog, these filters raise a ValueError, rather than being ignored.
+
+        :param min_adv: Minimum average daily volume, defaults to volumemin
+        :param min_dollar_adv: Minimum average daily dollar volume
+        :param active_start: Symbols must have bars on or after this date
+        :param active_end: Symbols must have bars before this date
+        :param include_inactive: Keep symbols with null prices
         :return:
         '''
-        testing = False
-        config = settings.from_file(settings.DEFAULT_CONFIG_FILENAME, testing)
-        listing_file = config.backtester.listings_file
-        listings = pd.read_json(listing_file, orient='index')
+        if self.catalog is not None:
+            if min_adv is None:
+                min_adv = self.volumemin
+            symbols = self.catalog.select(exchanges=self.listingExchange,
+                                          min_adv=min_adv,
+                                          min_dollar_adv=min_dollar_adv,
+                                          active_start=active_start,
+                                          active_end=active_end,
+                                          include_inactive=include_inactive)
+            if len(symbols) == 0:
+                print('There are no symbols listed for exchange {0}'.format(self.listingExchange))
+                return None
+            return symbols
+
+        if (min_adv is not None or min_dollar_adv is not None or active_start is not None or active_end is not None or
+                include_inactive):
+            raise ValueError('Can only filter the symbols on their volume and activity with a catalog')
+
+        listings = self._get_listings()
 
         if self.listingExchange is None:
             return listings.index.values.tolist()
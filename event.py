@@ -1,7 +1,24 @@
 from enum import Enum
 
 
-EventType = Enum("EventType", "TICK BAR SIGNAL ORDER FILL SENTIMENT")
+EventType = Enum("EventType", "TICK BAR SIGNAL ORDER FILL SENTIMENT BAR_SLICE")
+
+# Human-readable names of the common bar periods, in seconds
+READABLE_PERIODS = {
+    1: "1sec",
+    5: "5sec",
+    10: "10sec",
+    15: "15sec",
+    30: "30sec",
+    60: "1min",
+    300: "5min",
+    600: "10min",
+    900: "15min",
+    1800: "30min",
+    3600: "1hr",
+    86400: "1day",
+    604800: "1wk",
+}
 
 
 class Event(object):
@@ -9,11 +26,24 @@ class Event(object):
         Event is base class providing an interface for all subsequent
         (inherited) events, that will trigger further events in the
         trading infrastructure.
+
+        Events are created for every bar of every ticker, so they are
+        kept compact: each class declares __slots__ rather than having
+        a per-instance __dict__, and its EventType is a class attribute.
     """
+    __slots__ = ()
+    type = None
+
     @property
     def typename(self):
         return self.type.name
 
+    def __repr__(self):
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join(["%s=%r" % (name, getattr(self, name)) for name in self.__slots__])
+        )
+
 
 class BarEvent(Event):
     """
@@ -21,6 +51,9 @@ class BarEvent(Event):
         open-high-low-close-volume bar, as would be generated
         via common data providers such as Yahoo Finance.
     """
+    __slots__ = ('ticker', 'time', 'period', 'open_price', 'high_price', 'low_price', 'close_price', 'volume',
+                 'adj_close_price')
+    type = EventType.BAR
 
     def __init__(self,
                  ticker,
@@ -46,7 +79,6 @@ class BarEvent(Event):
         :param adj_close_price: The vendor adjusted closing price (e.g. back-adjustment) of the bar
         """
 
-        self.type = EventType.BAR
         self.ticker = ticker
         self.time = time
         self.period = period
@@ -56,9 +88,9 @@ class BarEvent(Event):
         self.close_price = close_price
         self.volume = volume
         self.adj_close_price = adj_close_price
-        self.period_readable = self._readable_period()
 
-    def _readable_period(self):
+    @property
+    def period_readable(self):
         """
         Creates a human-readable period from the number
         of seconds specified for 'period'.
@@ -74,25 +106,10 @@ class BarEvent(Event):
         :return: String containing readable format
         """
 
-        lut = {
-            1: "1sec",
-            5: "5sec",
-            10: "10sec",
-            15: "15sec",
-            30: "30sec",
-            60: "1min",
-            300: "5min",
-            600: "10min",
-            900: "15min",
-            1800: "30min",
-            3600: "1hr",
-            86400: "1day",
-            604800: "1wk",
-        }
-        if self.period in lut:
-            return lut[self.period]
-        else:
+        readable = READABLE_PERIODS.get(self.period)
+        if readable is None:
             return "%ssec" % str(self.period)
+        return readable
 
     def __str__(self):
         format_str = "Type: %s, Ticker: %s, Time: %s, Period: %s, " \
@@ -110,10 +127,89 @@ class BarEvent(Event):
         return str(self)
 
 
+class BarSliceEvent(Event):
+    """
+        Handles the event of receiving the bars of every ticker that has a
+        bar at a single timestamp, as a cross-section held in NumPy arrays.
+        This allows a whole day of a large universe to be processed in a
+        few vectorised operations, rather than one BarEvent per ticker.
+    """
+    __slots__ = ('time', 'period', 'symbols', 'ticker_ids', 'open_prices', 'high_prices', 'low_prices',
+                 'close_prices', 'volumes')
+    type = EventType.BAR_SLICE
+
+    def __init__(self,
+                 time,
+                 period,
+                 symbols,
+                 ticker_ids,
+                 open_prices,
+                 high_prices,
+                 low_prices,
+                 close_prices,
+                 volumes):
+        """
+        Initialises the BarSliceEvent
+
+        :param time: The timestamp of the bars
+        :param period: The time period cover by the bars in seconds
+        :param symbols: The symbol table, mapping each ticker id to its ticker symbol
+        :param ticker_ids: int64 array of the ids of the tickers with a bar at this time
+        :param open_prices: int64 array of the unadjusted opening prices
+        :param high_prices: int64 array of the unadjusted high prices
+        :param low_prices: int64 array of the unadjusted low prices
+        :param close_prices: int64 array of the unadjusted close prices
+        :param volumes: int64 array of the volumes of trading within the bars
+        """
+
+        self.time = time
+        self.period = period
+        self.symbols = symbols
+        self.ticker_ids = ticker_ids
+        self.open_prices = open_prices
+        self.high_prices = high_prices
+        self.low_prices = low_prices
+        self.close_prices = close_prices
+        self.volumes = volumes
+
+    def __len__(self):
+        return len(self.ticker_ids)
+
+    @property
+    def tickers(self):
+        """
+        The ticker symbols of the bars, in the order of the arrays.
+        """
+        return [self.symbols[ticker_id] for ticker_id in self.ticker_ids.tolist()]
+
+    def bar_events(self):
+        """
+        Splits the slice into one BarEvent per ticker, for components that only handle BarEvents.
+
+        :return: List of BarEvents
+        """
+        return [BarEvent(self.symbols[ticker_id], self.time, self.period, open_price, high_price, low_price,
+                         close_price, volume)
+                for ticker_id, open_price, high_price, low_price, close_price, volume in
+                zip(self.ticker_ids.tolist(), self.open_prices.tolist(), self.high_prices.tolist(),
+                    self.low_prices.tolist(), self.close_prices.tolist(), self.volumes.tolist())]
+
+    def __str__(self):
+        return "Type: %s, Time: %s, Period: %s, Tickers: %s" % (
+            str(self.type), str(self.time), str(self.period), str(len(self))
+        )
+
+    def __repr__(self):
+        return str(self)
+
+
 class SignalEvent(Event):
     '''
     Handles the event of sending a Signal from a Strategy object. This is received by a Portfolio object and acted upon.
     '''
+    __slots__ = ('ticker', 'action', 'suggested_quantity')
+    type = EventType.SIGNAL
+
     def __init__(self, ticker, action, suggested_quantity=None):
         '''
         Initialises the SignalEvent.
@@ -123,7 +219,6 @@ class SignalEvent(Event):
         :param suggested_quantity: Optional positively valued integer representing a suggested absolute quantity of
                     units of an asset to transact in, which is used by the PositionSizer and RiskManager.
         '''
-        self.type = EventType.SIGNAL
         self.ticker = ticker
         self.action = action
         self.suggested_quantity = suggested_quantity
@@ -134,6 +229,9 @@ class OrderEvent(Event):
     Handles the event of sending an Order to an execution system. The order contains a ticker (e.g. GOOG), action
     (BOT or SLD) and quantity.
     '''
+    __slots__ = ('ticker', 'action', 'quantity')
+    type = EventType.ORDER
+
     def __init__(self, ticker, action, quantity):
         '''
         Initialises the OrderEvent
@@ -142,7 +240,6 @@ class OrderEvent(Event):
         :param action: 'BOT' (for long) or 'SLD' (for short).
         :param quantity: The quantity of shares to transact.
         '''
-        self.type = EventType.ORDER
         self.ticker = ticker
         self.action = action
         self.quantity = quantity
@@ -163,6 +260,8 @@ class FillEvent(Event):
     TODO: Currently does not support filling positions at different prices. This will be simulated by averaging
     the cost.
     '''
+    __slots__ = ('timestamp', 'ticker', 'action', 'quantity', 'exchange', 'price', 'commission')
+    type = EventType.FILL
 
     def __init__(self, timestamp, ticker, action, quantity, exchange, price, commission):
         '''
@@ -175,7 +274,6 @@ class FillEvent(Event):
         :param price: The price at which the trade was filled
         :param commission: The brokerage commission for carrying out the trade.
         '''
-        self.type = EventType.FILL
         self.timestamp = timestamp
         self.ticker = ticker
         self.action = action
@@ -0,0 +1,121 @@
+import asyncio
+from collections import deque
+import queue
+
+
+class BacktestEventBus(object):
+    """
+    BacktestEventBus is a low-overhead event queue for single-threaded backtests. It is a drop-in replacement for the
+    queue.Queue that is passed to the strategy, price handler and portfolio handler, but it is backed by a plain
+    deque, so no locks are taken, and pop() returns None rather than raising queue.Empty when it is empty.
+
+    It also holds a per-EventType dispatch table, so that the session can route each event to its handlers with a
+    single dictionary lookup.
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self._handlers = {}
+
+    def __len__(self):
+        return len(self.queue)
+
+    def put(self, event, block=True, timeout=None):
+        '''
+        Places an event at the back of the queue. block and timeout are only accepted for compatibility with
+        queue.Queue, as the bus never blocks.
+
+        :param event: The event to add
+        :return:
+        '''
+        self.queue.append(event)
+
+    def pop(self):
+        '''
+        Removes and returns the event at the front of the queue, or None if the queue is empty.
+
+        :return: Event or None
+        '''
+        if self.queue:
+            return self.queue.popleft()
+        return None
+
+    def get(self, block=False, timeout=None):
+        '''
+        Removes and returns the event at the front of the queue, raising queue.Empty if it is empty, for compatibility
+        with code written against queue.Queue.
+
+        :return: Event
+        '''
+        if self.queue:
+            return self.queue.popleft()
+        raise queue.Empty
+
+    def empty(self):
+        return not self.queue
+
+    def qsize(self):
+        return len(self.queue)
+
+    def subscribe(self, event_type, handler):
+        '''
+        Adds a handler to the dispatch table, to be called with every dispatched event of event_type.
+
+        :param event_type: The EventType handled
+        :param handler: Callable taking the event
+        :return:
+        '''
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        '''
+        Removes a handler from the dispatch table.
+
+        :param event_type: The EventType handled
+        :param handler: The handler to remove
+        :return:
+        '''
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def dispatch(self, event):
+        '''
+        Calls every handler subscribed to the type of the event, in the order they were subscribed.
+
+        :param event: The event to dispatch
+        :return:
+        '''
+        for handler in self._handlers.get(event.type, ()):
+            handler(event)
+
+
+class AsyncEventBus(BacktestEventBus):
+    """
+    AsyncEventBus is the event bus of live sessions run on asyncio. Events from asynchronous sources, such as the price
+    events of the feeds, are published onto an asyncio.Queue, together with the time they were received. The signals,
+    orders and fills that follow from an event are put synchronously by the strategy, portfolio and execution handlers,
+    as in a backtest, onto the deque of the BacktestEventBus, and are all dispatched before the next published event.
+    """
+
+    def __init__(self):
+        super(AsyncEventBus, self).__init__()
+        self.incoming = asyncio.Queue()
+
+    def publish(self, event, received_ns=None):
+        '''
+        Publishes an event from an asynchronous source, to be dispatched by the live session in the order received.
+
+        :param event: The event to publish, or None to stop the session
+        :param received_ns: The monotonic clock reading in nanoseconds when the event was received
+        :return:
+        '''
+        self.incoming.put_nowait((received_ns, event))
+
+    async def next_published(self):
+        '''
+        Waits for the next published event.
+
+        :return: Tuple of the time the event was received and the event
+        '''
+        return await self.incoming.get()
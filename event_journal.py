@@ -0,0 +1,362 @@
+from datetime import datetime
+import json
+import os
+import numpy as np
+import pandas as pd
+from bar_stream import _to_nanoseconds
+from event import BarEvent, BarSliceEvent, EventType
+from price_handler_base import AbstractBarPriceHandler
+from price_handler_mmap import _to_nanoseconds as _datetime_to_nanoseconds, _from_nanoseconds
+
+JOURNAL_VERSION = 1
+
+# Every event is written as one or more of these 64 byte records. 'count' is the number of records of the event, i.e.
+# 1 for a BarEvent and the number of tickers of a BarSliceEvent, which is repeated on each of its records.
+JOURNAL_DTYPE = np.dtype([
+    ('kind', np.int32),
+    ('ticker_id', np.int32),
+    ('timestamp', np.int64),
+    ('period', np.int32),
+    ('count', np.int32),
+    ('open', np.int64),
+    ('high', np.int64),
+    ('low', np.int64),
+    ('close', np.int64),
+    ('volume', np.int64),
+])
+
+BAR_KIND = EventType.BAR.value
+BAR_SLICE_KIND = EventType.BAR_SLICE.value
+
+
+def _tickers_path(path):
+    return path + '.tickers.json'
+
+
+def _read_tickers(path):
+    '''
+    Reads the sidecar ticker table of a journal, or returns None if the journal was never written.
+    '''
+    try:
+        with open(_tickers_path(path), 'r') as fd:
+            return json.load(fd)
+    except FileNotFoundError:
+        return None
+
+
+class EventJournal(object):
+    """
+    EventJournal records the price events dispatched by a session to an append-only binary file, as fixed-width
+    records of already parsed prices and nanosecond timestamps. Ticker symbols are interned into a table of integer
+    ids, which is kept in a JSON sidecar next to the journal together with the type of the event timestamps.
+
+    The journal is an exact record of the input of the session: replaying it with a JournalPriceHandler reproduces the
+    run without reading any JSON, building any DataFrames or merge sorting the tickers. A journal that already exists
+    is appended to, so that a session carried on with TradingSession.extend() can keep recording to it.
+    """
+
+    def __init__(self, path, buffer_size=65536):
+        """
+        :param path: The journal file, the ticker table is written to path + '.tickers.json'
+        :param buffer_size: Number of records buffered before they are written
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        meta = _read_tickers(path)
+        if meta is None:
+            meta = {'version': JOURNAL_VERSION, 'time': None, 'tickers': []}
+        self.time_type = meta['time']
+        self.symbols = meta['tickers']
+        self.ticker_ids = {ticker: ticker_id for ticker_id, ticker in enumerate(self.symbols)}
+        self._meta_dirty = False
+
+    def __getstate__(self):
+        # The buffered records are written out, so that copies of a session do not record them twice
+        self.flush()
+        state = self.__dict__.copy()
+        state['buffer'] = []
+        return state
+
+    def _ticker_id(self, ticker):
+        ticker_id = self.ticker_ids.get(ticker)
+        if ticker_id is None:
+            ticker_id = len(self.symbols)
+            self.symbols.append(ticker)
+            self.ticker_ids[ticker] = ticker_id
+            self._meta_dirty = True
+        return ticker_id
+
+    def _timestamp(self, time):
+        '''
+        Converts the time of an event to nanoseconds, recording its type so that replayed events have the same type.
+        '''
+        if self.time_type is None:
+            if isinstance(time, pd.Timestamp):
+                self.time_type = 'pandas'
+            elif isinstance(time, datetime):
+                self.time_type = 'datetime'
+            else:
+                self.time_type = 'int'
+            self._meta_dirty = True
+        if self.time_type == 'pandas':
+            return time.value
+        elif self.time_type == 'datetime':
+            return _datetime_to_nanoseconds(time)
+        return int(time)
+
+    def record(self, event):
+        '''
+        Appends a BarEvent or BarSliceEvent to the journal. Ticks are not supported, as there is no TickEvent to
+        replay them as.
+
+        :param event: The price event
+        :return:
+        '''
+        timestamp = self._timestamp(event.time)
+        if event.type == EventType.BAR:
+            self.buffer.append((BAR_KIND, self._ticker_id(event.ticker), timestamp, event.period, 1, event.open_price,
+                                event.high_price, event.low_price, event.close_price, event.volume))
+        elif event.type == EventType.BAR_SLICE:
+            count = len(event)
+            self.buffer.extend((BAR_SLICE_KIND, self._ticker_id(ticker), timestamp, event.period, count, open_price,
+                                high_price, low_price, close_price, volume)
+                               for ticker, open_price, high_price, low_price, close_price, volume in
+                               zip(event.tickers, event.open_prices.tolist(), event.high_prices.tolist(),
+                                   event.low_prices.tolist(), event.close_prices.tolist(), event.volumes.tolist()))
+        else:
+            raise Exception('Could not record event of type {0} to the journal'.format(event.typename))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes the buffered records, and the ticker table if a ticker was added.
+        :return:
+        '''
+        if self._meta_dirty:
+            tmp_file = _tickers_path(self.path) + '.tmp'
+            with open(tmp_file, 'w') as fd:
+                json.dump({'version': JOURNAL_VERSION, 'time': self.time_type, 'tickers': self.symbols}, fd)
+            os.replace(tmp_file, _tickers_path(self.path))
+            self._meta_dirty = False
+        if self.buffer:
+            with open(self.path, 'ab') as fd:
+                np.array(self.buffer, dtype=JOURNAL_DTYPE).tofile(fd)
+            self.buffer = []
+
+
+class JournalPriceHandler(AbstractBarPriceHandler):
+    """
+    JournalPriceHandler replays the price events recorded by an EventJournal, in the order they were recorded. The
+    journal is memory-mapped and read in chunks of records, so replay runs at the speed events can be created, and the
+    events are identical to the recorded ones: the same tickers, prices, periods and type of timestamp, with BarSliceEvents
+    replayed as slices.
+    """
+
+    CHUNK_SIZE = 4096
+
+    def __init__(self, path, events_que, init_tickers=None, start_date=None, end_date=None):
+        """
+        :param path: The journal file written by an EventJournal
+        :param events_que: Que that holds all events
+        :param init_tickers: Initial tickers, None subscribes every ticker of the journal
+        :param start_date: Date to start replaying events from
+        :param end_date: Date to stop replaying events at
+        """
+        self.path = path
+        self.events_que = events_que
+        self.continue_backtest = True
+        self.tickers = {}
+        self.tickers_data = {}
+        self.start_date = start_date
+        self.end_date = end_date
+        self._open()
+        self._subscribed = [False] * len(self.symbols)
+        self._subscribed_mask = np.zeros(len(self.symbols), dtype=bool)
+        self._all_subscribed = False
+
+        if init_tickers is None:
+            init_tickers = self.symbols
+        for ticker in init_tickers:
+            self.subscribe_ticker(ticker)
+
+        self._cursor = 0
+        self._end = len(self.records)
+        if self.start_date is not None:
+            self._cursor = self._search(_to_nanoseconds(self.start_date))
+        if self.end_date is not None:
+            self._end = self._search(_to_nanoseconds(self.end_date))
+        self._buffer = []
+        self._buffer_pos = 0
+        self._last_time = (None, None)
+
+    def _open(self):
+        meta = _read_tickers(self.path)
+        if meta is None:
+            raise Exception('No event journal found at {0}'.format(self.path))
+        self.time_type = meta['time']
+        self.symbols = meta['tickers']
+        self.ticker_ids = {ticker: ticker_id for ticker_id, ticker in enumerate(self.symbols)}
+        if os.path.getsize(self.path) > 0:
+            self.records = np.memmap(self.path, dtype=JOURNAL_DTYPE, mode='r')
+        else:
+            self.records = np.empty(0, dtype=JOURNAL_DTYPE)
+
+    def __getstate__(self):
+        # Only the path of the journal is pickled, each process maps the file itself
+        state = self.__dict__.copy()
+        state.pop('records')
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def read_only_state(self):
+        '''
+        The journal is opened read-only, so forks share its memory map.
+        '''
+        return [self.records]
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the price handler to a ticker symbol of the journal.
+
+        :param ticker: The ticker to subscribe
+        :return:
+        """
+        if ticker in self.tickers:
+            print('Could not subscribe ticker {0} as is already subscribed.'.format(ticker))
+        elif ticker not in self.ticker_ids:
+            print('Could not subscribe ticker {0} as it was never recorded to the journal.'.format(ticker))
+        else:
+            self.tickers[ticker] = {'close': None, 'timestamp': None}
+            self._subscribed[self.ticker_ids[ticker]] = True
+            self._subscribed_mask[self.ticker_ids[ticker]] = True
+            self._all_subscribed = len(self.tickers) == len(self._subscribed)
+
+    def unsubscribe_ticker(self, ticker):
+        """
+        Unsubscribes the price handler from a current ticker symbol
+
+        :param ticker: The ticker to unsubscribe
+        :return:
+        """
+        if ticker in self.tickers:
+            self.tickers.pop(ticker)
+            self._subscribed[self.ticker_ids[ticker]] = False
+            self._subscribed_mask[self.ticker_ids[ticker]] = False
+            self._all_subscribed = False
+        else:
+            print('Could not unsubscribe ticker {0} as it was never subscribed'.format(ticker))
+
+    def _search(self, timestamp):
+        '''
+        Returns the index of the first record at or after timestamp, with a binary search on the memory map.
+        '''
+        timestamps = self.records['timestamp']
+        lo = 0
+        hi = len(timestamps)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamps[mid] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _time(self, timestamp):
+        '''
+        Converts a recorded timestamp back to the type it was recorded as. Consecutive events mostly share their
+        timestamp, so the last conversion is reused.
+        '''
+        if self._last_time[0] == timestamp:
+            return self._last_time[1]
+        if self.time_type == 'pandas':
+            time = pd.Timestamp(timestamp)
+        elif self.time_type == 'datetime':
+            time = _from_nanoseconds(timestamp)
+        else:
+            time = timestamp
+        self._last_time = (timestamp, time)
+        return time
+
+    def _next_record(self):
+        '''
+        Returns the position and the next record of a subscribed ticker as a tuple, or None once the end of the window
+        is reached. The records of a slice are all returned, even if only some of its tickers are subscribed.
+        '''
+        while True:
+            if self._buffer_pos >= len(self._buffer):
+                if self._cursor >= self._end:
+                    return None
+                chunk_end = min(self._cursor + self.CHUNK_SIZE, self._end)
+                self._buffer = self.records[self._cursor:chunk_end].tolist()
+                self._buffer_pos = 0
+                self._cursor = chunk_end
+
+            record = self._buffer[self._buffer_pos]
+            self._buffer_pos += 1
+            if record[0] == BAR_SLICE_KIND or self._all_subscribed or self._subscribed[record[1]]:
+                return self._cursor - len(self._buffer) + self._buffer_pos - 1, record
+
+    def _slice_event(self, position, count):
+        '''
+        Creates the BarSliceEvent of the count records from position, skipping over them in the stream, or returns None
+        if none of its tickers are subscribed.
+        '''
+        records = self.records[position:position + count]
+        self._cursor = position + count
+        self._buffer = []
+        self._buffer_pos = 0
+        if not self._all_subscribed:
+            records = records[self._subscribed_mask[records['ticker_id']]]
+        if len(records) == 0:
+            return None
+        return BarSliceEvent(self._time(int(records['timestamp'][0])), int(records['period'][0]), self.symbols,
+                             records['ticker_id'].astype(np.int64), np.array(records['open']),
+                             np.array(records['high']), np.array(records['low']), np.array(records['close']),
+                             np.array(records['volume']))
+
+    def peek_timestamp(self):
+        '''
+        Returns the timestamp of the next event of a subscribed ticker, without streaming it, or None once the end of
+        the window is reached.
+        '''
+        position = self._cursor - len(self._buffer) + self._buffer_pos
+        while position < self._end:
+            records = self.records[position:min(position + self.CHUNK_SIZE, self._end)]
+            if not self._all_subscribed:
+                records = records[self._subscribed_mask[records['ticker_id']]]
+            if len(records) > 0:
+                return self._time(int(records['timestamp'][0]))
+            position += self.CHUNK_SIZE
+        return None
+
+    def stream_next(self):
+        '''
+        Place the next recorded event on the queue
+        :return:
+        '''
+        while True:
+            next_record = self._next_record()
+            if next_record is None:
+                self.continue_backtest = False
+                return
+
+            position, record = next_record
+            kind, ticker_id, timestamp, period, count, open_price, high_price, low_price, close_price, volume = record
+            if kind == BAR_SLICE_KIND:
+                slice_event = self._slice_event(position, count)
+                if slice_event is None:
+                    continue
+                self._store_slice_event(slice_event)
+                self.events_que.put(slice_event)
+                return
+
+            bar_event = BarEvent(self.symbols[ticker_id], self._time(timestamp), period, open_price, high_price,
+                                 low_price, close_price, volume)
+            self._store_event(bar_event)
+            self.events_que.put(bar_event)
+            return
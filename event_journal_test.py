@@ -0,0 +1,97 @@
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from event import EventType, SignalEvent
+from event_bus import BacktestEventBus
+from event_journal import EventJournal, JournalPriceHandler
+from position_sizer_naive import NaivePositionSizer
+from price_handler_panel import PanelBarPriceHandler
+from price_panel import PricePanel
+from strategy_base import AbstractStrategy
+from trading_session import TradingSession
+
+
+class AlternatingStrategy(AbstractStrategy):
+    '''
+    Buys every fifth bar of a ticker and sells it back five bars later.
+    '''
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+        self.bars = {}
+
+    def calculate_signals(self, event):
+        count = self.bars.get(event.ticker, 0) + 1
+        self.bars[event.ticker] = count
+        if count % 10 == 5:
+            self.events_queue.put(SignalEvent(event.ticker, 'BOT', 100))
+        elif count % 10 == 0:
+            self.events_queue.put(SignalEvent(event.ticker, 'SLD', 100))
+
+
+def make_panel():
+    rng = np.random.default_rng(0)
+    tickers_data = {}
+    for ticker in ('AAA', 'BBB', 'CCC'):
+        index = pd.bdate_range('2018-01-01', periods=120)
+        close = 20.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, len(index))))
+        tickers_data[ticker] = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                                             'close': close, 'volume': 1000.0}, index=index)
+    return PricePanel.from_tickers_data(tickers_data)
+
+
+def make_session(price_handler_cls, source, journal=None):
+    bus = BacktestEventBus()
+    price_handler = price_handler_cls(source, bus)
+    return TradingSession(None, AlternatingStrategy(bus), list(price_handler.tickers), 100000.0, None, None, bus,
+                          price_handler=price_handler, position_sizer=NaivePositionSizer(), title=['Journal test'],
+                          journal=journal)
+
+
+def run(session):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return session.start_trading(testing=True)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_forks_do_not_record_to_the_journal_of_the_session(tmp_path, workers):
+    panel = make_panel()
+    path = str(tmp_path / 'journal')
+    full = run(make_session(PanelBarPriceHandler, panel))
+
+    session = make_session(PanelBarPriceHandler, panel, EventJournal(path, buffer_size=16))
+    session.run_until('2018-03-01')
+    snapshot = session.snapshot()
+    snapshot.fork().start_trading(testing=True)
+    snapshot.run_forks([None, None], workers=workers)
+    results = run(session)
+    assert results['equity'].equals(full['equity'])
+
+    replayed = make_session(JournalPriceHandler, path)
+    records = replayed.price_handler.records
+    assert len(records) == panel.has_bar.sum()
+    assert (np.diff(records['timestamp']) >= 0).all()
+    assert run(replayed)['equity'].equals(full['equity'])
+
+
+def test_a_fork_can_record_to_its_own_journal(tmp_path):
+    panel = make_panel()
+    session = make_session(PanelBarPriceHandler, panel, EventJournal(str(tmp_path / 'journal')))
+    session.run_until('2018-03-01')
+    fork = session.snapshot().fork(EventJournal(str(tmp_path / 'fork')))
+    run(fork)
+
+    replayed = JournalPriceHandler(str(tmp_path / 'fork'), BacktestEventBus())
+    assert replayed.peek_timestamp() == pd.Timestamp('2018-03-01')
+
+
+class TickEvent(object):
+    type = EventType.TICK
+    typename = 'TICK'
+    time = 0
+
+
+def test_ticks_are_not_recorded(tmp_path):
+    with pytest.raises(Exception):
+        EventJournal(str(tmp_path / 'journal')).record(TickEvent())
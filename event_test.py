@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from event import BarEvent, BarSliceEvent, SignalEvent
+
+
+def test_the_repr_of_a_bar_is_its_description():
+    bar = BarEvent('AAA', pd.Timestamp('2018-01-02'), 86400, 10, 12, 9, 11, 1000)
+    assert repr(bar) == str(bar) == ('Type: EventType.BAR, Ticker: AAA, Time: 2018-01-02 00:00:00, Period: 1day, '
+                                     'Open: 10, High: 12, Low: 9, Close: 11, Adj Close: None, Volume: 1000')
+
+
+def test_the_repr_of_a_slice_is_its_description():
+    ids = np.array([0, 2], dtype=np.int64)
+    bar_slice = BarSliceEvent(pd.Timestamp('2018-01-02'), 86400, ['AAA', 'BBB', 'CCC'], ids, ids, ids, ids, ids, ids)
+    assert repr(bar_slice) == str(bar_slice) == ('Type: EventType.BAR_SLICE, Time: 2018-01-02 00:00:00, Period: 86400, '
+                                                 'Tickers: 2')
+
+
+def test_the_repr_of_other_events_lists_their_slots():
+    assert repr(SignalEvent('AAA', 'BOT', 100)) == "SignalEvent(ticker='AAA', action='BOT', suggested_quantity=100)"
@@ -8,3 +8,7 @@ class EmptyTickEvent(AbstractEmptyDataRow):
 
 class EmptyBarEvent(AbstractEmptyDataRow):
     pass
+
+
+class PortfolioAuditError(Exception):
+    pass
@@ -0,0 +1,62 @@
+from execution_handler import AbstractExecutionHandler
+from event import FillEvent, EventType
+from price_parser import PriceParser
+
+
+class SimulatedExecutionHandler(AbstractExecutionHandler):
+    '''
+    The simulated execution handler converts every OrderEvent into an equivalent FillEvent, filled at the last close
+    price of the ticker with no latency or slippage. The commission follows the Questrade schedule for equities, of
+    one cent per share with a minimum of $4.95 and a maximum of $9.95 per trade.
+    '''
+
+    COMMISSION_PER_SHARE = PriceParser.parse(0.01)
+    MIN_COMMISSION = PriceParser.parse(4.95)
+    MAX_COMMISSION = PriceParser.parse(9.95)
+
+    def __init__(self, events_queue, price_handler, compliance=None):
+        '''
+        Initialises the handler, setting the event queue as well as access to local pricing.
+
+        :param events_queue: The Queue of Event objects.
+        :param price_handler: The price handler providing the last close prices.
+        :param compliance: Optional compliance component recording every fill.
+        '''
+        self.events_queue = events_queue
+        self.price_handler = price_handler
+        self.compliance = compliance
+
+    def calculate_commission(self, quantity, fill_price):
+        '''
+        Calculates the Questrade commission of a trade.
+
+        :param quantity: The quantity of shares transacted.
+        :param fill_price: The fill price of the trade.
+        :return: The commission, as a PriceParser price
+        '''
+        commission = min(self.MAX_COMMISSION, max(self.MIN_COMMISSION, self.COMMISSION_PER_SHARE * quantity))
+        return commission
+
+    def execute_order(self, event):
+        '''
+        Converts an OrderEvent into a FillEvent, filled at the last close price of the ticker, and places it onto the
+        events queue.
+
+        :param event: Contains an Event object with order information.
+        :return:
+        '''
+        if event.type == EventType.ORDER:
+            ticker = event.ticker
+            action = event.action
+            quantity = event.quantity
+
+            timestamp = self.price_handler.get_last_timestamp(ticker)
+            fill_price = self.price_handler.get_last_close(ticker)
+            exchange = 'SIMULATED'
+            commission = self.calculate_commission(quantity, fill_price)
+
+            fill_event = FillEvent(timestamp, ticker, action, quantity, exchange, fill_price, commission)
+            self.events_queue.put(fill_event)
+
+            if self.compliance is not None:
+                self.compliance.record_trade(fill_event)
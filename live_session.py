@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+import time
+from event import EventType
+from session_instrumentation import SessionInstrumentation
+
+PRICE_EVENT_TYPES = (EventType.TICK, EventType.BAR, EventType.BAR_SLICE)
+
+
+class LiveSessionRunner(object):
+    """
+    LiveSessionRunner runs a live TradingSession on asyncio, rather than busy-polling the events queue. The session
+    waits on the AsyncEventBus until its price feeds publish an event, dispatches it with every event that follows from
+    it, and is stopped by a timer at end_session_time, or once every feed is exhausted.
+
+    The latency from the receipt of a price event to each order that follows from it is measured with the monotonic
+    clock, as 'tick_to_order', as well as the time until the price event and its consequences have all been handled, as
+    'tick_to_handled'.
+    """
+
+    def __init__(self, session, clock=time.perf_counter_ns):
+        """
+        :param session: TradingSession with an AsyncEventBus and an AsyncFeedPriceHandler
+        :param clock: Monotonic clock returning integer nanoseconds, the same as the clock of the price handler
+        """
+        self.session = session
+        self.bus = session.events_queue
+        self.clock = clock
+        self.latency = SessionInstrumentation(clock)
+        self._received_ns = None
+
+    def _record_order(self, event):
+        if self._received_ns is not None:
+            self.latency.record('tick_to_order', self.clock() - self._received_ns)
+
+    def latency_report(self):
+        '''
+        Returns the calls, cumulative, mean, percentile and maximum latency in microseconds of 'tick_to_order' and
+        'tick_to_handled'.
+
+        :return: Dictionary
+        '''
+        return self.latency.report()['handlers']
+
+    def _stop(self, feeds_task=None):
+        # None is published as the last event, so that everything received before is still handled
+        self.bus.publish(None)
+
+    async def run(self):
+        '''
+        Runs the session until end_session_time, or until the feeds are exhausted.
+        :return:
+        '''
+        session = self.session
+        bus = self.bus
+        price_handler = session.price_handler
+        # Orders are timed before they are executed, so the fill is not counted in the tick to order latency
+        handlers = [(EventType.ORDER, self._record_order)] + session._event_handlers()
+        for event_type, handler in handlers:
+            bus.subscribe(event_type, handler)
+
+        loop = asyncio.get_running_loop()
+        feeds = loop.create_task(price_handler.stream())
+        feeds.add_done_callback(self._stop)
+        timer = None
+        if session.end_session_time is not None:
+            delay = (session.end_session_time - datetime.now()).total_seconds()
+            timer = loop.call_later(max(delay, 0.0), self._stop)
+
+        try:
+            while True:
+                received_ns, event = await bus.next_published()
+                if event is None:
+                    break
+
+                self._received_ns = received_ns
+                if event.type in PRICE_EVENT_TYPES:
+                    price_handler.store_price_event(event)
+                bus.dispatch(event)
+                event = bus.pop()
+                while event is not None:
+                    bus.dispatch(event)
+                    event = bus.pop()
+                if received_ns is not None:
+                    self.latency.record('tick_to_handled', self.clock() - received_ns)
+                self._received_ns = None
+        finally:
+            if timer is not None:
+                timer.cancel()
+            feeds.remove_done_callback(self._stop)
+            if not feeds.done():
+                feeds.cancel()
+            for event_type, handler in handlers:
+                bus.unsubscribe(event_type, handler)
+
+        # Surface the failure of a feed, rather than ending the session as if it were exhausted
+        try:
+            await feeds
+        except asyncio.CancelledError:
+            pass
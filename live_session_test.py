@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta
+import threading
+import pytest
+from event import EventType
+from event_bus import AsyncEventBus, BacktestEventBus
+from price_handler_async import AsyncFeedPriceHandler
+from price_handler_panel import PanelBarPriceHandler
+from replay_feed import BarReplayServer, ReplayFeed
+
+
+@pytest.fixture
+def replay_server(tickers_data):
+    '''
+    A BarReplayServer of the bars of tickers_data, run on its own event loop in a thread, so that sessions can run
+    theirs with asyncio.run.
+    '''
+    loop = asyncio.new_event_loop()
+    server = BarReplayServer.from_tickers_data(tickers_data)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def make_live_session(make_session, server, tickers):
+    bus = AsyncEventBus()
+    price_handler = AsyncFeedPriceHandler([ReplayFeed(port=server.port)], bus, tickers)
+    return make_session(price_handler, bus, session_type='live',
+                        end_session_time=datetime.now() + timedelta(seconds=60))
+
+
+def test_a_replayed_live_session_matches_the_backtest(replay_server, tickers_data, panel, make_session):
+    session = make_live_session(make_session, replay_server, sorted(tickers_data))
+    orders = []
+    session.events_queue.subscribe(EventType.ORDER, orders.append)
+    results = session.start_trading(testing=True)
+
+    bus = BacktestEventBus()
+    backtest = make_session(PanelBarPriceHandler(panel, bus), bus).start_trading(testing=True)
+    assert results['equity'].equals(backtest['equity'])
+
+    latency = results['latency']
+    assert latency['tick_to_handled']['calls'] == panel.has_bar.sum()
+    assert latency['tick_to_order']['calls'] == len(orders) > 0
+    assert latency['tick_to_order']['max_us'] <= latency['tick_to_handled']['max_us']
+
+
+def test_a_live_session_cannot_be_stopped_or_snapshot(replay_server, tickers_data, make_session):
+    session = make_live_session(make_session, replay_server, sorted(tickers_data))
+    with pytest.raises(Exception, match='live session'):
+        session.run_until('2018-03-01')
+    with pytest.raises(Exception, match='live session'):
+        session.snapshot()
@@ -0,0 +1,213 @@
+import contextlib
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from event_bus import BacktestEventBus
+from price_handler_mmap import MmapBarPriceHandler
+from price_store_mmap import UniversePriceStore
+import statistics_performance as perf
+from trading_session import TradingSession
+
+SUMMARY_COLUMNS = ['sharpe', 'cagr', 'max_drawdown', 'max_drawdown_duration', 'trades', 'final_equity']
+
+
+def expand_grid(param_grid):
+    '''
+    Expands a parameter grid into the list of every combination of parameters, in a deterministic order: the product of
+    the values of each parameter, in the order the parameters are given, with the last parameter varying fastest.
+
+    :param param_grid: Dictionary of parameter name to list of values, or a list of such dictionaries
+    :return: List of dictionaries of parameters
+    '''
+    if isinstance(param_grid, dict):
+        param_grid = [param_grid]
+    variants = []
+    for grid in param_grid:
+        names = list(grid)
+        for values in itertools.product(*[grid[name] for name in names]):
+            variants.append(dict(zip(names, values)))
+    return variants
+
+
+def run_variant(store, strategy_cls, params, tickers, equity, start_date=None, end_date=None, strategy_kwargs=None,
+                queue_arg='events_queue', config=None, session_kwargs=None, periods=252, verbose=False):
+    '''
+    Runs one variant of a strategy over a memory-mapped price store and summarises its performance. This is a module
+    level function so that it can be run within a worker process, where only the path of the store is unpickled and the
+    bars are read from the shared, page-cached memory map.
+
+    :param store: UniversePriceStore
+    :param strategy_cls: The strategy class
+    :param params: Dictionary of the parameters of this variant, passed to the strategy as keyword arguments
+    :param tickers: The tickers to trade
+    :param equity: The initial equity of the session
+    :param start_date: Date to start the backtest from
+    :param end_date: Date to end the backtest at
+    :param strategy_kwargs: Dictionary of keyword arguments passed to the strategy of every variant
+    :param queue_arg: The name of the keyword argument the events queue is passed to the strategy as
+    :param config:
+    :param session_kwargs: Dictionary of further keyword arguments of the TradingSession, e.g. position_sizer
+    :param periods: Number of bars per year, for the CAGR
+    :param verbose: Whether the output of the session is printed
+    :return: Tuple of the summary dictionary and the equity curve of the variant
+    '''
+    kwargs = dict(strategy_kwargs or {})
+    kwargs.update(params)
+    events_queue = BacktestEventBus()
+    kwargs[queue_arg] = events_queue
+    strategy = strategy_cls(**kwargs)
+
+    price_handler = MmapBarPriceHandler(store, events_queue, init_tickers=tickers, start_date=start_date,
+                                        end_date=end_date)
+    title = ['{0} {1}'.format(strategy_cls.__name__, params)]
+    session = TradingSession(config, strategy, tickers, equity, start_date, end_date, events_queue,
+                             price_handler=price_handler, title=title, **(session_kwargs or {}))
+
+    if verbose:
+        session._run_session()
+        results = session.statistics.get_results()
+    else:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            session._run_session()
+            results = session.statistics.get_results()
+
+    equity_s = results['equity']
+    summary = {
+        'sharpe': results['sharpe'],
+        'cagr': perf.create_cagr(results['cum_returns'].values, periods) if len(equity_s) > 0 else 0.0,
+        'max_drawdown': results['max_drawdown'],
+        'max_drawdown_duration': results['max_drawdown_duration'],
+        'trades': len(results['positions']) if 'positions' in results else 0,
+        'final_equity': equity_s.iloc[-1] if len(equity_s) > 0 else None,
+    }
+    return summary, equity_s
+
+
+def run_task(task):
+    '''
+    Runs a task of ParameterSweep.tasks().
+
+    :param task: Tuple of the args and kwargs of run_variant
+    :return: Tuple of the summary dictionary and the equity curve of the variant
+    '''
+    return run_variant(*task[0], **task[1])
+
+
+class ParameterSweep(object):
+    """
+    ParameterSweep runs every combination of a parameter grid of one strategy over the same tickers and dates. The
+    price data is loaded once, into a memory-mapped UniversePriceStore, and every variant is then run on a process pool
+    with its own MmapBarPriceHandler, so that the workers share the page-cached bars rather than each re-reading and
+    parsing the JSON files.
+
+    The results are returned as a summary table with one row per variant, in the order of the grid, whatever order the
+    workers finish in.
+    """
+
+    def __init__(self, store, strategy_cls, param_grid, tickers, equity, start_date=None, end_date=None,
+                 strategy_kwargs=None, queue_arg='events_queue', config=None, session_kwargs=None, workers=None,
+                 periods=252):
+        """
+        :param store: UniversePriceStore, or the path of its .npy data file
+        :param strategy_cls: The strategy class, called with the parameters of each variant as keyword arguments
+        :param param_grid: Dictionary of parameter name to list of values, or a list of such dictionaries
+        :param tickers: The tickers to trade
+        :param equity: The initial equity of every session
+        :param start_date: Date to start the backtests from
+        :param end_date: Date to end the backtests at
+        :param strategy_kwargs: Dictionary of keyword arguments passed to the strategy of every variant
+        :param queue_arg: The name of the keyword argument the events queue is passed to the strategy as
+        :param config:
+        :param session_kwargs: Dictionary of further keyword arguments of the TradingSession. These are pickled to the
+                    workers, so every variant starts from its own copy of e.g. the position sizer.
+        :param workers: Number of worker processes, None uses one per CPU and 1 runs the variants in this process
+        :param periods: Number of bars per year, for the CAGR
+        """
+        if not isinstance(store, UniversePriceStore):
+            store = UniversePriceStore(store)
+        self.store = store
+        self.strategy_cls = strategy_cls
+        self.variants = expand_grid(param_grid)
+        self.tickers = tickers
+        self.equity = equity
+        self.start_date = start_date
+        self.end_date = end_date
+        self.strategy_kwargs = strategy_kwargs
+        self.queue_arg = queue_arg
+        self.config = config
+        self.session_kwargs = session_kwargs
+        self.workers = workers
+        self.periods = periods
+        self.equity_curves = []
+
+    @classmethod
+    def from_price_handler(cls, store_path, price_handler, strategy_cls, param_grid, equity, **kwargs):
+        '''
+        Writes the data already loaded by a JsonBarPriceHandler to a store, and sweeps over its tickers and dates.
+
+        :param store_path: The .npy data file of the store to write
+        :param price_handler: JsonBarPriceHandler
+        :param strategy_cls: The strategy class
+        :param param_grid: The parameter grid
+        :param equity: The initial equity of every session
+        :return: ParameterSweep
+        '''
+        store = UniversePriceStore.from_price_handler(store_path, price_handler)
+        kwargs.setdefault('start_date', price_handler.start_date)
+        kwargs.setdefault('end_date', price_handler.end_date)
+        return cls(store, strategy_cls, param_grid, sorted(price_handler.tickers), equity, **kwargs)
+
+    def tasks(self):
+        '''
+        Yields the task of each variant, as the (args, kwargs) of run_variant, so that the variants of several sweeps
+        can be run on a single pool.
+        '''
+        for params in self.variants:
+            args = (self.store, self.strategy_cls, params, self.tickers, self.equity)
+            kwargs = {
+                'start_date': self.start_date,
+                'end_date': self.end_date,
+                'strategy_kwargs': self.strategy_kwargs,
+                'queue_arg': self.queue_arg,
+                'config': self.config,
+                'session_kwargs': self.session_kwargs,
+                'periods': self.periods,
+            }
+            yield args, kwargs
+
+    def summarise(self, results):
+        '''
+        Collects the results of the variants, in the order of the grid, into the summary table. The equity curve of
+        each variant is kept in self.equity_curves, in the same order.
+
+        :param results: List of the (summary, equity curve) of each variant
+        :return: DataFrame with the parameters and the sharpe, cagr, max_drawdown, max_drawdown_duration, trades and
+                final_equity of each variant
+        '''
+        self.equity_curves = [equity_s for summary, equity_s in results]
+        rows = []
+        for params, (summary, equity_s) in zip(self.variants, results):
+            row = dict(params)
+            row.update(summary)
+            rows.append(row)
+
+        param_columns = []
+        for params in self.variants:
+            param_columns.extend(name for name in params if name not in param_columns)
+        return pd.DataFrame(rows, columns=param_columns + SUMMARY_COLUMNS)
+
+    def run(self):
+        '''
+        Runs every variant and collects the summary table.
+
+        :return: DataFrame with the parameters and the sharpe, cagr, max_drawdown, max_drawdown_duration, trades and
+                final_equity of each variant
+        '''
+        if self.workers == 1:
+            results = [run_task(task) for task in self.tasks()]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                # map() yields the results in the order of the grid
+                results = list(executor.map(run_task, self.tasks()))
+        return self.summarise(results)
@@ -0,0 +1,47 @@
+from event import SignalEvent
+from parameter_sweep import ParameterSweep, expand_grid
+from position_sizer_naive import NaivePositionSizer
+from price_store_mmap import UniversePriceStore
+from strategy_base import AbstractStrategy
+
+
+class PeriodicStrategy(AbstractStrategy):
+    '''
+    Buys a ticker every period bars and sells it back hold bars later. It is defined at module level so that the
+    worker processes can unpickle it.
+    '''
+    def __init__(self, events_queue, period=10, hold=5):
+        self.events_queue = events_queue
+        self.period = period
+        self.hold = hold
+        self.bars = {}
+
+    def calculate_signals(self, event):
+        count = self.bars.get(event.ticker, 0) + 1
+        self.bars[event.ticker] = count
+        if count % self.period == 0:
+            self.events_queue.put(SignalEvent(event.ticker, 'BOT', 100))
+        elif count % self.period == self.hold:
+            self.events_queue.put(SignalEvent(event.ticker, 'SLD', 100))
+
+
+def test_expand_grid_keeps_the_order_of_the_grid():
+    assert expand_grid({'period': [10, 20], 'hold': [3]}) == [{'period': 10, 'hold': 3}, {'period': 20, 'hold': 3}]
+
+
+def test_the_results_do_not_depend_on_the_number_of_workers(tmp_path, tickers_data):
+    store = UniversePriceStore.build(str(tmp_path / 'store.npy'), tickers_data)
+    grid = {'period': [6, 10], 'hold': [2, 4]}
+
+    results = []
+    for workers in (1, 2):
+        sweep = ParameterSweep(store, PeriodicStrategy, grid, store.symbols, 100000.0, workers=workers,
+                               session_kwargs={'position_sizer': NaivePositionSizer()})
+        results.append((sweep.run(), sweep.equity_curves))
+
+    (serial, serial_curves), (parallel, parallel_curves) = results
+    assert len(serial) == 4
+    assert (serial['trades'] > 0).all()
+    assert serial.equals(parallel)
+    assert all(serial_curve.equals(parallel_curve)
+               for serial_curve, parallel_curve in zip(serial_curves, parallel_curves))
@@ -1,8 +1,10 @@
+from exception import PortfolioAuditError
 from position import Position
+from trade_ledger import TradeLedger
 
 
 class Portfolio(object):
-    def __init__(self, price_handler, cash):
+    def __init__(self, price_handler, cash, audit=False):
         '''
         On creation, the Portfolio object contains no positions and all values are "reset" to the initial cash, with
         no PnL - realised or unrealised.
@@ -10,16 +12,103 @@ class Portfolio(object):
         Note that realised_pnl is the running tally pnl from closed positions (closed_pnl), as well as realised_pnl
         from currently open positions.
 
+        Closed positions are recorded to the trade ledger, self.trades, rather than kept as Position objects.
+
+        Equity and unrealised PnL are kept incrementally and revalued lazily. When a position is transacted or the price
+        of its ticker changes, the ticker is only marked as dirty. The dirty positions are revalued together when equity
+        or unrealised_pnl is next read, typically once per timestamp by the statistics, and their contributions to the
+        totals are replaced, rather than every open position being revalued. In audit mode every revaluation is checked
+        against a full revaluation, and a PortfolioAuditError is raised on a mismatch.
+
         :param price_handler:
         :param cash:
+        :param audit: Verify every revaluation against a full revaluation
         '''
         self.price_handler = price_handler
         self.init_cash = cash
-        self.equity = cash
         self.cur_cash = cash
         self.positions = {}
-        self.closed_positions = []
+        self.trades = TradeLedger()
         self.realised_pnl = 0
+        self.audit = audit
+        self._equity = cash
+        self._unrealised_pnl = 0
+        # Sum of market_value - cost_basis + realised_pnl over the open positions
+        self._open_value = 0
+        # Ticker to the (unrealised_pnl, market_value - cost_basis + realised_pnl) of its position when last revalued
+        self._contributions = {}
+        self._dirty = set()
+
+    @property
+    def equity(self):
+        if self._dirty:
+            self.revalue()
+        return self._equity
+
+    @property
+    def unrealised_pnl(self):
+        if self._dirty:
+            self.revalue()
+        return self._unrealised_pnl
+
+    def _get_bid_ask(self, ticker):
+        if self.price_handler.istick():
+            return self.price_handler.get_best_bid_ask(ticker)
+        close_price = self.price_handler.get_last_close(ticker)
+        return close_price, close_price
+
+    def revalue(self):
+        '''
+        Revalues the positions of the dirty tickers at their last price, replacing their contributions to the equity and
+        unrealised PnL. The positions of tickers that were closed since are dropped from the totals.
+        :return:
+        '''
+        positions = self.positions
+        contributions = self._contributions
+        for ticker in self._dirty:
+            unrealised_pnl, value = contributions.pop(ticker, (0, 0))
+            self._unrealised_pnl -= unrealised_pnl
+            self._open_value -= value
+
+            position = positions.get(ticker)
+            if position is not None:
+                bid, ask = self._get_bid_ask(ticker)
+                position.update_market_value(bid, ask)
+                unrealised_pnl = position.unrealised_pnl
+                value = position.market_value - position.cost_basis + position.realised_pnl
+                contributions[ticker] = (unrealised_pnl, value)
+                self._unrealised_pnl += unrealised_pnl
+                self._open_value += value
+        self._dirty.clear()
+        self._equity = self.init_cash + self.realised_pnl + self._open_value
+        if self.audit:
+            self._audit()
+
+    def _full_revaluation(self):
+        '''
+        Revalues every open position from scratch.
+
+        :return: Tuple of the equity and unrealised PnL
+        '''
+        unrealised_pnl = 0
+        equity = self.init_cash + self.realised_pnl
+        for ticker, position in self.positions.items():
+            bid, ask = self._get_bid_ask(ticker)
+            position.update_market_value(bid, ask)
+            unrealised_pnl += position.unrealised_pnl
+            equity += (position.market_value - position.cost_basis + position.realised_pnl)
+        return equity, unrealised_pnl
+
+    def _audit(self):
+        '''
+        Checks the incrementally kept equity and unrealised PnL against a full revaluation.
+        :return:
+        '''
+        equity, unrealised_pnl = self._full_revaluation()
+        if equity != self._equity or unrealised_pnl != self._unrealised_pnl:
+            raise PortfolioAuditError(
+                'Incremental equity {0} and unrealised PnL {1} differ from the full revaluation {2} and {3}'.format(
+                    self._equity, self._unrealised_pnl, equity, unrealised_pnl))
 
     def _update_portfolio(self):
         '''
@@ -28,80 +117,80 @@ class Portfolio(object):
         Value of closed positions is tallied as self.realised_pnl.
         :return:
         '''
-        self.unrealised_pnl = 0
-        self.equity = self.realised_pnl
-        self.equity += self.init_cash
+        self._unrealised_pnl = 0
+        self._open_value = 0
+        self._contributions = {}
+        self._dirty = set(self.positions)
+        self.revalue()
 
-        for ticker in self.positions:
-            position = self.positions[ticker]
-            if self.price_handler.istick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker)
-            else:
-                close_price = self.price_handler.get_last_close(ticker)
-                bid = close_price
-                ask = close_price
-            position.update_market_value(bid, ask)
-            self.unrealised_pnl += position.unrealised_pnl
-            self.equity += (position.market_value - position.cost_basis + position.realised_pnl)
+    def update_market_values(self, tickers):
+        '''
+        Marks the open positions in the given tickers as dirty, after their prices changed, to be revalued when the
+        equity is next read. The contributions of the other positions are left as they are.
 
-    def _add_position(self, action, ticker, quantity, price, commission):
+        :param tickers: The tickers whose prices changed
+        :return:
+        '''
+        positions = self.positions
+        if len(tickers) > len(positions):
+            # e.g. a slice of a whole universe, of which only a few tickers are held
+            changed = set(tickers)
+            self._dirty.update(ticker for ticker in positions if ticker in changed)
+        else:
+            self._dirty.update(ticker for ticker in tickers if ticker in positions)
+
+    def _add_position(self, action, ticker, quantity, price, commission, timestamp=None):
         '''
         Adds a new Position object to the Portfolio. This requires getting the best bid/ask price from the price
-        handler in order to calculate a reasonable "market value". Once the Position is added, the Portfolio values
-        are updated.
+        handler in order to calculate a reasonable "market value". Once the Position is added, it is marked for
+        revaluation of the Portfolio values.
 
         :param action:
         :param ticker:
         :param quantity:
         :param price:
         :param commission:
+        :param timestamp:
         :return:
         '''
         if ticker not in self.positions:
-            if self.price_handler.istick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker)
-            else:
-                close_price = self.price_handler.get_last_close(ticker)
-                bid = close_price
-                ask = close_price
-            position = Position(action, ticker, quantity, price, commission, bid, ask)
+            bid, ask = self._get_bid_ask(ticker)
+            position = Position(action, ticker, quantity, price, commission, bid, ask, timestamp)
             self.positions[ticker] = position
-            self._update_portfolio()
+            self._dirty.add(ticker)
         else:
             print('Ticker {0} is already in the positions list. Could not add a new position'.format(ticker))
 
-    def _modify_position(self, action, ticker, quantity, price, commission):
+    def _modify_position(self, action, ticker, quantity, price, commission, timestamp=None):
         '''
         Modifies a current Position object to the Portfolio. This requires getting the best bid/ask price from the
-        price handler in order to calculate a reasonable "market value". Once the Position is modified, the Portfolio
-        values are updated.
+        price handler in order to calculate a reasonable "market value". Once the Position is modified, it is marked for
+        revaluation of the Portfolio values.
 
         :param action:
         :param ticker:
         :param quantity:
         :param price:
         :param commission:
+        :param timestamp:
         :return:
         '''
         if ticker in self.positions:
-            self.positions[ticker].transact_shares(action, quantity, price, commission)
-            if self.price_handler.is_tick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker)
-            else:
-                close_price = self.price_handler.get_last_close(ticker)
-                bid = close_price
-                ask = close_price
-            self.positions[ticker].update_market_value(bid, ask)
-
-            if self.positions[ticker].quantity == 0:
+            position = self.positions[ticker]
+            position.transact_shares(action, quantity, price, commission)
+            self._dirty.add(ticker)
+
+            if position.quantity == 0:
+                # Closed positions are marked to market now, as they are not revalued later
+                bid, ask = self._get_bid_ask(ticker)
+                position.update_market_value(bid, ask)
                 closed = self.positions.pop(ticker)
                 self.realised_pnl += closed.realised_pnl
-                self.closed_positions.append(closed)
-            self._update_portfolio()
+                self.trades.record(closed, timestamp)
         else:
             print('Ticker {0} not in the current position list. Could not modify a current position.'.format(ticker))
 
-    def transact_position(self, action, ticker, quantity, price, commission):
+    def transact_position(self, action, ticker, quantity, price, commission, timestamp=None):
         '''
         Handles any new position or modification to a current position, by calling the respective _add_position and
         _modify_position methods. Hence, this single method will be called by the PortfolioHandler to update the
@@ -113,6 +202,7 @@ class Portfolio(object):
         :param quantity: The amount of shares
         :param price: The price
         :param commission: How much commission the brokerage charges
+        :param timestamp: The timestamp of the fill, recorded as the entry or exit time of the position
         :return:
         '''
 
@@ -122,6 +212,6 @@ class Portfolio(object):
             self.cur_cash += ((quantity * price) - commission)
 
         if ticker not in self.positions:
-            self._add_position(action, ticker, quantity, price, commission)
+            self._add_position(action, ticker, quantity, price, commission, timestamp)
         else:
-            self._modify_position(action, ticker, quantity, price, commission)
\ No newline at end of file
+            self._modify_position(action, ticker, quantity, price, commission, timestamp)
\ No newline at end of file
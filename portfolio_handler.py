@@ -3,7 +3,7 @@ from portfolio import Portfolio
 
 
 class PortfolioHandler(object):
-    def __init__(self, initial_cash, events_queue, price_handler, position_sizer, risk_manager):
+    def __init__(self, initial_cash, events_queue, price_handler, position_sizer, risk_manager, audit=False):
         '''
         The PortfolioHandler is designed to interact with the backtesting or live trading overall event-driven
         architecture. It exposes two methods, on_signal and on_fill, which handle how SignalEvent and FillEvent
@@ -20,6 +20,7 @@ class PortfolioHandler(object):
         :param price_handler:
         :param position_sizer:
         :param risk_manager:
+        :param audit: Verify every incremental update of the Portfolio against a full revaluation
         '''
 
         self.initial_cash = initial_cash
@@ -27,7 +28,7 @@ class PortfolioHandler(object):
         self.price_handler = price_handler
         self.position_sizer = position_sizer
         self.risk_manager = risk_manager
-        self.portfolio = Portfolio(price_handler, initial_cash)
+        self.portfolio = Portfolio(price_handler, initial_cash, audit)
 
     def _create_order_from_signal(self, signal_event):
         '''
@@ -75,9 +76,10 @@ class PortfolioHandler(object):
         quantity = fill_event.quantity
         price = fill_event.price
         commission = fill_event.commission
+        timestamp = fill_event.timestamp
 
         # Create or modify the position from the fill info
-        self.portfolio.transact_position(action, ticker, quantity, price, commission)
+        self.portfolio.transact_position(action, ticker, quantity, price, commission, timestamp)
 
     def on_signal(self, signal_event):
         '''
@@ -119,11 +121,16 @@ class PortfolioHandler(object):
 
         self._convert_fill_to_portfolio_update(fill_event)
 
-    def update_portfolio_value(self):
+    def update_portfolio_value(self, tickers=None):
         '''
         Update the portfolio to reflect current market value as based on last bid/ask of each ticker.
 
+        :param tickers: The tickers whose prices changed, only the positions in these are revalued, when the equity is
+                    next read. None revalues every position now.
         :return:
         '''
-        self.portfolio._update_portfolio()
+        if tickers is None:
+            self.portfolio._update_portfolio()
+        else:
+            self.portfolio.update_market_values(tickers)
 
@@ -0,0 +1,53 @@
+import pytest
+from event_bus import BacktestEventBus
+from exception import PortfolioAuditError
+from portfolio import Portfolio
+from portfolio_handler import PortfolioHandler
+from price_handler_panel import PanelBarPriceHandler
+from price_parser import PriceParser
+from risk_manager_example import ExampleRiskManager
+from position_sizer_naive import NaivePositionSizer
+
+
+class FixedPriceHandler(object):
+    '''
+    Prices every ticker at the close it was last set to.
+    '''
+    def __init__(self, closes):
+        self.closes = closes
+
+    def istick(self):
+        return False
+
+    def get_last_close(self, ticker):
+        return self.closes[ticker]
+
+
+def test_a_session_passes_the_audit(panel, make_session):
+    bus = BacktestEventBus()
+    price_handler = PanelBarPriceHandler(panel, bus)
+    position_sizer = NaivePositionSizer()
+    portfolio_handler = PortfolioHandler(PriceParser.parse_scalar(100000.0), bus, price_handler, position_sizer,
+                                         ExampleRiskManager(), audit=True)
+    audited = make_session(price_handler, bus, portfolio_handler=portfolio_handler, position_sizer=position_sizer)
+    results = audited.start_trading(testing=True)
+    assert len(portfolio_handler.portfolio.trades) > 0
+
+    bus = BacktestEventBus()
+    full = make_session(PanelBarPriceHandler(panel, bus), bus).start_trading(testing=True)
+    assert results['equity'].equals(full['equity'])
+
+
+def test_a_corrupted_incremental_total_fails_the_audit():
+    price_handler = FixedPriceHandler({'AAA': PriceParser.parse(10.0), 'BBB': PriceParser.parse(20.0)})
+    portfolio = Portfolio(price_handler, PriceParser.parse(1000.0), audit=True)
+    portfolio.transact_position('BOT', 'AAA', 10, PriceParser.parse(10.0), 0)
+    portfolio.transact_position('SLD', 'BBB', 5, PriceParser.parse(20.0), 0)
+    price_handler.closes['AAA'] = PriceParser.parse(11.0)
+    portfolio.update_market_values(['AAA'])
+    assert portfolio.equity == PriceParser.parse(1010.0)
+
+    portfolio._open_value += 1
+    portfolio.update_market_values(['BBB'])
+    with pytest.raises(PortfolioAuditError):
+        portfolio.equity
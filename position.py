@@ -2,7 +2,7 @@ from numpy import sign
 
 
 class Position(object):
-    def __init__(self, action, ticker, init_quantity, init_price, init_commission, bid, ask):
+    def __init__(self, action, ticker, init_quantity, init_price, init_commission, bid, ask, entry_time=None):
         '''
         Set up the initial "account" of the Position to be zero for most items, with the exception of the initial
         purchase/sale. Then calculate the initial values and finally update the market value of the transaction.
@@ -14,12 +14,14 @@ class Position(object):
         :param init_commission:
         :param bid:
         :param ask:
+        :param entry_time: The timestamp of the fill that opened the position
         '''
         self.action = action
         self.ticker = ticker
         self.quantity = init_quantity
         self.init_price = init_price
         self.init_commission = init_commission
+        self.entry_time = entry_time
 
         self.realised_pnl = 0
         self.unrealised_pnl = 0
@@ -0,0 +1,61 @@
+import random
+import numpy as np
+import pytest
+from position import Position
+from position_book import FIELDS, PositionBook
+from price_parser import PriceParser
+
+
+def random_price(rng):
+    return PriceParser.parse(round(rng.uniform(5.0, 50.0), 2))
+
+
+def assert_same_accounts(book, ticker_id, position):
+    accounts = book.position(ticker_id)
+    assert accounts['action'] == position.action
+    assert accounts['ticker'] == position.ticker
+    for field in FIELDS[1:]:
+        assert accounts[field] == getattr(position, field), field
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_the_book_matches_position_exactly(seed):
+    rng = random.Random(seed)
+    tickers = ['T{0}'.format(i) for i in range(20)]
+    book = PositionBook(capacity=4)
+    positions = {}
+    for ticker in tickers:
+        action = rng.choice(('BOT', 'SLD'))
+        quantity = rng.randint(1, 1000)
+        price = random_price(rng)
+        commission = PriceParser.parse(round(rng.uniform(0.0, 10.0), 2))
+        bid = random_price(rng)
+        ask = bid + PriceParser.parse(0.01)
+        book.open_position(action, ticker, quantity, price, commission, bid, ask)
+        positions[ticker] = Position(action, ticker, quantity, price, commission, bid, ask)
+
+    for step in range(500):
+        ticker = rng.choice(tickers)
+        ticker_id = book.ticker_ids[ticker]
+        action = rng.choice(('BOT', 'SLD'))
+        quantity = rng.randint(1, 500)
+        price = random_price(rng)
+        commission = PriceParser.parse(round(rng.uniform(0.0, 10.0), 2))
+        book.transact_shares(ticker_id, action, quantity, price, commission)
+        positions[ticker].transact_shares(action, quantity, price, commission)
+
+        if step % 50 == 0:
+            # Mark the whole book to market in one go
+            bids = np.array([random_price(rng) for _ in tickers], dtype=np.int64)
+            asks = bids + PriceParser.parse(0.02)
+            book.mark_to_market(np.arange(len(tickers)), bids, asks)
+            for marked, bid, ask in zip(tickers, bids.tolist(), asks.tolist()):
+                positions[marked].update_market_value(bid, ask)
+        else:
+            bid = random_price(rng)
+            book.update_market_value(ticker_id, bid, bid)
+            positions[ticker].update_market_value(bid, bid)
+        assert_same_accounts(book, ticker_id, positions[ticker])
+
+    for ticker in tickers:
+        assert_same_accounts(book, book.ticker_ids[ticker], positions[ticker])
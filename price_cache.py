@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+class JsonBarCache(object):
+    """
+    JsonBarCache keeps a persistent, columnar copy of the cleaned daily bars of each ticker, so that the JSON files only
+    have to be parsed again when they change on disk. Each ticker is stored in its own uncompressed NumPy archive, which
+    loads faster than a compressed one, holding the int64 timestamps, the OHLCV columns and the signature (path, mtime
+    and size) of the JSON files it was built from.
+    """
+
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, cache_dir):
+        """
+        Takes the directory where the cached ticker files are kept, creating it if it does not exist yet.
+
+        :param cache_dir: Directory of the cached ticker files
+        """
+        self.cache_dir = cache_dir
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def _cache_path(self, ticker):
+        return os.path.join(self.cache_dir, '{0}.npz'.format(ticker))
+
+    @staticmethod
+    def _source_signature(paths):
+        '''
+        Creates the signature of the JSON source files, which is used to tell whether a cached ticker is stale.
+
+        :param paths: The JSON files a ticker is built from.
+        :return: Tuple of the paths, modification times (ns) and sizes (bytes), ordered by path
+        '''
+        paths = sorted(paths)
+        mtimes = []
+        sizes = []
+        for path in paths:
+            stat = os.stat(path)
+            mtimes.append(stat.st_mtime_ns)
+            sizes.append(stat.st_size)
+        return (np.array(paths, dtype=np.str_),
+                np.array(mtimes, dtype=np.int64),
+                np.array(sizes, dtype=np.int64))
+
+    def load(self, ticker, paths):
+        '''
+        Loads the cached bars of a ticker with a single read, provided that none of its JSON source files have been
+        added, removed or modified since the cache was built.
+
+        :param ticker: The ticker that should be loaded.
+        :param paths: The JSON files the ticker is currently built from.
+        :return: Tuple of (active, DataFrame) or None if there is no valid cache for the ticker
+        '''
+        cache_path = self._cache_path(ticker)
+        if not os.path.isfile(cache_path):
+            return None
+
+        try:
+            src_paths, src_mtimes, src_sizes = self._source_signature(paths)
+        except OSError:
+            return None
+
+        with np.load(cache_path, allow_pickle=False) as data:
+            if not (np.array_equal(data['source_paths'], src_paths) and
+                    np.array_equal(data['source_mtimes'], src_mtimes) and
+                    np.array_equal(data['source_sizes'], src_sizes)):
+                return None
+            active = bool(data['active'])
+            index = pd.DatetimeIndex(data['timestamp'].astype('datetime64[ns]'), name='start')
+            df = pd.DataFrame({column: data[column] for column in self.COLUMNS},
+                              index=index, columns=list(self.COLUMNS))
+        return active, df
+
+    def save(self, ticker, paths, df, active):
+        '''
+        Stores the cleaned bars of a ticker, together with the signature of the JSON files it was built from.
+
+        :param ticker: The ticker that should be stored.
+        :param paths: The JSON files the ticker was built from.
+        :param df: The cleaned DataFrame of bars, indexed by a naive DatetimeIndex.
+        :param active: False if the ticker contains null prices and is therefore not active.
+        :return:
+        '''
+        src_paths, src_mtimes, src_sizes = self._source_signature(paths)
+        # Columns keep their int or float dtype, so that a cached ticker loads exactly as it was parsed
+        columns = {}
+        for column in self.COLUMNS:
+            values = df[column].values
+            columns[column] = values if values.dtype.kind in 'if' else values.astype(np.float64)
+
+        # Write to a temporary file first so that an interrupted run never leaves a truncated cache behind
+        cache_path = self._cache_path(ticker)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as fd:
+            np.savez(fd,
+                     timestamp=df.index.values.astype('datetime64[ns]').astype(np.int64),
+                     active=np.array(active),
+                     source_paths=src_paths,
+                     source_mtimes=src_mtimes,
+                     source_sizes=src_sizes,
+                     **columns)
+        os.replace(tmp_path, cache_path)
+
+    def invalidate(self, ticker):
+        '''
+        Removes the cached bars of a ticker, forcing it to be rebuilt from JSON on the next load.
+
+        :param ticker: The ticker to invalidate
+        :return:
+        '''
+        try:
+            os.remove(self._cache_path(ticker))
+        except OSError:
+            pass
@@ -0,0 +1,57 @@
+import os
+import queue
+import pandas as pd
+import pytest
+import price_handler_daily_bar
+from price_handler_daily_bar import JsonBarPriceHandler
+
+TICKERS = ['AAA.TO', 'BBB.TO', 'CCC.TO']
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    '''
+    Records the tickers whose JSON files are parsed.
+    '''
+    parsed = []
+    read_ticker_json = price_handler_daily_bar._read_ticker_json
+
+    def recording_read_ticker_json(paths):
+        parsed.append(os.path.basename(paths[0])[1:-len('.json')])
+        return read_ticker_json(paths)
+
+    monkeypatch.setattr(price_handler_daily_bar, '_read_ticker_json', recording_read_ticker_json)
+    return parsed
+
+
+def load(json_dir, cache_dir):
+    return JsonBarPriceHandler(json_dir, queue.Queue(), TICKERS, start_date='2017-01-01', end_date='2018-01-01',
+                               cache_dir=cache_dir)
+
+
+def test_a_warm_cache_loads_the_same_bars_without_parsing(json_dir, tmp_path, parsed):
+    uncached = JsonBarPriceHandler(json_dir, queue.Queue(), TICKERS, start_date='2017-01-01', end_date='2018-01-01')
+    del parsed[:]
+    cold = load(json_dir, str(tmp_path / 'cache'))
+    assert parsed == TICKERS
+
+    del parsed[:]
+    warm = load(json_dir, str(tmp_path / 'cache'))
+    assert parsed == []
+    for ticker in TICKERS:
+        assert warm.tickers_data[ticker].equals(cold.tickers_data[ticker])
+        assert warm.tickers_data[ticker].equals(uncached.tickers_data[ticker])
+
+
+def test_a_modified_file_invalidates_its_ticker(json_dir, tmp_path, parsed, write_ticker_json, make_bars):
+    load(json_dir, str(tmp_path / 'cache'))
+    bars = make_bars(1)
+    bars.loc['2017-06-01', 'close'] = 99.0
+    paths = write_ticker_json(json_dir, 'BBB.TO', bars[bars.index.year == 2017])
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    del parsed[:]
+    price_handler = load(json_dir, str(tmp_path / 'cache'))
+    assert parsed == ['BBB.TO']
+    assert price_handler.tickers_data['BBB.TO'].loc[pd.Timestamp('2017-06-01'), 'close'] == 99.0
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from event import EventType
+from price_handler_base import AbstractBarPriceHandler
+
+
+class AsyncFeedPriceHandler(AbstractBarPriceHandler):
+    """
+    AsyncFeedPriceHandler is the price handler of live sessions run on asyncio. Its price feeds are async iterators of
+    price events, such as a ReplayFeed, which are consumed concurrently and published onto an AsyncEventBus, stamped
+    with the monotonic time they were received at. The last price of each ticker is stored as each event is dispatched
+    by the session, so that the Portfolio is valued as in a backtest.
+
+    Unlike the price handlers of backtests, it does not implement stream_next() or peek_timestamp(), as its events are
+    pushed by the feeds rather than pulled, so its sessions cannot be stopped with run_until() or snapshot.
+    """
+
+    def __init__(self, feeds, events_que, init_tickers=None, clock=time.perf_counter_ns):
+        """
+        :param feeds: List of async iterators of price events
+        :param events_que: The AsyncEventBus of the session
+        :param init_tickers: Initial tickers, others are subscribed when their first price event arrives
+        :param clock: Monotonic clock returning integer nanoseconds
+        """
+        self.feeds = feeds
+        self.events_que = events_que
+        self.clock = clock
+        self.continue_backtest = True
+        self.tickers = {}
+        self.tickers_data = {}
+        if init_tickers is not None:
+            for ticker in init_tickers:
+                self.subscribe_ticker(ticker)
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the price handler to a ticker symbol.
+
+        :param ticker: The ticker to subscribe
+        :return:
+        """
+        if ticker not in self.tickers:
+            self.tickers[ticker] = {'close': None, 'timestamp': None}
+        else:
+            print('Could not subscribe ticker {0} as is already subscribed.'.format(ticker))
+
+    async def _consume(self, feed):
+        async for event in feed:
+            self.events_que.publish(event, self.clock())
+
+    async def stream(self):
+        '''
+        Consumes every feed concurrently, until all of them are exhausted.
+        :return:
+        '''
+        await asyncio.gather(*[self._consume(feed) for feed in self.feeds])
+
+    def store_price_event(self, event):
+        '''
+        Stores the last price of a price event about to be dispatched.
+
+        :param event: BarEvent or BarSliceEvent
+        :return:
+        '''
+        if event.type == EventType.BAR_SLICE:
+            for ticker in event.tickers:
+                if ticker not in self.tickers:
+                    self.tickers[ticker] = {'close': None, 'timestamp': None}
+            self._store_slice_event(event)
+        else:
+            if event.ticker not in self.tickers:
+                self.tickers[event.ticker] = {'close': None, 'timestamp': None}
+            self._store_event(event)
@@ -25,6 +25,24 @@ class AbstractPriceHandler(object):
         except KeyError:
             print('Could not unsubscribe ticker {0} as it was never subscribed'.format(ticker))
 
+    def peek_timestamp(self):
+        """
+        Returns the timestamp of the next price event that will be streamed, without streaming it, or None once the
+        stream is exhausted. This lets a session be run up to a given timestamp and snapshot there.
+
+        :return:
+        """
+        raise NotImplementedError('Should implement peek_timestamp()')
+
+    def read_only_state(self):
+        """
+        Returns the objects of the price handler that are only ever read while streaming, such as the loaded bars, so
+        that they are shared rather than copied when a session is forked within a process.
+
+        :return: List of objects
+        """
+        return []
+
     def get_last_timestamp(self, ticker):
         """
         Returns the most recent actual timestamp for a given ticker
@@ -57,6 +75,14 @@ class AbstractBarPriceHandler(AbstractPriceHandler):
         #self.tickers[ticker]['adj_close'] = event.adj_close_price
         self.tickers[ticker]['timestamp'] = event.time
 
+    def _store_slice_event(self, event):
+        """
+        Store the closing prices of every ticker within a BarSliceEvent
+        """
+        for ticker, close_price in zip(event.tickers, event.close_prices.tolist()):
+            self.tickers[ticker]['close'] = close_price
+            self.tickers[ticker]['timestamp'] = event.time
+
     def get_last_close(self, ticker):
         """
         Returns the most recent actual (unadjusted) closing price.
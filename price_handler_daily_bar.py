@@ -1,9 +1,129 @@
 import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from price_handler_base import AbstractBarPriceHandler
-from event import BarEvent
+from event import BarEvent, BarSliceEvent
 import queue
-from price_parser import PriceParser
+from price_cache import JsonBarCache
+from bar_stream import TickerBars, BarStreamMerger
+from price_manifest import JsonDataManifest
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def _read_ticker_json(paths):
+    """
+    Reads the JSON files of a single ticker and cleans them into one DataFrame of OHLCV bars, indexed by the (naive)
+    start time of each bar.
+
+    :param paths: The JSON files of the ticker, one per year.
+    :return: The cleaned DataFrame, or None if the files hold no bars
+    """
+    frames = []
+    for path in paths:
+        try:
+            frames.append(pd.read_json(path, orient='records'))
+        except ValueError:
+            pass
+    if len(frames) == 0:
+        return None
+
+    df = pd.concat(frames)
+    try:
+        start = pd.to_datetime(df['start'])
+        if start.dt.tz is not None:
+            start = start.dt.tz_localize(None)
+        df['start'] = start
+        df = df.reset_index(drop=True)
+        df = df.drop_duplicates()
+        df = df.set_index('start')
+        return df[BAR_COLUMNS]
+    except KeyError:
+        return None
+
+
+def _is_active(df):
+    """
+    Null values in the open or close price mean that the ticker is not active.
+    """
+    return not (df['open'].isnull().values.any() or df['close'].isnull().values.any())
+
+
+def _load_ticker(ticker, paths, cache=None, start_date=None, end_date=None):
+    """
+    Loads the cleaned bars of a single ticker, either from the cache or by parsing its JSON files, and trims them to
+    [start_date, end_date). This is a module level function so that it can be run within a worker process when tickers
+    are loaded in parallel.
+
+    The cache always holds the complete history of a ticker, so that it stays valid whatever the requested window.
+
+    :param ticker: The ticker that should be loaded.
+    :param paths: The JSON files of the ticker.
+    :param cache: Optional JsonBarCache
+    :param start_date: Date to start retrieving bars from
+    :param end_date: Date to stop retrieving bars from
+    :return: The DataFrame of bars, or None if the ticker has no data or is not active within the window
+    """
+    cached = None
+    if cache is not None:
+        cached = cache.load(ticker, paths)
+
+    if cached is not None:
+        df = cached[1]
+    else:
+        df = _read_ticker_json(paths)
+        if df is None:
+            return None
+        if cache is not None:
+            cache.save(ticker, paths, df, _is_active(df))
+
+    if start_date is not None:
+        df = df[df.index >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df[df.index < pd.Timestamp(end_date)]
+
+    if len(df) > 0 and _is_active(df):
+        return df
+    return None
+
+
+def _report_skipped(ticker_bars):
+    """
+    Reports the bars that were skipped as their prices could not be parsed, in a single line for all tickers.
+    """
+    skipped = [bars for bars in ticker_bars if bars.skipped > 0]
+    if len(skipped) > 0:
+        print('Skipped {0} bars with NaN or infinite prices of tickers {1}.'.format(
+            sum(bars.skipped for bars in skipped), ', '.join(bars.ticker for bars in skipped)))
+
+
+def _file_in_window(entry, start_date=None, end_date=None):
+    """
+    Tells whether a manifest entry can hold bars within [start_date, end_date), using the date span of the file when
+    the manifest records it, or otherwise the year of the directory the file is in.
+
+    :param entry: Manifest entry of a JSON file
+    :param start_date: Date to start retrieving bars from
+    :param end_date: Date to stop retrieving bars from
+    :return: False if the file can be skipped
+    """
+    if entry.get('first') is not None and entry.get('last') is not None:
+        first = pd.Timestamp(entry['first'])
+        last = pd.Timestamp(entry['last'])
+    else:
+        try:
+            year = int(entry['year'])
+        except ValueError:
+            return True
+        first = pd.Timestamp(year, 1, 1)
+        last = pd.Timestamp(year + 1, 1, 1) - pd.Timedelta(1)
+
+    if end_date is not None and first >= pd.Timestamp(end_date):
+        return False
+    if start_date is not None and last < pd.Timestamp(start_date):
+        return False
+    return True
 
 
 class JsonBarPriceHandler(AbstractBarPriceHandler):
@@ -12,7 +132,8 @@ class JsonBarPriceHandler(AbstractBarPriceHandler):
     requested financial instrument and stream those to the provided events que as BarEvents.
     """
 
-    def __init__(self, json_dir, events_que, init_tickers=None, start_date=None, end_date=None):
+    def __init__(self, json_dir, events_que, init_tickers=None, start_date=None, end_date=None, cache_dir=None,
+                 workers=None, pool='process', manifest_file=None, slice_mode=False, manifest_stats=False):
         """
         Takes the JSON directory, the events queue and a possible list of initial ticker symbols then creates
         an (optional) list of ticker subscriptions and associated prices.
@@ -22,81 +143,86 @@ class JsonBarPriceHandler(AbstractBarPriceHandler):
         :param init_tickers: Initial tickers
         :param start_date: Date to start retrieving bars from
         :param end_date: Date to stop retrieving bars from
+        :param cache_dir: Optional directory of the persistent columnar cache of the parsed JSON files
+        :param workers: Number of workers used to load the initial tickers in parallel, None loads them serially
+        :param pool: 'process' or 'thread', the kind of pool used when loading in parallel
+        :param manifest_file: Optional file the manifest of the JSON data directory is saved to and loaded from
+        :param slice_mode: Emit one BarSliceEvent per timestamp, holding every ticker, rather than one BarEvent per bar
+        :param manifest_stats: Record the date span of every file in the manifest, so that the files outside of
+            [start_date, end_date) are skipped by date rather than only by the year directory they are in. Each file is
+            read once to record its span, so this pays off with a manifest_file the spans are saved to
         """
         self.json_dir = json_dir
         self.events_que = events_que
+        self.cache = JsonBarCache(cache_dir) if cache_dir is not None else None
+        self.manifest = JsonDataManifest(json_dir, manifest_file, with_stats=manifest_stats)
         self.continue_backtest = True
         self.tickers = {}
         self.tickers_data = {}
-        if init_tickers is not None:
-            for ticker in init_tickers:
-                self.subscribe_ticker(ticker)
+        self.bar_stream = None
         self.start_date = start_date
         self.end_date = end_date
+        self.workers = workers
+        self.pool = pool
+        self.slice_mode = slice_mode
+        if init_tickers is not None:
+            if self.workers is not None and self.workers > 1:
+                self._subscribe_tickers_parallel(init_tickers)
+            else:
+                for ticker in init_tickers:
+                    self.subscribe_ticker(ticker)
+            self.manifest.flush()
         self.bar_stream = self._merge_sort_ticker_data()
 
+    def _ticker_json_paths(self, ticker):
+        """
+        Finds the JSON files of the ticker within each of the year directories of the JSON data directory, as listed
+        in the manifest. Unless the cache is used, which always holds the complete history of a ticker, the files that
+        lie entirely outside of [start_date, end_date) are skipped, so that only the requested window is parsed.
+
+        :param ticker: The ticker whose files should be found.
+        :return: List of paths to the existing JSON files
+        """
+        if self.cache is not None:
+            return self.manifest.ticker_paths(ticker)
+        return [os.path.join(self.json_dir, entry['path']) for entry in self.manifest.ticker_files(ticker)
+                if _file_in_window(entry, self.start_date, self.end_date)]
+
     def _open_ticker_price_json(self, ticker):
         """
         Opens the JSON files containing the equities ticks from the specified JSON data directory, converting them into
-        them into a pandas DataFrame, stored in a dictionary.
+        them into a pandas DataFrame, stored in a dictionary. If a cache directory was given, the cleaned DataFrame is
+        read from the cache instead, and the JSON files are only parsed when they have changed since it was built.
 
         :param ticker: The ticker that should be opened.
         :return:
         """
-        df = pd.DataFrame(data=None, index=None, columns=None)
-
-        for year_d in os.listdir(self.json_dir):
-            if os.path.isdir(os.path.join(self.json_dir, year_d)):
-                cur_path = '{0}\\{1}\\{2}\\_{3}.json'.format(self.json_dir, year_d, ticker[0], ticker)
-                try:
-                    cur_df = pd.read_json(cur_path, orient='records')
-                    df = df.append(cur_df)
-                except ValueError:
-                    pass
-
-        try:
-            df['start'] = (pd.to_datetime(df['start']))
-            df = df.reset_index(drop=True)
-            df = df.drop_duplicates()
-            df = df.set_index('start')
-            if df['open'].isnull().values.any():  # Null values in open price meaning this ticker is not active
-                pass
-            elif df['close'].isnull().values.any():  # Null values in open price meaning this ticker is not active
-                pass
-            else:
-                self.tickers_data[ticker] = df
-                self.tickers_data[ticker]['ticker'] = ticker
-        except KeyError:
-            pass
+        df = _load_ticker(ticker, self._ticker_json_paths(ticker), self.cache, self.start_date, self.end_date)
+        if df is not None:
+            self.tickers_data[ticker] = df.assign(ticker=ticker)
 
     def _merge_sort_ticker_data(self):
         """
-        Concatenates all of the separate equities DataFrames into a single DataFrame that is time ordered, allowing tick
+        Merges all of the separate equities DataFrames into a single stream of bars that is time ordered, allowing tick
         data events to be added to the queue in a chronological fashion. Note that this is an idealised situation,
         utilised solely for backtesting. In live trading ticks may arrive "out of order".
+
+        Each ticker is kept as its own set of NumPy arrays, trimmed to [start_date, end_date), and the bars are merged
+        lazily with a heap. Ties on the timestamp are broken by the ticker so that the ticker events are always
+        deterministic, otherwise unit test values will differ.
         """
-        df = pd.concat(self.tickers_data.values()).sort_index()
-        start = None
-        end = None
-        if self.start_date is not None:
-            start = df.index.searchsorted(self.start_date)
-        if self.end_date is not None:
-            end = df.index.searchsorted(self.end_date)
-        # This is added so that the ticker events are always deterministic, otherwise unit test values will differ
-        df['colFromIndex'] = df.index
-        df = df.sort_values(by=["colFromIndex", "ticker"])
-        if start is None and end is None:
-            return df.iterrows()
-        elif start is not None and end is None:
-            return df.ix[start:].iterrows()
-        elif start is None and end is not None:
-            return df.ix[:end].iterrows()
-        else:
-            return df.ix[start:end].iterrows()
+        self.symbols = sorted(self.tickers_data)
+        self.ticker_ids = {ticker: ticker_id for ticker_id, ticker in enumerate(self.symbols)}
+        ticker_bars = [TickerBars.from_frame(ticker, self.tickers_data[ticker], BAR_COLUMNS,
+                                             start_date=self.start_date, end_date=self.end_date)
+                       for ticker in self.symbols]
+        _report_skipped(ticker_bars)
+        return BarStreamMerger(ticker_bars)
 
     def subscribe_ticker(self, ticker):
         """
-        Subscribes the price handler to a new ticker symbol.
+        Subscribes the price handler to a new ticker symbol. If the session is already running, the bars of the ticker
+        that are still to come are spliced into the bar stream.
 
         :param ticker: The ticker to subscribe
         :return:
@@ -104,13 +230,10 @@ class JsonBarPriceHandler(AbstractBarPriceHandler):
         if ticker not in self.tickers:
             try:
                 self._open_ticker_price_json(ticker)
-                dft = self.tickers_data[ticker]
-                row0 = dft.iloc[0]
-
-                close = row0['close']
-
-                ticker_prices = {'close': close, 'timestamp': dft.index[0]}
-                self.tickers[ticker] = ticker_prices
+                if self.bar_stream is not None:
+                    self._splice_ticker(ticker)
+                else:
+                    self._add_ticker_prices(ticker)
             except OSError:
                 print('Could not subscribe ticker {0} as no JSON data found for pricing.'.format(ticker))
             except KeyError:
@@ -118,6 +241,102 @@ class JsonBarPriceHandler(AbstractBarPriceHandler):
         else:
             print('Could not subscribe ticker {0} as is already subscribed.'.format(ticker))
 
+    def unsubscribe_ticker(self, ticker):
+        """
+        Unsubscribes the price handler from a current ticker symbol, dropping its remaining bars from the stream.
+
+        :param ticker: The ticker to unsubscribe
+        :return:
+        """
+        super(JsonBarPriceHandler, self).unsubscribe_ticker(ticker)
+        if self.bar_stream is not None:
+            self.bar_stream.remove_ticker(ticker)
+
+    def _splice_ticker(self, ticker):
+        """
+        Splices the bars of a ticker subscribed during a session into the running bar stream, from the first bar after
+        the last one streamed. The last close and timestamp of the ticker are those of its last bar before the ones
+        still to come, i.e. its price at the current time of the session, or None if it has no bar yet.
+
+        :param ticker: The newly subscribed ticker
+        :return:
+        """
+        bars = TickerBars.from_frame(ticker, self.tickers_data[ticker], BAR_COLUMNS,
+                                     start_date=self.start_date, end_date=self.end_date)
+        _report_skipped([bars])
+        if ticker not in self.ticker_ids:
+            self.ticker_ids[ticker] = len(self.symbols)
+            self.symbols.append(ticker)
+        start = self.bar_stream.add_ticker(bars)
+        if start > 0:
+            self.tickers[ticker] = {'close': int(bars.values[start - 1, 3]),
+                                    'timestamp': pd.Timestamp(bars.timestamps.item(start - 1))}
+        else:
+            self.tickers[ticker] = {'close': None, 'timestamp': None}
+
+    def _add_ticker_prices(self, ticker):
+        """
+        Stores the first close price and timestamp of a ticker whose data has been loaded into tickers_data.
+
+        :param ticker: The loaded ticker
+        :return:
+        """
+        dft = self.tickers_data[ticker]
+        row0 = dft.iloc[0]
+
+        close = row0['close']
+
+        ticker_prices = {'close': close, 'timestamp': dft.index[0]}
+        self.tickers[ticker] = ticker_prices
+
+    def _subscribe_tickers_parallel(self, tickers):
+        """
+        Subscribes the price handler to a list of ticker symbols, reading and parsing their files on a pool of workers.
+        The results are merged back in the order of the given list, so the subscriptions are identical to subscribing
+        each ticker in turn.
+
+        :param tickers: The tickers to subscribe
+        :return:
+        """
+        if self.pool == 'thread':
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        pending = []
+        submitted = set()
+        with executor:
+            for ticker in tickers:
+                if ticker in self.tickers or ticker in submitted:
+                    pending.append((ticker, None))
+                    continue
+                try:
+                    paths = self._ticker_json_paths(ticker)
+                    future = executor.submit(_load_ticker, ticker, paths, self.cache,
+                                             self.start_date, self.end_date)
+                except OSError:
+                    future = None
+                pending.append((ticker, future))
+                submitted.add(ticker)
+
+            # Report each ticker in the order it was requested, as subscribing them serially would
+            for ticker, future in pending:
+                if future is None:
+                    if ticker in self.tickers:
+                        print('Could not subscribe ticker {0} as is already subscribed.'.format(ticker))
+                    else:
+                        print('Could not subscribe ticker {0} as no JSON data found for pricing.'.format(ticker))
+                    continue
+                try:
+                    df = future.result()
+                    if df is not None:
+                        self.tickers_data[ticker] = df.assign(ticker=ticker)
+                    self._add_ticker_prices(ticker)
+                except OSError:
+                    print('Could not subscribe ticker {0} as no JSON data found for pricing.'.format(ticker))
+                except KeyError:
+                    print('Could not subscribe ticker {0} as no JSON data found for pricing.'.format(ticker))
+
 
 
 # evt_que = queue.Queue()
@@ -127,21 +346,18 @@ class JsonBarPriceHandler(AbstractBarPriceHandler):
 # print(x.tickers)
 # print(x.tickers_data)
 
-    def _create_event(self, index, period, ticker, row):
+    def _create_event(self, index, period, ticker, bar):
         '''
-        Obtain all elements of the bar from a row of dataframe and return a BarEvent
+        Obtain all elements of the bar from the merged bar stream and return a BarEvent. The prices of the bar stream
+        have already been parsed when the ticker arrays were built.
 
         :param index:
         :param period:
         :param ticker:
-        :param row:
+        :param bar: List of [open, high, low, close, volume]
         :return:
         '''
-        open_price = PriceParser.parse(row['open'])
-        high_price = PriceParser.parse(row['high'])
-        low_price = PriceParser.parse(row['low'])
-        close_price = PriceParser.parse(row['close'])
-        volume = int(row['volume'])
+        open_price, high_price, low_price, close_price, volume = bar
         bar_event = BarEvent(ticker, index, period, open_price, high_price, low_price, close_price, volume)
 
         return bar_event
@@ -161,24 +377,63 @@ class JsonBarPriceHandler(AbstractBarPriceHandler):
         self.tickers[ticker]['close'] = event.close_price
         self.tickers[ticker]['timestamp'] = event.time
 
+    def _stream_next_slice(self):
+        '''
+        Place the bars of every ticker at the next timestamp on the queue, as a single BarSliceEvent
+        :return:
+        '''
+        try:
+            index, tickers, values = self.bar_stream.next_slice()
+        except StopIteration:
+            self.continue_backtest = False
+            return
+
+        period = 86400  # Seconds in a day
+        slice_event = BarSliceEvent(index, period, self.symbols,
+                                    np.array([self.ticker_ids[ticker] for ticker in tickers], dtype=np.int64),
+                                    values[:, 0], values[:, 1], values[:, 2], values[:, 3], values[:, 4])
+
+        self._store_slice_event(slice_event)
+        self.events_que.put(slice_event)
+
+    def peek_timestamp(self):
+        '''
+        Returns the timestamp of the next bar, without streaming it, or None once every bar has been streamed.
+        :return:
+        '''
+        return self.bar_stream.peek()
+
+    def read_only_state(self):
+        '''
+        The DataFrames and arrays of the bars of each ticker are never modified once loaded, so forks share them, as
+        well as the manifest and cache of the data directory.
+        :return:
+        '''
+        shared = [self.manifest, self.cache]
+        shared.extend(self.tickers_data.values())
+        if self.bar_stream is not None:
+            shared.extend(self.bar_stream.ticker_bars())
+        return [obj for obj in shared if obj is not None]
+
     def stream_next(self):
         '''
         Place the next bar event on the queue
         :return:
         '''
+        if self.slice_mode:
+            self._stream_next_slice()
+            return
 
         try:
-            index, row = next(self.bar_stream)
+            index, ticker, bar = next(self.bar_stream)
         except StopIteration:
             self.continue_backtest = False
             return
 
-        # Obtain all elements of the bar from the dataframe
-        ticker = row['ticker']
         period = 86400  # Seconds in a day
 
         # Create the tick event for the queue
-        bar_event = self._create_event(index, period, ticker, row)
+        bar_event = self._create_event(index, period, ticker, bar)
 
         # Store event
         self._store_event(bar_event)
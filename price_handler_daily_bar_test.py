@@ -0,0 +1,76 @@
+import os
+import queue
+import pandas as pd
+import pytest
+from price_handler_daily_bar import JsonBarPriceHandler
+from price_parser import PriceParser
+
+
+def stream_until(price_handler, timestamp):
+    '''
+    Streams every bar up to and including timestamp, returning the (time, ticker) of each.
+    '''
+    events = []
+    while price_handler.peek_timestamp() is not None and price_handler.peek_timestamp() <= pd.Timestamp(timestamp):
+        price_handler.stream_next()
+        event = price_handler.events_que.get()
+        events.append((event.time, event.ticker))
+    return events
+
+
+def test_a_ticker_subscribed_during_a_session_is_priced_at_the_current_time(json_dir):
+    price_handler = JsonBarPriceHandler(json_dir, queue.Queue(), ['BBB.TO', 'CCC.TO'], start_date='2017-01-01',
+                                        end_date='2018-01-01')
+    stream_until(price_handler, '2017-03-07')
+    price_handler.subscribe_ticker('AAA.TO')
+
+    close = price_handler.tickers_data['AAA.TO'].loc['2017-03-07', 'close']
+    assert price_handler.get_last_close('AAA.TO') == PriceParser.parse(close)
+    assert isinstance(price_handler.get_last_close('AAA.TO'), int)
+    assert price_handler.get_last_timestamp('AAA.TO') == pd.Timestamp('2017-03-07')
+
+
+def test_subscribed_tickers_are_spliced_and_unsubscribed_tickers_dropped(json_dir):
+    price_handler = JsonBarPriceHandler(json_dir, queue.Queue(), ['AAA.TO', 'CCC.TO'], start_date='2017-01-01',
+                                        end_date='2018-01-01')
+    events = stream_until(price_handler, '2017-03-07')
+    price_handler.subscribe_ticker('BBB.TO')
+    price_handler.unsubscribe_ticker('CCC.TO')
+    events.extend(stream_until(price_handler, '2017-12-31'))
+
+    assert events == sorted(events)
+    assert len(events) == len(set(events))
+    spliced = [time for time, ticker in events if ticker == 'BBB.TO']
+    assert spliced[0] == pd.Timestamp('2017-03-08')
+    assert max(time for time, ticker in events if ticker == 'CCC.TO') == pd.Timestamp('2017-03-07')
+    assert len([ticker for time, ticker in events if ticker == 'AAA.TO']) == 260
+    assert not price_handler.continue_backtest or price_handler.peek_timestamp() is None
+
+
+def test_files_outside_of_the_window_are_skipped_by_their_date_span(json_dir, write_ticker_json, make_bars):
+    # The 2017 file only holds bars up to the end of June
+    write_ticker_json(json_dir, 'DDD.TO', pd.concat([make_bars(3, '2017-01-01', '2017-07-01'),
+                                                     make_bars(3, '2018-01-01', '2019-01-01')]))
+    by_year = JsonBarPriceHandler(json_dir, queue.Queue(), ['DDD.TO'], start_date='2017-09-01', end_date='2019-01-01')
+    by_span = JsonBarPriceHandler(json_dir, queue.Queue(), ['DDD.TO'], start_date='2017-09-01', end_date='2019-01-01',
+                                  manifest_stats=True)
+
+    assert [os.path.basename(os.path.dirname(os.path.dirname(path)))
+            for path in by_year._ticker_json_paths('DDD.TO')] == ['2017', '2018']
+    assert [os.path.basename(os.path.dirname(os.path.dirname(path)))
+            for path in by_span._ticker_json_paths('DDD.TO')] == ['2018']
+    assert by_span.tickers_data['DDD.TO'].equals(by_year.tickers_data['DDD.TO'])
+
+
+@pytest.mark.parametrize('pool', ['process', 'thread'])
+def test_tickers_loaded_in_parallel_match_those_loaded_serially(json_dir, pool):
+    tickers = ['CCC.TO', 'AAA.TO', 'ZZZ.TO', 'BBB.TO', 'AAA.TO']
+    serial = JsonBarPriceHandler(json_dir, queue.Queue(), tickers, start_date='2017-01-01', end_date='2018-01-01')
+    parallel = JsonBarPriceHandler(json_dir, queue.Queue(), tickers, start_date='2017-01-01', end_date='2018-01-01',
+                                   workers=2, pool=pool)
+
+    assert list(parallel.tickers) == list(serial.tickers) == ['CCC.TO', 'AAA.TO', 'BBB.TO']
+    assert parallel.tickers == serial.tickers
+    for ticker in serial.tickers_data:
+        assert parallel.tickers_data[ticker].equals(serial.tickers_data[ticker])
+    assert stream_until(parallel, '2018-01-01') == stream_until(serial, '2018-01-01')
@@ -17,11 +17,11 @@ class AbstractBarEventIterator(AbstractPriceEventIterator):
         Obtain all elements of the bar from a row of dataframe and return a BarEvent
         """
         try:
-            open_price = PriceParser.parse(row['open'])
-            high_price = PriceParser.parse(row['high'])
-            low_price = PriceParser.parse(row['low'])
-            close_price = PriceParser.parse(row['close'])
-            volume = PriceParser.parse(row['volume'])
+            open_price = PriceParser.parse_scalar(row['open'])
+            high_price = PriceParser.parse_scalar(row['high'])
+            low_price = PriceParser.parse_scalar(row['low'])
+            close_price = PriceParser.parse_scalar(row['close'])
+            volume = PriceParser.parse_scalar(row['volume'])
 
             # Create the bar event for the queue
             bev = BarEvent(ticker, index, period, open_price, high_price, low_price, close_price, volume)
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from price_handler_base import AbstractBarPriceHandler
+from price_store_mmap import UniversePriceStore
+from event import BarEvent, BarSliceEvent
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_nanoseconds(date):
+    """
+    Converts a date (datetime, string or pandas Timestamp) to int64 nanoseconds since the epoch. The bars of the store
+    are naive, so the time zone of an aware date is dropped, keeping its wall time.
+    """
+    timestamp = pd.Timestamp(date)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_localize(None)
+    return timestamp.value
+
+
+def _from_nanoseconds(timestamp):
+    """
+    Converts nanoseconds since the epoch to a naive datetime, without going through pandas.
+    """
+    return EPOCH + timedelta(microseconds=timestamp // 1000)
+
+
+class MmapBarPriceHandler(AbstractBarPriceHandler):
+    """
+    MmapBarPriceHandler streams BarEvents straight from a memory-mapped UniversePriceStore. The records are already
+    time ordered and their prices already scaled, so no pandas objects are created and no prices are parsed while
+    streaming. Records are read from the map in chunks, so that only the window being streamed is paged in.
+    """
+
+    CHUNK_SIZE = 4096
+
+    def __init__(self, store, events_que, init_tickers=None, start_date=None, end_date=None, period=86400,
+                 slice_mode=False):
+        """
+        Takes the price store, the events queue and a possible list of initial ticker symbols.
+
+        :param store: UniversePriceStore, or the path of its .npy data file
+        :param events_que: Que that holds all events
+        :param init_tickers: Initial tickers, None subscribes every ticker of the store
+        :param start_date: Date to start retrieving bars from
+        :param end_date: Date to stop retrieving bars from
+        :param period: The time period covered by each bar in seconds
+        :param slice_mode: Emit one BarSliceEvent per timestamp, holding every ticker, rather than one BarEvent per bar
+        """
+        if not isinstance(store, UniversePriceStore):
+            store = UniversePriceStore(store)
+        self.store = store
+        self.events_que = events_que
+        self.period = period
+        self.slice_mode = slice_mode
+        self.continue_backtest = True
+        self.tickers = {}
+        self.start_date = start_date
+        self.end_date = end_date
+        self._subscribed = [False] * len(self.store.symbols)
+        self._subscribed_mask = np.zeros(len(self.store.symbols), dtype=bool)
+        self._all_subscribed = False
+
+        if init_tickers is None:
+            init_tickers = self.store.symbols
+        for ticker in init_tickers:
+            self.subscribe_ticker(ticker)
+
+        self._cursor = 0
+        self._end = len(self.store)
+        if self.start_date is not None:
+            self._cursor = self.store.search(_to_nanoseconds(self.start_date))
+        if self.end_date is not None:
+            self._end = self.store.search(_to_nanoseconds(self.end_date))
+        self._buffer = []
+        self._buffer_pos = 0
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the price handler to a ticker symbol of the store.
+
+        :param ticker: The ticker to subscribe
+        :return:
+        """
+        if ticker in self.tickers:
+            print('Could not subscribe ticker {0} as is already subscribed.'.format(ticker))
+        elif ticker not in self.store.ticker_ids:
+            print('Could not subscribe ticker {0} as no data found for pricing in the price store.'.format(ticker))
+        else:
+            self.tickers[ticker] = {'close': None, 'timestamp': None}
+            self._subscribed[self.store.ticker_ids[ticker]] = True
+            self._subscribed_mask[self.store.ticker_ids[ticker]] = True
+            self._all_subscribed = len(self.tickers) == len(self._subscribed)
+
+    def unsubscribe_ticker(self, ticker):
+        """
+        Unsubscribes the price handler from a current ticker symbol
+
+        :param ticker: The ticker to unsubscribe
+        :return:
+        """
+        if ticker in self.tickers:
+            self.tickers.pop(ticker)
+            self._subscribed[self.store.ticker_ids[ticker]] = False
+            self._subscribed_mask[self.store.ticker_ids[ticker]] = False
+            self._all_subscribed = False
+        else:
+            print('Could not unsubscribe ticker {0} as it was never subscribed'.format(ticker))
+
+    def _next_record(self):
+        '''
+        Returns the next record of a subscribed ticker as a tuple, or None once the end of the window is reached.
+        '''
+        while True:
+            if self._buffer_pos >= len(self._buffer):
+                if self._cursor >= self._end:
+                    return None
+                chunk_end = min(self._cursor + self.CHUNK_SIZE, self._end)
+                self._buffer = self.store.bars[self._cursor:chunk_end].tolist()
+                self._buffer_pos = 0
+                self._cursor = chunk_end
+
+            record = self._buffer[self._buffer_pos]
+            self._buffer_pos += 1
+            if self._all_subscribed or self._subscribed[record[0]]:
+                return record
+
+    def _next_slice(self):
+        '''
+        Returns the records of every subscribed ticker at the next timestamp, as a view on the memory map, or None once
+        the end of the window is reached. The end of each run of equal timestamps is found with a binary search.
+        '''
+        while self._cursor < self._end:
+            timestamp = int(self.store.bars['timestamp'][self._cursor])
+            run_end = min(self.store.search(timestamp + 1), self._end)
+            records = self.store.bars[self._cursor:run_end]
+            self._cursor = run_end
+            if not self._all_subscribed:
+                records = records[self._subscribed_mask[records['ticker_id']]]
+            if len(records) > 0:
+                return timestamp, records
+        return None
+
+    def _stream_next_slice(self):
+        '''
+        Place the bars of every subscribed ticker at the next timestamp on the queue, as a single BarSliceEvent
+        :return:
+        '''
+        next_slice = self._next_slice()
+        if next_slice is None:
+            self.continue_backtest = False
+            return
+
+        timestamp, records = next_slice
+        slice_event = BarSliceEvent(_from_nanoseconds(timestamp), self.period, self.store.symbols,
+                                    records['ticker_id'], records['open'], records['high'], records['low'],
+                                    records['close'], records['volume'])
+
+        self._store_slice_event(slice_event)
+        self.events_que.put(slice_event)
+
+    def peek_timestamp(self):
+        '''
+        Returns the timestamp of the next record of a subscribed ticker, without streaming it, or None once the end of
+        the window is reached.
+        '''
+        for record in self._buffer[self._buffer_pos:]:
+            if self._all_subscribed or self._subscribed[record[0]]:
+                return _from_nanoseconds(record[1])
+
+        cursor = self._cursor
+        while cursor < self._end:
+            records = self.store.bars[cursor:min(cursor + self.CHUNK_SIZE, self._end)]
+            if not self._all_subscribed:
+                records = records[self._subscribed_mask[records['ticker_id']]]
+            if len(records) > 0:
+                return _from_nanoseconds(int(records['timestamp'][0]))
+            cursor += self.CHUNK_SIZE
+        return None
+
+    def read_only_state(self):
+        '''
+        The store is opened read-only, so forks share its memory map.
+        '''
+        return [self.store]
+
+    def stream_next(self):
+        '''
+        Place the next bar event on the queue
+        :return:
+        '''
+        if self.slice_mode:
+            self._stream_next_slice()
+            return
+
+        record = self._next_record()
+        if record is None:
+            self.continue_backtest = False
+            return
+
+        ticker_id, timestamp, open_price, high_price, low_price, close_price, volume = record
+        bar_event = BarEvent(self.store.symbols[ticker_id], _from_nanoseconds(timestamp), self.period,
+                             open_price, high_price, low_price, close_price, volume)
+
+        # Store event
+        self._store_event(bar_event)
+
+        # Send event to queue
+        self.events_que.put(bar_event)
@@ -0,0 +1,29 @@
+from datetime import datetime
+import pandas as pd
+import pytest
+from event_bus import BacktestEventBus
+from price_handler_mmap import MmapBarPriceHandler
+from price_store_mmap import UniversePriceStore
+
+
+def stream(price_handler):
+    times = []
+    while True:
+        price_handler.stream_next()
+        if not price_handler.continue_backtest:
+            return times
+        times.append(pd.Timestamp(price_handler.events_que.pop().time))
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2018-02-01', '2018-03-01'),
+    (datetime(2018, 2, 1), datetime(2018, 3, 1)),
+    (pd.Timestamp('2018-02-01'), pd.Timestamp('2018-03-01')),
+    (pd.Timestamp('2018-02-01', tz='America/Toronto'), pd.Timestamp('2018-03-01', tz='America/Toronto')),
+])
+def test_the_window_accepts_strings_and_aware_dates(tmp_path, tickers_data, start_date, end_date):
+    store = UniversePriceStore.build(str(tmp_path / 'store.npy'), tickers_data)
+    times = stream(MmapBarPriceHandler(store, BacktestEventBus(), start_date=start_date, end_date=end_date))
+    assert times[0] == pd.Timestamp('2018-02-01')
+    assert times[-1] == pd.Timestamp('2018-02-28')
+    assert len(times) == 3 * len(pd.bdate_range('2018-02-01', '2018-02-28'))
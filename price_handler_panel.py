@@ -0,0 +1,54 @@
+from price_handler_base import AbstractBarPriceHandler
+from event import BarEvent
+from bar_stream import BarStreamMerger
+
+
+class PanelBarPriceHandler(AbstractBarPriceHandler):
+    """
+    PanelBarPriceHandler streams the bars of a PricePanel as BarEvents, in the same (timestamp, ticker) order as the
+    JsonBarPriceHandler the panel was built from, so that a strategy can be run through the event driven engine on
+    exactly the data seen by the vectorised engine.
+    """
+
+    def __init__(self, panel, events_que):
+        '''
+        :param panel: PricePanel
+        :param events_que: The Queue of Event objects.
+        '''
+        self.panel = panel
+        self.events_que = events_que
+        self.continue_backtest = True
+        self.tickers = {ticker: {'close': None, 'timestamp': None} for ticker in panel.tickers}
+        self.tickers_data = {}
+        self.bar_stream = BarStreamMerger(panel.ticker_bars())
+
+    def peek_timestamp(self):
+        '''
+        Returns the timestamp of the next bar, without streaming it, or None once every bar has been streamed.
+        :return:
+        '''
+        return self.bar_stream.peek()
+
+    def read_only_state(self):
+        '''
+        The panel and the arrays of the bars of each ticker are never modified, so forks share them.
+        :return:
+        '''
+        return [self.panel] + self.bar_stream.ticker_bars()
+
+    def stream_next(self):
+        '''
+        Place the next bar event on the queue
+        :return:
+        '''
+        try:
+            index, ticker, bar = next(self.bar_stream)
+        except StopIteration:
+            self.continue_backtest = False
+            return
+
+        period = 86400  # Seconds in a day
+        open_price, high_price, low_price, close_price, volume = bar
+        bar_event = BarEvent(ticker, index, period, open_price, high_price, low_price, close_price, volume)
+        self._store_event(bar_event)
+        self.events_que.put(bar_event)
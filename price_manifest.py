@@ -0,0 +1,180 @@
+import json
+import os
+import pandas as pd
+
+
+def _bar_start(value):
+    '''
+    Normalises the start time of a bar, an ISO string or an epoch number, to a naive ISO string to the second, as
+    the bars are indexed when loaded.
+    '''
+    start = pd.Timestamp(value)
+    if start.tzinfo is not None:
+        start = start.tz_localize(None)
+    return start.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class JsonDataManifest(object):
+    """
+    JsonDataManifest is an index of the JSON data directory, which is laid out as <json_dir>/<year>/<letter>/_<ticker>.json.
+    It maps each ticker to the list of year files that actually exist, so that subscribing a ticker only ever touches
+    files that are there, rather than trying every year directory in turn.
+
+    The manifest is built once, and can be saved to disk. On refresh only the <year>/<letter> directories whose
+    modification time has changed are listed again, so that newly arrived files are picked up cheaply.
+
+    Optionally, the row count and date span of every file are recorded as well. These are kept in sync lazily, using
+    the modification time and size of each file.
+    """
+
+    def __init__(self, json_dir, manifest_file=None, with_stats=False):
+        """
+        Loads the manifest from manifest_file if it exists, then brings it up to date with the JSON data directory.
+
+        :param json_dir: Directory of JSON data files
+        :param manifest_file: Optional file the manifest is loaded from and saved to
+        :param with_stats: Record the row count and date span of every file
+        """
+        self.json_dir = json_dir
+        self.manifest_file = manifest_file
+        self.with_stats = with_stats
+        self.directories = {}
+        self.tickers = {}
+        self._changed = False
+
+        if self.manifest_file is not None and os.path.isfile(self.manifest_file):
+            self._load()
+        self.refresh()
+
+    def _load(self):
+        with open(self.manifest_file, 'r') as fd:
+            manifest = json.load(fd)
+        if manifest.get('json_dir') == self.json_dir and manifest.get('with_stats') == self.with_stats:
+            self.directories = manifest['directories']
+
+    def save(self, manifest_file=None):
+        '''
+        Saves the manifest as JSON.
+
+        :param manifest_file: The file to save to, defaults to the manifest_file the manifest was created with
+        :return:
+        '''
+        if manifest_file is None:
+            manifest_file = self.manifest_file
+        manifest = {'json_dir': self.json_dir, 'with_stats': self.with_stats, 'directories': self.directories}
+        tmp_file = manifest_file + '.tmp'
+        with open(tmp_file, 'w') as fd:
+            json.dump(manifest, fd)
+        os.replace(tmp_file, manifest_file)
+        self._changed = False
+
+    def flush(self):
+        '''
+        Saves the manifest if it has changed since it was loaded or last saved, and a manifest_file was given.
+
+        :return:
+        '''
+        if self._changed and self.manifest_file is not None:
+            self.save()
+
+    def refresh(self):
+        '''
+        Lists again the <year>/<letter> directories that were added or modified since the manifest was built, drops
+        those that were removed and rebuilds the ticker index. The manifest is saved if it changed.
+
+        :return:
+        '''
+        seen = set()
+        for year_d in sorted(os.listdir(self.json_dir)):
+            year_path = os.path.join(self.json_dir, year_d)
+            if not os.path.isdir(year_path):
+                continue
+            for letter_d in sorted(os.listdir(year_path)):
+                letter_path = os.path.join(year_path, letter_d)
+                if not os.path.isdir(letter_path):
+                    continue
+                key = '{0}/{1}'.format(year_d, letter_d)
+                seen.add(key)
+                mtime = os.stat(letter_path).st_mtime_ns
+                directory = self.directories.get(key)
+                if directory is None or directory['mtime'] != mtime:
+                    self.directories[key] = self._scan_directory(year_d, letter_d, mtime, directory)
+                    self._changed = True
+
+        for key in list(self.directories):
+            if key not in seen:
+                del self.directories[key]
+                self._changed = True
+
+        self._build_index()
+        self.flush()
+
+    def _scan_directory(self, year_d, letter_d, mtime, previous=None):
+        '''
+        Lists the ticker files of a single <year>/<letter> directory, reusing the entries of files that are unchanged.
+        '''
+        previous_files = previous['files'] if previous is not None else {}
+        files = {}
+        for filename in os.listdir(os.path.join(self.json_dir, year_d, letter_d)):
+            if not (filename.startswith('_') and filename.endswith('.json')):
+                continue
+            ticker = filename[1:-len('.json')]
+            entry = {'year': year_d, 'path': os.path.join(year_d, letter_d, filename)}
+            old_entry = previous_files.get(ticker)
+            if old_entry is not None:
+                entry.update((k, v) for k, v in old_entry.items() if k not in entry)
+            files[ticker] = entry
+        return {'mtime': mtime, 'files': files}
+
+    def _build_index(self):
+        self.tickers = {}
+        for key in sorted(self.directories):
+            for ticker, entry in self.directories[key]['files'].items():
+                self.tickers.setdefault(ticker, []).append(entry)
+
+    def _update_stats(self, entry):
+        '''
+        Records the row count and the first and last bar start times of a file, if it changed since they were last
+        recorded.
+        '''
+        path = os.path.join(self.json_dir, entry['path'])
+        stat = os.stat(path)
+        if entry.get('mtime') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+            return
+
+        with open(path, 'r') as fd:
+            try:
+                records = json.load(fd)
+            except ValueError:
+                records = []
+        starts = [_bar_start(record['start']) for record in records if record.get('start') is not None]
+        entry['rows'] = len(records)
+        entry['first'] = min(starts) if starts else None
+        entry['last'] = max(starts) if starts else None
+        entry['mtime'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        self._changed = True
+
+    def ticker_files(self, ticker):
+        '''
+        Returns the manifest entries of every existing file of a ticker, ordered by year. Each entry holds the 'year'
+        and the 'path' relative to the JSON data directory and, if stats are recorded, the 'rows' and the 'first' and
+        'last' bar start times.
+
+        :param ticker: The ticker whose files should be returned.
+        :return: List of entries
+        '''
+        entries = self.tickers.get(ticker, [])
+        if self.with_stats:
+            for entry in entries:
+                self._update_stats(entry)
+        return entries
+
+    def ticker_paths(self, ticker):
+        '''
+        Returns the full paths of every existing file of a ticker, ordered by year.
+
+        :param ticker: The ticker whose files should be returned.
+        :return: List of paths
+        '''
+        return [os.path.join(self.json_dir, entry['path']) for entry in self.ticker_files(ticker)]
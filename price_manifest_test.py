@@ -0,0 +1,50 @@
+import json
+import os
+from price_manifest import JsonDataManifest
+
+
+def touch_directory(path):
+    '''
+    Moves the modification time of a directory on, so that a change is seen whatever the resolution of the clock.
+    '''
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def years(manifest, ticker):
+    return [entry['year'] for entry in manifest.ticker_files(ticker)]
+
+
+def test_refresh_picks_up_new_and_removed_files(json_dir, tmp_path, write_ticker_json, make_bars):
+    manifest_file = str(tmp_path / 'manifest.json')
+    manifest = JsonDataManifest(json_dir, manifest_file)
+    assert years(manifest, 'AAA.TO') == ['2016', '2017', '2018']
+    assert 'ABC.TO' not in manifest.tickers
+
+    write_ticker_json(json_dir, 'ABC.TO', make_bars(5, '2017-06-01', '2019-06-01'))
+    os.remove(os.path.join(json_dir, '2016', 'A', '_AAA.TO.json'))
+    for directory in ('2016/A', '2017/A', '2018/A'):
+        touch_directory(os.path.join(json_dir, directory))
+
+    manifest.refresh()
+    assert years(manifest, 'ABC.TO') == ['2017', '2018', '2019']
+    assert years(manifest, 'AAA.TO') == ['2017', '2018']
+
+    # A manifest loaded from its file is brought up to date with the directory in the same way
+    reloaded = JsonDataManifest(json_dir, manifest_file)
+    assert reloaded.tickers == manifest.tickers
+
+
+def test_stats_record_the_span_of_iso_and_epoch_start_times(tmp_path):
+    directory = tmp_path / 'eod' / '2018' / 'A'
+    directory.mkdir(parents=True)
+    records = [{'start': '2018-01-02T00:00:00.000000-05:00', 'open': 1.0, 'close': 1.0},
+               {'start': 1517443200000000000, 'open': 1.0, 'close': 1.0},
+               {'start': '2018-01-03T00:00:00.000000-05:00', 'open': 1.0, 'close': 1.0}]
+    with open(str(directory / '_AAA.TO.json'), 'w') as fd:
+        json.dump(records, fd)
+
+    entry, = JsonDataManifest(str(tmp_path / 'eod'), with_stats=True).ticker_files('AAA.TO')
+    assert entry['rows'] == 3
+    assert entry['first'] == '2018-01-02T00:00:00'
+    assert entry['last'] == '2018-02-01T00:00:00'
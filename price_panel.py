@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from bar_stream import TickerBars
+from price_parser import PriceParser
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def carry_forward(values, valid, fill=0):
+    '''
+    Carries the valid values of a (dates x tickers) array forward down each column, over the rows where they are not
+    valid, without a Python loop over the rows.
+
+    :param values: Array of shape (dates, tickers)
+    :param valid: Boolean array of shape (dates, tickers), marking the values to carry forward
+    :param fill: The value used before the first valid value of a column
+    :return: Array of shape (dates, tickers)
+    '''
+    rows = np.where(valid, np.arange(values.shape[0])[:, None], -1)
+    rows = np.maximum.accumulate(rows, axis=0)
+    carried = np.take_along_axis(values, np.maximum(rows, 0), axis=0)
+    carried[rows < 0] = fill
+    return carried
+
+
+class PricePanel(object):
+    """
+    PricePanel holds the bars of a universe of tickers as (dates x tickers) int64 arrays, one per OHLCV field, on the
+    union of the timestamps of every ticker. Prices are parsed into the PriceParser fixed-point representation, and
+    has_bar marks where a ticker actually has a bar, as the prices are 0 elsewhere.
+
+    Tickers are sorted, so that iterating over the bars row by row gives the (timestamp, ticker) order of the event
+    driven price handlers.
+    """
+
+    def __init__(self, dates, tickers, has_bar, open_prices, high_prices, low_prices, close_prices, volumes):
+        '''
+        :param dates: DatetimeIndex of the rows
+        :param tickers: Sorted list of the tickers of the columns
+        :param has_bar: Boolean array of shape (dates, tickers)
+        :param open_prices: int64 array of shape (dates, tickers)
+        :param high_prices: int64 array of shape (dates, tickers)
+        :param low_prices: int64 array of shape (dates, tickers)
+        :param close_prices: int64 array of shape (dates, tickers)
+        :param volumes: int64 array of shape (dates, tickers)
+        '''
+        self.dates = dates
+        self.tickers = tickers
+        self.has_bar = has_bar
+        self.open = open_prices
+        self.high = high_prices
+        self.low = low_prices
+        self.close = close_prices
+        self.volume = volumes
+
+    @property
+    def shape(self):
+        return self.has_bar.shape
+
+    @classmethod
+    def from_tickers_data(cls, tickers_data, start_date=None, end_date=None):
+        '''
+        Builds the panel from the DataFrames of a JsonBarPriceHandler, keeping only the bars within
+        [start_date, end_date).
+
+        :param tickers_data: Dictionary of ticker to DataFrame of bars, indexed by the start time of each bar
+        :param start_date: Date to start retrieving bars from
+        :param end_date: Date to stop retrieving bars from
+        :return: PricePanel
+        '''
+        tickers = sorted(tickers_data)
+        ticker_bars = [TickerBars.from_frame(ticker, tickers_data[ticker], PANEL_FIELDS, start_date, end_date)
+                       for ticker in tickers]
+        if len(ticker_bars) > 0:
+            timestamps = np.unique(np.concatenate([bars.timestamps for bars in ticker_bars]))
+        else:
+            timestamps = np.empty(0, dtype=np.int64)
+
+        has_bar = np.zeros((len(timestamps), len(tickers)), dtype=bool)
+        values = np.zeros((len(PANEL_FIELDS), len(timestamps), len(tickers)), dtype=np.int64)
+        for column, bars in enumerate(ticker_bars):
+            rows = np.searchsorted(timestamps, bars.timestamps)
+            has_bar[rows, column] = True
+            values[:, rows, column] = bars.values.T
+
+        return cls(pd.DatetimeIndex(timestamps), tickers, has_bar, *values)
+
+    @classmethod
+    def from_price_handler(cls, price_handler):
+        '''
+        Builds the panel from the data already loaded by a JsonBarPriceHandler.
+
+        :param price_handler: JsonBarPriceHandler
+        :return: PricePanel
+        '''
+        return cls.from_tickers_data(price_handler.tickers_data, price_handler.start_date, price_handler.end_date)
+
+    def ticker_bars(self):
+        '''
+        Returns the bars of every ticker of the panel as TickerBars.
+
+        :return: List of TickerBars
+        '''
+        timestamps = self.dates.values.astype('datetime64[ns]').astype(np.int64)
+        fields = np.stack([self.open, self.high, self.low, self.close, self.volume], axis=-1)
+        ticker_bars = []
+        for column, ticker in enumerate(self.tickers):
+            rows = self.has_bar[:, column]
+            ticker_bars.append(TickerBars(ticker, timestamps[rows], fields[rows, column]))
+        return ticker_bars
+
+    def frame(self, field='close', display=True):
+        '''
+        Returns a field of the panel as a (dates x tickers) DataFrame, with NaN where a ticker has no bar, which is
+        convenient for expressing strategies with pandas, e.g. panel.frame('close').rolling(50).mean().
+
+        :param field: One of 'open', 'high', 'low', 'close' or 'volume'
+        :param display: Whether prices are converted back to floats for display, rather than parsed ints
+        :return: DataFrame
+        '''
+        values = getattr(self, field).astype(np.float64)
+        if display and field != 'volume':
+            values = values / PriceParser.PRICE_MULTIPLIER
+        values[~self.has_bar] = np.nan
+        return pd.DataFrame(values, index=self.dates, columns=self.tickers)
+
+    def last_close(self):
+        '''
+        Returns the close prices carried forward over the dates a ticker has no bar, i.e. the last close known at each
+        date, with 0 before the first bar of a ticker.
+
+        :return: int64 array of shape (dates, tickers)
+        '''
+        return carry_forward(self.close, self.has_bar, 0)
+
@@ -54,4 +54,51 @@ class PriceParser(object):
     @staticmethod
     @dispatch(float, int)
     def display(x, dp):  # flake8: noqa
-        return round(x, dp)
\ No newline at end of file
+        return round(x, dp)
+
+    """Fast Methods. Dispatch-free conversions for the hot path, falling back to the dispatched methods above."""
+
+    @staticmethod
+    def parse_scalar(x):
+        t = type(x)
+        if t is int or t is np.int64:
+            return x
+        elif t is float or t is np.float64:
+            return int(x * PriceParser.PRICE_MULTIPLIER)
+        elif t is str:
+            return int(float(x) * PriceParser.PRICE_MULTIPLIER)
+        return PriceParser.parse(x)
+
+    @staticmethod
+    def display_scalar(x, dp=2):
+        t = type(x)
+        if t is int or t is np.int64:
+            return round(x / PriceParser.PRICE_MULTIPLIER, dp)
+        elif t is float or t is np.float64:
+            return round(x, dp)
+        return PriceParser.display(x, dp)
+
+    """Array Methods. Convert whole NumPy columns to and from the fixed-point int64 representation in one pass."""
+
+    # Largest absolute price that can be parsed without overflowing an int64
+    MAX_PRICE = np.iinfo(np.int64).max // PRICE_MULTIPLIER
+
+    @staticmethod
+    def parse_array(x):
+        x = np.asarray(x)
+        if x.dtype.kind in 'iu':
+            return x.astype(np.int64)
+        if x.dtype.kind in 'USO':
+            x = x.astype(np.float64)
+        if not np.isfinite(x).all():
+            raise ValueError('Could not parse prices as they contain NaN or infinite values')
+        if x.size > 0 and np.abs(x).max() > PriceParser.MAX_PRICE:
+            raise OverflowError('Could not parse prices as they exceed {0}'.format(PriceParser.MAX_PRICE))
+        return (x * PriceParser.PRICE_MULTIPLIER).astype(np.int64)
+
+    @staticmethod
+    def display_array(x, dp=2):
+        x = np.asarray(x)
+        if x.dtype.kind in 'iu':
+            return np.round(x / PriceParser.PRICE_MULTIPLIER, dp)
+        return np.round(x.astype(np.float64), dp)
@@ -0,0 +1,127 @@
+import json
+import numpy as np
+from bar_stream import TickerBars
+
+BAR_DTYPE = np.dtype([
+    ('ticker_id', np.int64),
+    ('timestamp', np.int64),
+    ('open', np.int64),
+    ('high', np.int64),
+    ('low', np.int64),
+    ('close', np.int64),
+    ('volume', np.int64),
+])
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def _data_path(path):
+    '''
+    Returns the path of the data file with the .npy extension, which np.save appends to a path without it.
+    '''
+    return path if path.endswith('.npy') else path + '.npy'
+
+
+def _symbols_path(path):
+    return path + '.symbols.json'
+
+
+class UniversePriceStore(object):
+    """
+    UniversePriceStore holds the bars of a whole universe of tickers in a single memory-mapped NumPy file, as a
+    structured int64 array of (ticker_id, timestamp, open, high, low, close, volume) records sorted by time and then by
+    ticker. Prices are already scaled by PriceParser.PRICE_MULTIPLIER and timestamps are nanoseconds since the epoch.
+
+    A companion symbol table, stored as JSON next to the data file, maps the ticker strings to their integer ids. Ids
+    are assigned in the sorted order of the tickers, so that ties on the timestamp are ordered exactly as they are by
+    the JsonBarPriceHandler.
+
+    As the file is only ever opened read-only, many backtest processes can share one page-cached copy of the data.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a store previously written by UniversePriceStore.build.
+
+        :param path: The .npy data file of the store, the extension being added if it is missing
+        """
+        path = _data_path(path)
+        self.path = path
+        self.bars = np.load(path, mmap_mode='r')
+        with open(_symbols_path(path), 'r') as fd:
+            self.symbols = json.load(fd)['symbols']
+        self.ticker_ids = {ticker: ticker_id for ticker_id, ticker in enumerate(self.symbols)}
+
+    def __len__(self):
+        return len(self.bars)
+
+    def __getstate__(self):
+        # Only the path is pickled, each process maps the file itself
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @classmethod
+    def build(cls, path, tickers_data):
+        '''
+        Writes a store from DataFrames of bars, such as the tickers_data of a JsonBarPriceHandler. Bars with a NaN or
+        infinite open, high, low or close are skipped, as they are by the JsonBarPriceHandler.
+
+        :param path: The .npy data file to write, the extension being added if it is missing
+        :param tickers_data: Dictionary of ticker to DataFrame of OHLCV bars indexed by a DatetimeIndex
+        :return: The opened UniversePriceStore
+        '''
+        path = _data_path(path)
+        symbols = sorted(tickers_data)
+        # The bars are parsed as they are streamed by the JsonBarPriceHandler, skipping those with non-finite prices
+        ticker_bars = [TickerBars.from_frame(ticker, tickers_data[ticker], BAR_COLUMNS) for ticker in symbols]
+        total = sum(len(bars) for bars in ticker_bars)
+        records = np.empty(total, dtype=BAR_DTYPE)
+
+        offset = 0
+        for ticker_id, bars in enumerate(ticker_bars):
+            rows = slice(offset, offset + len(bars))
+            records['ticker_id'][rows] = ticker_id
+            records['timestamp'][rows] = bars.timestamps
+            for i, column in enumerate(BAR_COLUMNS):
+                records[column][rows] = bars.values[:, i]
+            offset += len(bars)
+
+        # Sort by time, then by ticker id, keeping rows of a ticker with an identical timestamp in their original order
+        order = np.lexsort((records['ticker_id'], records['timestamp']))
+        np.save(path, records[order])
+
+        with open(_symbols_path(path), 'w') as fd:
+            json.dump({'symbols': symbols}, fd)
+        return cls(path)
+
+    @classmethod
+    def from_price_handler(cls, path, price_handler):
+        '''
+        Writes a store from the data loaded by a JsonBarPriceHandler.
+
+        :param path: The .npy data file to write
+        :param price_handler: JsonBarPriceHandler
+        :return: The opened UniversePriceStore
+        '''
+        return cls.build(path, price_handler.tickers_data)
+
+    def search(self, timestamp):
+        '''
+        Returns the index of the first record at or after timestamp. The binary search runs directly on the memory map,
+        so the timestamp column is never copied.
+
+        :param timestamp: Nanoseconds since the epoch
+        :return: Record index
+        '''
+        timestamps = self.bars['timestamp']
+        lo = 0
+        hi = len(timestamps)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamps[mid] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from price_parser import PriceParser
+from price_store_mmap import UniversePriceStore
+
+
+def make_tickers_data(periods=10):
+    tickers_data = {}
+    for k, ticker in enumerate(('BBB', 'AAA')):
+        index = pd.bdate_range('2018-01-01', periods=periods)
+        close = np.arange(10.0, 10.0 + periods) + k
+        tickers_data[ticker] = pd.DataFrame({'open': close, 'high': close + 1.0, 'low': close - 1.0, 'close': close,
+                                             'volume': 1000.0}, index=index)
+    return tickers_data
+
+
+def test_build_orders_the_bars_by_time_then_ticker(tmp_path):
+    store = UniversePriceStore.build(str(tmp_path / 'store.npy'), make_tickers_data())
+    assert store.symbols == ['AAA', 'BBB']
+    assert len(store) == 20
+    assert (np.diff(store.bars['timestamp']) >= 0).all()
+    assert store.bars['ticker_id'][:2].tolist() == [0, 1]
+    assert store.bars['close'][0] == PriceParser.parse(11.0)
+
+
+def test_build_skips_bars_with_a_nan_high_or_low(tmp_path):
+    tickers_data = make_tickers_data()
+    tickers_data['AAA'].iloc[2, tickers_data['AAA'].columns.get_loc('high')] = np.nan
+    tickers_data['BBB'].iloc[5, tickers_data['BBB'].columns.get_loc('low')] = np.nan
+    store = UniversePriceStore.build(str(tmp_path / 'store.npy'), tickers_data)
+    assert len(store) == 18
+    for ticker, row in (('AAA', 2), ('BBB', 5)):
+        ticker_bars = store.bars[store.bars['ticker_id'] == store.ticker_ids[ticker]]
+        assert pd.Timestamp(tickers_data[ticker].index[row]).value not in ticker_bars['timestamp']
+
+
+def test_build_adds_the_npy_extension(tmp_path):
+    path = str(tmp_path / 'store')
+    UniversePriceStore.build(path, make_tickers_data())
+    assert len(UniversePriceStore(path)) == 20
+    assert UniversePriceStore(path).path == path + '.npy'
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pandas as pd
+from bar_stream import BarStreamMerger, TickerBars
+from event import BarEvent
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class BarReplayServer(object):
+    """
+    BarReplayServer serves recorded bars over a localhost TCP socket, so that live sessions can be run and tested
+    offline. Every client is sent the whole recording, in (timestamp, ticker) order, as one JSON object per line with
+    the timestamp in nanoseconds and the prices already parsed by the PriceParser.
+    """
+
+    def __init__(self, bars, host='127.0.0.1', port=0, interval=0.0):
+        """
+        :param bars: List of (timestamp, ticker, open, high, low, close, volume) tuples, with integer nanosecond
+                    timestamps and parsed prices
+        :param host: The interface to listen on
+        :param port: The port to listen on, 0 picks a free port
+        :param interval: Delay in seconds between bars, 0 replays them as fast as the client reads
+        """
+        self.bars = bars
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.server = None
+
+    @classmethod
+    def from_tickers_data(cls, tickers_data, start_date=None, end_date=None, **kwargs):
+        '''
+        Records the bars of the DataFrames of a JsonBarPriceHandler, within [start_date, end_date).
+
+        :param tickers_data: Dictionary of ticker to DataFrame of bars, indexed by the start time of each bar
+        :param start_date: Date to start retrieving bars from
+        :param end_date: Date to stop retrieving bars from
+        :return: BarReplayServer
+        '''
+        merger = BarStreamMerger([TickerBars.from_frame(ticker, df, BAR_COLUMNS, start_date, end_date)
+                                  for ticker, df in sorted(tickers_data.items())])
+        bars = [(timestamp.value, ticker) + tuple(bar) for timestamp, ticker, bar in merger]
+        return cls(bars, **kwargs)
+
+    async def start(self):
+        '''
+        Starts listening.
+
+        :return: The port listened on
+        '''
+        self.server = await asyncio.start_server(self._replay, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _replay(self, reader, writer):
+        try:
+            for i, (timestamp, ticker, open_price, high_price, low_price, close_price, volume) in enumerate(self.bars):
+                writer.write((json.dumps({'t': timestamp, 's': ticker, 'o': open_price, 'h': high_price,
+                                          'l': low_price, 'c': close_price, 'v': volume}) + '\n').encode())
+                if self.interval > 0:
+                    await writer.drain()
+                    await asyncio.sleep(self.interval)
+                elif i % 256 == 255:
+                    await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class ReplayFeed(object):
+    """
+    ReplayFeed is an async iterator of the BarEvents served by a BarReplayServer, for an AsyncFeedPriceHandler.
+    """
+
+    def __init__(self, host='127.0.0.1', port=None, period=86400):
+        """
+        :param host: The host of the replay server
+        :param port: The port of the replay server
+        :param period: The time period covered by each bar in seconds
+        """
+        self.host = host
+        self.port = port
+        self.period = period
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            async for line in reader:
+                bar = json.loads(line)
+                yield BarEvent(bar['s'], pd.Timestamp(bar['t']), self.period, bar['o'], bar['h'], bar['l'], bar['c'],
+                               bar['v'])
+        finally:
+            writer.close()
@@ -0,0 +1,122 @@
+from array import array
+import time
+
+
+class SessionInstrumentation(object):
+    """
+    SessionInstrumentation counts the events handled by a TradingSession per EventType, and times every handler of
+    the dispatch table with a monotonic clock, so that it can be seen whether the strategy, the sizing/risk chain,
+    execution or the mark-to-market of the portfolio is the bottleneck of a session.
+
+    It is only involved when enabled, as the session then wraps its handlers with the timing closures below. Otherwise
+    the handlers are dispatched directly and cost nothing extra.
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, clock=time.perf_counter_ns):
+        """
+        :param clock: Monotonic clock returning integer nanoseconds
+        """
+        self.clock = clock
+        self.event_counts = {}
+        self.latencies = {}
+
+    def counter(self, event_type):
+        '''
+        Returns a handler that counts the events of event_type.
+
+        :param event_type: The EventType counted
+        :return: Handler taking the event
+        '''
+        name = event_type.name
+        self.event_counts.setdefault(name, 0)
+        event_counts = self.event_counts
+
+        def count(event):
+            event_counts[name] += 1
+        return count
+
+    def timed(self, name, handler):
+        '''
+        Wraps a handler so that the latency of every call is recorded under name.
+
+        :param name: The name the handler is reported under, e.g. 'strategy.calculate_signals'
+        :param handler: Handler taking the event
+        :return: The wrapped handler
+        '''
+        latencies = self.latencies.setdefault(name, array('q'))
+        clock = self.clock
+
+        def timed_handler(event):
+            start = clock()
+            handler(event)
+            latencies.append(clock() - start)
+        return timed_handler
+
+    def record(self, name, latency):
+        '''
+        Records a latency measured outside of a timed handler, e.g. from the receipt of a tick to an order.
+
+        :param name: The name the latency is reported under
+        :param latency: The latency in nanoseconds
+        :return:
+        '''
+        self.latencies.setdefault(name, array('q')).append(latency)
+
+    @staticmethod
+    def _percentile(ordered, percentile):
+        index = int(round(percentile / 100.0 * (len(ordered) - 1)))
+        return ordered[index]
+
+    def report(self):
+        '''
+        Returns the event counts and, for every handler, the number of calls and the cumulative, mean, percentile and
+        maximum latency in microseconds.
+
+        :return: Dictionary with 'event_counts' and 'handlers'
+        '''
+        handlers = {}
+        for name, latencies in self.latencies.items():
+            if len(latencies) == 0:
+                continue
+            ordered = sorted(latencies)
+            total = sum(ordered)
+            stats = {
+                'calls': len(ordered),
+                'total_us': total / 1000.0,
+                'mean_us': total / 1000.0 / len(ordered),
+                'max_us': ordered[-1] / 1000.0,
+            }
+            for percentile in self.PERCENTILES:
+                stats['p{0}_us'.format(percentile)] = self._percentile(ordered, percentile) / 1000.0
+            handlers[name] = stats
+        return {'event_counts': dict(self.event_counts), 'handlers': handlers}
+
+    def format_table(self):
+        '''
+        Formats the report as a text table, with the handlers ordered by cumulative latency.
+
+        :return: String
+        '''
+        report = self.report()
+        lines = ['{0:<12}{1:>12}'.format('Event', 'Count')]
+        for name, count in sorted(report['event_counts'].items()):
+            lines.append('{0:<12}{1:>12,}'.format(name, count))
+
+        percentile_columns = ['p{0}_us'.format(percentile) for percentile in self.PERCENTILES]
+        header = '{0:<44}{1:>10}{2:>14}{3:>10}'.format('Handler', 'Calls', 'Total ms', 'Mean us')
+        header += ''.join('{0:>10}'.format(column[:-3] + ' us') for column in percentile_columns)
+        header += '{0:>10}'.format('Max us')
+        lines.extend(['', header])
+        handlers = sorted(report['handlers'].items(), key=lambda item: item[1]['total_us'], reverse=True)
+        for name, stats in handlers:
+            line = '{0:<44}{1:>10,}{2:>14,.1f}{3:>10.1f}'.format(name, stats['calls'], stats['total_us'] / 1000.0,
+                                                                 stats['mean_us'])
+            line += ''.join('{0:>10.1f}'.format(stats[column]) for column in percentile_columns)
+            line += '{0:>10.1f}'.format(stats['max_us'])
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def print_table(self):
+        print(self.format_table())
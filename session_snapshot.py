@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import pickle
+
+
+def _shared_memo(session):
+    '''
+    Builds a deepcopy memo mapping every read-only object of the session to itself, so that copying the session shares
+    those objects rather than copying them.
+    '''
+    shared = session.price_handler.read_only_state()
+    if session.config is not None:
+        shared.append(session.config)
+    return {id(obj): obj for obj in shared}
+
+
+def run_fork(data, configure=None, testing=True):
+    '''
+    Restores a session from a pickled snapshot, optionally reconfigures it, and runs it to completion. This is a module
+    level function so that it can be run within a worker process.
+
+    :param data: The bytes of SessionSnapshot.to_bytes()
+    :param configure: Optional function called with the restored session before it is run, e.g. to change the exit
+                rule of the strategy, or to record it to its own EventJournal
+    :param testing: Passed to start_trading, so that the tearsheet is not plotted
+    :return: The results of the session
+    '''
+    session = SessionSnapshot.from_bytes(data)
+    if configure is not None:
+        configure(session)
+    return session.start_trading(testing=testing)
+
+
+class SessionSnapshot(object):
+    """
+    SessionSnapshot freezes the full state of a TradingSession, between two price events: the cursor of the price
+    stream, the Portfolio and its Positions, the strategy, the statistics recorded so far and the event bus. It can be
+    forked into any number of independent continuations, so that variants sharing a common history replay it only
+    once.
+
+    Within a process the snapshot is deep copied, with the bars of the price handler and the config shared between every
+    fork rather than copied, as they are only ever read. Across processes the snapshot is pickled once to bytes, and
+    restored in each worker. With a MmapBarPriceHandler only the path of its store is pickled.
+
+    The snapshot does not keep the EventJournal of the session, as forks appending to the same journal would interleave
+    their events. Forks are not recorded, unless they are given a journal of their own.
+    """
+
+    def __init__(self, session):
+        '''
+        :param session: The TradingSession to freeze, which can carry on running independently of the snapshot
+        '''
+        memo = _shared_memo(session)
+        if session.journal is not None:
+            # The journal is left with the session, rather than copied
+            memo[id(session.journal)] = None
+        self.session = copy.deepcopy(session, memo)
+        self.time = session.cur_time
+
+    def fork(self, journal=None):
+        '''
+        Returns an independent copy of the frozen session, which continues from the snapshot when run.
+
+        :param journal: Optional EventJournal of its own to record the fork to, from the snapshot on
+        :return: TradingSession
+        '''
+        session = copy.deepcopy(self.session, _shared_memo(self.session))
+        session.journal = journal
+        return session
+
+    def to_bytes(self):
+        '''
+        Pickles the frozen session, to be restored in another process.
+
+        :return: bytes
+        '''
+        return pickle.dumps(self.session, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def from_bytes(data):
+        '''
+        Restores a session pickled by to_bytes().
+
+        :param data: bytes
+        :return: TradingSession
+        '''
+        return pickle.loads(data)
+
+    def run_forks(self, configures, workers=None):
+        '''
+        Runs one fork of the snapshot per configure function on a process pool, and returns their results in the same
+        order.
+
+        :param configures: List of functions, each called with its restored session before it is run. They must be
+                    picklable, i.e. defined at module level. A fork is only recorded if its function gives it an
+                    EventJournal of its own.
+        :param workers: Number of worker processes, None uses one per CPU and 1 runs the forks in this process
+        :return: List of the results of each fork
+        '''
+        data = self.to_bytes()
+        if workers == 1:
+            return [run_fork(data, configure) for configure in configures]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run_fork, [data] * len(configures), configures))
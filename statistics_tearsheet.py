@@ -56,11 +56,13 @@ class TearsheetStatistics(AbstractStatistics):
         :param portfolio_handler:
         :return:
         '''
-        self.equity[timestamp] = PriceParser.display(
+        self.equity[timestamp] = PriceParser.display_scalar(
             self.portfolio_handler.portfolio.equity
         )
         if self.benchmark is not None:
-            self.equity_benchmark[timestamp] = PriceParser.display(self.price_handler.get_last_close(self.benchmark))
+            self.equity_benchmark[timestamp] = PriceParser.display_scalar(
+                self.price_handler.get_last_close(self.benchmark)
+            )
 
     def get_results(self):
         '''
@@ -127,38 +129,32 @@ class TearsheetStatistics(AbstractStatistics):
 
         return statistics
 
+    def _trade_ledger(self):
+        '''
+        Returns the TradeLedger of the closed positions of the portfolio
+        '''
+        return self.portfolio_handler.portfolio.trades
+
     def _get_positions(self):
         '''
-        Retrieve the list of closed Positions objects from the portfolio
+        Retrieve the closed positions from the trade ledger of the portfolio
         and reformat into a pandas dataframe to be returned
         '''
-        def x(p):
-            return PriceParser.display(p)
-
-        pos = self.portfolio_handler.portfolio.closed_positions
-        a = []
-        for p in pos:
-            a.append(p.__dict__)
-        if len(a) == 0:
+        ledger = self._trade_ledger()
+        if len(ledger) == 0:
             # There are no closed positions
             return None
         else:
-            df = pd.DataFrame(a)
-            df['avg_bot'] = df['avg_bot'].apply(x)
-            df['avg_price'] = df['avg_price'].apply(x)
-            df['avg_sld'] = df['avg_sld'].apply(x)
-            df['cost_basis'] = df['cost_basis'].apply(x)
-            df['init_commission'] = df['init_commission'].apply(x)
-            df['init_price'] = df['init_price'].apply(x)
-            df['market_value'] = df['market_value'].apply(x)
-            df['net'] = df['net'].apply(x)
-            df['net_incl_comm'] = df['net_incl_comm'].apply(x)
-            df['net_total'] = df['net_total'].apply(x)
-            df['realised_pnl'] = df['realised_pnl'].apply(x)
-            df['total_bot'] = df['total_bot'].apply(x)
-            df['total_commission'] = df['total_commission'].apply(x)
-            df['total_sld'] = df['total_sld'].apply(x)
-            df['unrealised_pnl'] = df['unrealised_pnl'].apply(x)
+            trades = ledger.frame()
+            df = pd.DataFrame({'action': ledger.actions(), 'ticker': ledger.ticker_symbols()})
+            for column in ['quantity', 'buys', 'sells']:
+                df[column] = trades[column].values
+            for column in ['avg_bot', 'avg_price', 'avg_sld', 'cost_basis', 'init_commission', 'init_price',
+                           'market_value', 'net', 'net_incl_comm', 'net_total', 'realised_pnl', 'total_bot',
+                           'total_commission', 'total_sld', 'unrealised_pnl']:
+                df[column] = PriceParser.display_array(trades[column].values)
+            for column in ['entry_time', 'exit_time']:
+                df[column] = pd.to_datetime(trades[column].values)
             df['trade_pct'] = (df['avg_sld'] / df['avg_bot'] - 1.0)
             return df
 
@@ -442,6 +438,8 @@ class TearsheetStatistics(AbstractStatistics):
             avg_loss_pct = "N/A"
             max_win_pct = "N/A"
             max_loss_pct = "N/A"
+            max_loss_dt = "N/A"
+            avg_dit = "N/A"
         else:
             pos = stats['positions']
             num_trades = pos.shape[0]
@@ -452,14 +450,14 @@ class TearsheetStatistics(AbstractStatistics):
             avg_loss_pct = '{:.2%}'.format(np.mean(pos[pos["trade_pct"] <= 0]["trade_pct"]))
             max_win_pct = '{:.2%}'.format(np.max(pos["trade_pct"]))
             max_loss_pct = '{:.2%}'.format(np.min(pos["trade_pct"]))
+            max_loss_entry = pos["entry_time"].iloc[pos["trade_pct"].values.argmin()]
+            max_loss_dt = 'N/A' if pd.isnull(max_loss_entry) else max_loss_entry.strftime('%Y-%m-%d')
+            days_in_trade = (pos["exit_time"] - pos["entry_time"]).dt.total_seconds() / 86400.0
+            avg_dit = 'N/A' if days_in_trade.isnull().all() else '{:.2f}'.format(days_in_trade.mean())
 
         y_axis_formatter = FuncFormatter(format_perc)
         ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
-        # TODO: Position class needs entry date
-        max_loss_dt = 'TBD'  # pos[pos["trade_pct"] == np.min(pos["trade_pct"])].entry_date.values[0]
-        avg_dit = '0.0'  # = '{:.2f}'.format(np.mean(pos.time_in_pos))
-
         ax.text(0.5, 8.9, 'Trade Winning %', fontsize=8)
         ax.text(9.5, 8.9, win_pct_str, fontsize=8, fontweight='bold', horizontalalignment='right')
 
@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from event import EventType
 
 
 class AbstractStrategy(object):
@@ -11,6 +12,11 @@ class AbstractStrategy(object):
 
     __metaclass__ = ABCMeta
 
+    # The tickers whose events the strategy receives, None receives the events of every ticker
+    tickers = None
+    # The EventTypes the strategy receives, None receives every type of price event
+    event_types = None
+
     @abstractmethod
     def calculate_signals(self, event):
         '''
@@ -23,11 +29,77 @@ class AbstractStrategy(object):
 
 class Strategies(AbstractStrategy):
     '''
-    Strategies is a collection of strategy
+    Strategies is a collection of strategy. Each event is only delivered to the strategies that subscribe to its type
+    and ticker, through their tickers and event_types attributes, by way of a routing index from (EventType, ticker) to
+    the interested strategies, in the order they were given. Strategies without tickers are wildcards, which receive
+    the events of every ticker, such as cross-sectional strategies.
+
+    The index is filled lazily, as each (EventType, ticker) is first seen. If the subscriptions of a strategy change,
+    reindex() must be called.
     '''
-    def __int__(self, *strategies):
-        self._lst_strategies = strategies
+    def __init__(self, *strategies):
+        self._lst_strategies = list(strategies)
+        self.reindex()
 
-    def calculate_signals(self, event):
+    @property
+    def event_types(self):
+        '''
+        The union of the event types of the strategies, or None if any of them receives every type.
+        '''
+        event_types = set()
         for strategy in self._lst_strategies:
+            if strategy.event_types is None:
+                return None
+            event_types.update(strategy.event_types)
+        return event_types
+
+    def add_strategy(self, strategy):
+        self._lst_strategies.append(strategy)
+        self.reindex()
+
+    def reindex(self):
+        '''
+        Rebuilds the subscriptions of the strategies and empties the routing index.
+        '''
+        self._subscriptions = [(strategy,
+                                None if strategy.event_types is None else frozenset(strategy.event_types),
+                                None if strategy.tickers is None else frozenset(strategy.tickers))
+                               for strategy in self._lst_strategies]
+        self._routes = {}
+
+    def _route(self, event_type, ticker):
+        '''
+        Returns the strategies subscribed to the events of event_type for ticker, adding them to the routing index.
+        '''
+        route = [strategy for strategy, event_types, tickers in self._subscriptions
+                 if (event_types is None or event_type in event_types) and (tickers is None or ticker in tickers)]
+        self._routes[(event_type, ticker)] = route
+        return route
+
+    def _route_slice(self, event):
+        '''
+        Returns the strategies subscribed to any of the tickers of a BarSliceEvent.
+        '''
+        slice_tickers = None
+        route = []
+        for strategy, event_types, tickers in self._subscriptions:
+            if event_types is not None and event.type not in event_types:
+                continue
+            if tickers is not None:
+                if slice_tickers is None:
+                    slice_tickers = set(event.tickers)
+                if tickers.isdisjoint(slice_tickers):
+                    continue
+            route.append(strategy)
+        return route
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR_SLICE:
+            route = self._route_slice(event)
+        else:
+            ticker = getattr(event, 'ticker', None)
+            route = self._routes.get((event.type, ticker))
+            if route is None:
+                route = self._route(event.type, ticker)
+        for strategy in route:
             strategy.calculate_signals(event)
@@ -0,0 +1,59 @@
+from event import EventType
+from event_bus import BacktestEventBus
+from price_handler_mmap import MmapBarPriceHandler
+from price_handler_panel import PanelBarPriceHandler
+from price_store_mmap import UniversePriceStore
+from strategy_base import AbstractStrategy, Strategies
+
+
+class RecordingStrategy(AbstractStrategy):
+    '''
+    Records the type and tickers of every event it receives.
+    '''
+    def __init__(self, tickers=None, event_types=None):
+        self.tickers = tickers
+        self.event_types = event_types
+        self.events = []
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR_SLICE:
+            self.events.append((event.type, tuple(event.tickers)))
+        else:
+            self.events.append((event.type, event.ticker))
+
+
+def run(make_session, price_handler, strategy):
+    session = make_session(price_handler, price_handler.events_que, strategy=strategy)
+    session.start_trading(testing=True)
+    return session
+
+
+def test_a_single_strategy_only_receives_its_tickers(panel, make_session):
+    strategy = RecordingStrategy(tickers=['BBB'])
+    session = run(make_session, PanelBarPriceHandler(panel, BacktestEventBus()), strategy)
+    assert session.strategy is strategy
+    assert strategy.events == [(EventType.BAR, 'BBB')] * int(panel.has_bar[:, panel.tickers.index('BBB')].sum())
+
+
+def test_strategies_are_routed_by_ticker_and_event_type(panel, make_session):
+    single = RecordingStrategy(tickers=['AAA'])
+    wildcard = RecordingStrategy()
+    slices_only = RecordingStrategy(tickers=['BBB', 'CCC'], event_types=[EventType.BAR_SLICE])
+    session = run(make_session, PanelBarPriceHandler(panel, BacktestEventBus()), [single, wildcard, slices_only])
+
+    assert isinstance(session.strategy, Strategies)
+    assert set(single.events) == {(EventType.BAR, 'AAA')}
+    assert len(wildcard.events) == panel.has_bar.sum()
+    assert [ticker for event_type, ticker in wildcard.events if ticker == 'AAA'] == ['AAA'] * len(single.events)
+    assert slices_only.events == []
+
+
+def test_slices_are_routed_to_the_strategies_of_their_tickers(tmp_path, tickers_data, make_session):
+    store = UniversePriceStore.build(str(tmp_path / 'store.npy'), tickers_data)
+    bars_only = RecordingStrategy(event_types=[EventType.BAR])
+    slices_only = RecordingStrategy(tickers=['BBB'], event_types=[EventType.BAR_SLICE])
+    run(make_session, MmapBarPriceHandler(store, BacktestEventBus(), slice_mode=True), [bars_only, slices_only])
+
+    assert bars_only.events == []
+    assert len(slices_only.events) == len(set(store.bars['timestamp'].tolist()))
+    assert all('BBB' in tickers for event_type, tickers in slices_only.events)
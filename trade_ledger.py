@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from position_book import FIELDS, SIDES, ACTIONS
+
+# The columns of the ledger, the accounts of each closed position followed by the id of its ticker and the nanosecond
+# timestamps it was opened and closed at
+LEDGER_FIELDS = FIELDS + ('ticker_id', 'entry_time', 'exit_time')
+
+
+def _to_nanoseconds(time):
+    '''
+    Converts the timestamp of a fill (datetime, pandas Timestamp, or None) to int64 nanoseconds, None being NaT.
+    '''
+    return pd.Timestamp(time).value
+
+
+class TradeLedger(object):
+    """
+    TradeLedger is an append-only record of the round trips of a portfolio, i.e. of every position from the fill that
+    opened it to the fill that closed it. Rather than keeping the closed Position objects, each closed position is
+    written as a column of a preallocated (fields x trades) int64 array, with the same accounts as a Position, the id of
+    its ticker in the symbol table of the ledger and its entry and exit timestamps in nanoseconds. The array doubles in
+    size when it is full.
+
+    frame() views the recorded trades as a DataFrame without copying them, for the trade statistics.
+    """
+
+    def __init__(self, capacity=256):
+        '''
+        :param capacity: Number of trades allocated for up front
+        '''
+        self.data = np.zeros((len(LEDGER_FIELDS), max(capacity, 1)), dtype=np.int64)
+        self.size = 0
+        self.symbols = []
+        self.ticker_ids = {}
+
+    def __len__(self):
+        return self.size
+
+    def _ticker_id(self, ticker):
+        ticker_id = self.ticker_ids.get(ticker)
+        if ticker_id is None:
+            ticker_id = len(self.symbols)
+            self.symbols.append(ticker)
+            self.ticker_ids[ticker] = ticker_id
+        return ticker_id
+
+    def record(self, position, exit_time=None):
+        '''
+        Appends a closed position to the ledger.
+
+        :param position: The closed Position
+        :param exit_time: The timestamp of the fill that closed the position
+        :return:
+        '''
+        row = self.size
+        if row >= self.data.shape[1]:
+            data = np.zeros((len(LEDGER_FIELDS), 2 * self.data.shape[1]), dtype=np.int64)
+            data[:, :row] = self.data[:, :row]
+            self.data = data
+
+        values = [SIDES[position.action]]
+        values.extend(int(getattr(position, field)) for field in FIELDS[1:])
+        values.append(self._ticker_id(position.ticker))
+        values.append(_to_nanoseconds(getattr(position, 'entry_time', None)))
+        values.append(_to_nanoseconds(exit_time))
+        self.data[:, row] = values
+        self.size += 1
+
+    def frame(self):
+        '''
+        Returns the recorded trades as a DataFrame of int64 columns, which are views on the ledger rather than copies.
+        Prices are in the PriceParser fixed-point representation, and times are nanoseconds since the epoch.
+
+        :return: DataFrame
+        '''
+        return pd.DataFrame(self.data[:, :self.size].T, columns=list(LEDGER_FIELDS), copy=False)
+
+    def actions(self):
+        '''
+        Returns the action that opened each trade, 'BOT' or 'SLD'.
+
+        :return: List of strings
+        '''
+        return [ACTIONS[side] for side in self.data[0, :self.size].tolist()]
+
+    def ticker_symbols(self):
+        '''
+        Returns the ticker of each trade.
+
+        :return: List of strings
+        '''
+        ticker_ids = self.data[LEDGER_FIELDS.index('ticker_id'), :self.size]
+        return [self.symbols[ticker_id] for ticker_id in ticker_ids.tolist()]
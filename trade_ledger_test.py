@@ -0,0 +1,62 @@
+import pandas as pd
+from event_bus import BacktestEventBus
+from position import Position
+from position_book import FIELDS
+from price_handler_panel import PanelBarPriceHandler
+from price_parser import PriceParser
+from trade_ledger import TradeLedger
+
+
+def round_trip(action, ticker, quantity, entry_price, exit_price, entry_time):
+    '''
+    A Position opened and closed again at the given prices, with a commission of one dollar each way.
+    '''
+    commission = PriceParser.parse(1.0)
+    position = Position(action, ticker, quantity, PriceParser.parse(entry_price), commission,
+                        PriceParser.parse(entry_price), PriceParser.parse(entry_price), entry_time=entry_time)
+    position.transact_shares('SLD' if action == 'BOT' else 'BOT', quantity, PriceParser.parse(exit_price),
+                             commission)
+    return position
+
+
+def test_the_ledger_records_every_round_trip_beyond_its_capacity():
+    ledger = TradeLedger(capacity=2)
+    positions = []
+    exit_times = []
+    for i in range(5):
+        entry_time = pd.Timestamp('2018-01-01') + pd.Timedelta(days=i)
+        position = round_trip('BOT' if i % 2 == 0 else 'SLD', 'T{0}'.format(i % 3), 100 + i, 10.0 + i, 11.0 + i,
+                              entry_time)
+        exit_times.append(entry_time + pd.Timedelta(days=2))
+        ledger.record(position, exit_times[-1])
+        positions.append(position)
+
+    assert len(ledger) == 5
+    assert ledger.data.shape[1] == 8
+    assert ledger.actions() == [position.action for position in positions]
+    assert ledger.ticker_symbols() == ['T0', 'T1', 'T2', 'T0', 'T1']
+
+    trades = ledger.frame()
+    for row, position in enumerate(positions):
+        for field in FIELDS[1:]:
+            assert trades[field].iloc[row] == getattr(position, field), field
+    assert pd.to_datetime(trades['entry_time'].values).equals(
+        pd.DatetimeIndex([position.entry_time for position in positions]))
+    assert pd.to_datetime(trades['exit_time'].values).equals(pd.DatetimeIndex(exit_times))
+
+
+def test_the_positions_of_a_session_are_read_from_the_ledger(panel, make_session):
+    bus = BacktestEventBus()
+    session = make_session(PanelBarPriceHandler(panel, bus), bus)
+    results = session.start_trading(testing=True)
+    ledger = session.portfolio_handler.portfolio.trades
+
+    positions = results['positions']
+    assert len(positions) == len(ledger) > 0
+    assert positions['ticker'].tolist() == ledger.ticker_symbols()
+    assert (positions['action'] == 'BOT').all()
+    assert (positions['exit_time'] > positions['entry_time']).all()
+    # The AlternatingStrategy holds every position over five bars of its ticker
+    for ticker, trades in positions.groupby('ticker'):
+        dates = panel.dates[panel.has_bar[:, panel.tickers.index(ticker)]]
+        assert (dates.get_indexer(trades['exit_time']) - dates.get_indexer(trades['entry_time']) == 5).all()
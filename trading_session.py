@@ -1,17 +1,63 @@
+import asyncio
 from datetime import datetime
+import io
+import os
+import pickle
 import queue
+import pandas as pd
 from event import EventType
+from event_bus import BacktestEventBus, AsyncEventBus
+from live_session import LiveSessionRunner
 from price_handler_daily_bar import JsonBarPriceHandler
 from price_parser import PriceParser
 from portfolio import Portfolio
 from portfolio_handler import PortfolioHandler
 from risk_manager_example import ExampleRiskManager
 from position_sizer_fixed import FixedPositionSizer
+from strategy_base import Strategies
+from execution_handler_simulated import SimulatedExecutionHandler
+from session_instrumentation import SessionInstrumentation
+from session_snapshot import SessionSnapshot
+
+
+class _SessionPickler(pickle.Pickler):
+    '''
+    Pickles a session, leaving out its price handler, events queue and config, which are swapped for new ones when the
+    session is restored.
+    '''
+    def __init__(self, file, session):
+        super(_SessionPickler, self).__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.external = {id(session.price_handler): 'price_handler', id(session.events_queue): 'events_queue'}
+        if session.config is not None:
+            self.external[id(session.config)] = 'config'
+
+    def persistent_id(self, obj):
+        return self.external.get(id(obj))
+
+
+class _SessionUnpickler(pickle.Unpickler):
+    '''
+    Restores a session pickled by _SessionPickler, plugging in the given price handler, events queue and config.
+    '''
+    def __init__(self, file, external):
+        super(_SessionUnpickler, self).__init__(file)
+        self.external = external
+
+    def persistent_load(self, pid):
+        return self.external[pid]
 
 
 class TradingSession(object):
     """
     Enscapsulates the settings and components for carrying out either a backtest or live trading session.
+
+    The strategy may also be given as a list of strategies, which are then collected into Strategies, so that each
+    price event is routed only to the strategies subscribed to its type and ticker. A single strategy that declares its
+    tickers is routed through Strategies too, so that it only receives the events of those tickers, but session.strategy
+    remains the strategy that was given.
+
+    If an EventJournal is given as journal, every bar and bar slice dispatched by the session is recorded to it, so that
+    the run can be replayed exactly with a JournalPriceHandler. Snapshots of the session do not carry the journal.
     """
     def __init__(self,
                  config,
@@ -32,10 +78,14 @@ class TradingSession(object):
                  statistics=None,
                  sentiment_handler=None,
                  title=None,
-                 benchmark=None
+                 benchmark=None,
+                 instrument=False,
+                 journal=None
                  ):
         self.equity = equity
         self.config = config
+        if isinstance(strategy, (list, tuple)):
+            strategy = Strategies(*strategy)
         self.strategy = strategy
         self.tickers = tickers
         self.start_date = start_date
@@ -54,6 +104,9 @@ class TradingSession(object):
         self.title = title
         self.benchmark = benchmark
         self.session_type = session_type
+        self.instrumentation = SessionInstrumentation() if instrument else None
+        self.live_latency = None
+        self.journal = journal
         self._config_session()
         self.cur_time = None
 
@@ -61,6 +114,9 @@ class TradingSession(object):
             if self.end_session_time is None:
                 raise Exception('Must specify an end_session_time when live trading')
 
+        if self.journal is not None and self.price_handler is not None and self.price_handler.istick():
+            raise Exception('Can only record the bars of a session to an EventJournal, not ticks')
+
     def _config_session(self):
         '''
         Initialises the necessary classes used within the session.
@@ -73,20 +129,37 @@ class TradingSession(object):
                                                      start_date=self.start_date,
                                                      end_date=self.end_date
                                                      )
+        if self.position_sizer is None:
+            self.position_sizer = FixedPositionSizer()
+
+        if self.risk_manager is None:
+            self.risk_manager = ExampleRiskManager()
+
         if self.portfolio_handler is None:
             self.portfolio_handler = PortfolioHandler(
-                self.equity,
+                PriceParser.parse_scalar(self.equity),
                 self.events_queue,
                 self.price_handler,
                 self.position_sizer,
                 self.risk_manager
             )
 
-        if self.position_sizer is None:
-            self.position_sizer = FixedPositionSizer()
+        if self.execution_handler is None:
+            self.execution_handler = SimulatedExecutionHandler(
+                self.events_queue,
+                self.price_handler,
+                self.compliance
+            )
 
-        if self.risk_manager is None:
-            self.risk_manager = ExampleRiskManager()
+        if self.statistics is None:
+            # Imported here so that sessions with their own statistics do not require matplotlib
+            from statistics_tearsheet import TearsheetStatistics
+            self.statistics = TearsheetStatistics(
+                self.config,
+                self.portfolio_handler,
+                self.title,
+                self.benchmark
+            )
 
     def _continue_loop_condition(self):
         if self.session_type == 'backtest':
@@ -98,25 +171,281 @@ class TradingSession(object):
         '''
         Carries out an infinite while loop that polls the events queue and directs each event to either the strategy
         component of the execution handler. The loop continue until the event queue has been emptied.
+
+        Sessions on an AsyncEventBus are run on asyncio by a LiveSessionRunner instead, which waits for the price feeds
+        rather than polling.
         '''
         if self.session_type == 'backtest':
             print('Running backtest...')
         else:
             print('Running realtime session until {0}'.format(self.end_session_time))
 
+        try:
+            if isinstance(self.events_queue, AsyncEventBus):
+                runner = LiveSessionRunner(self)
+                asyncio.run(runner.run())
+                self.live_latency = runner.latency_report()
+            elif isinstance(self.events_queue, BacktestEventBus):
+                self._run_event_bus(self._event_handlers())
+            else:
+                self._poll_queue(self._event_handlers())
+        finally:
+            if self.journal is not None:
+                self.journal.flush()
+
+    def _poll_queue(self, handlers):
+        '''
+        Runs the session on a queue.Queue, polling it for the next event and streaming the next price event whenever it
+        is empty.
+
+        :param handlers: List of (EventType, handler) pairs to dispatch the events to
+        '''
+        dispatch_table = {}
+        for event_type, handler in handlers:
+            dispatch_table.setdefault(event_type, []).append(handler)
+
         while self._continue_loop_condition():
             try:
                 event = self.events_queue.get(False)
-                print(event)
             except queue.Empty:
                 self.price_handler.stream_next()
             else:
                 if event is not None:
-                    if event.type == EventType.TICK or event.type == EventType.BAR:
-                        self.cur_time = event.time
+                    for handler in dispatch_table.get(event.type, ()):
+                        handler(event)
+
+    def _update_time(self, event):
+        self.cur_time = event.time
+
+    def _update_portfolio_value(self, event):
+        # Only the positions in the tickers of the price event are revalued, once the equity is next read
+        if event.type == EventType.BAR_SLICE:
+            self.portfolio_handler.update_portfolio_value(event.tickers)
+        else:
+            self.portfolio_handler.update_portfolio_value((event.ticker,))
+
+    def _update_statistics(self, event):
+        self.statistics.update(event.time, self.portfolio_handler)
+
+    def _update_statistics_per_timestamp(self, event):
+        # The statistics are keyed by timestamp, so only the last bar of each timestamp is recorded, rather than every
+        # bar overwriting the one before, and the equity is revalued once per timestamp rather than once per bar
+        if self.price_handler.peek_timestamp() != event.time:
+            self.statistics.update(event.time, self.portfolio_handler)
+
+    def _can_peek(self):
+        '''
+        Tells whether the price handler can peek at the timestamp of its next price event. The price events of live
+        sessions are pushed by their feeds instead.
+        '''
+        try:
+            self.price_handler.peek_timestamp()
+        except (NotImplementedError, AttributeError):
+            return False
+        return True
+
+    def _event_handlers(self):
+        '''
+        Returns the dispatch table of the session, as a list of (EventType, handler) pairs, in the order the handlers
+        are called:
+
+        * Price events mark the portfolio to market, are passed to the strategy and then recorded by the statistics,
+          which in BarEvent mode are only updated by the last bar of each timestamp.
+        * Signals are sized and refined into orders by the portfolio handler, via the position sizer and risk manager.
+        * Orders are executed by the execution handler.
+        * Fills update the positions of the portfolio.
+
+        Bars and bar slices are recorded to the journal, if any, before they are handled.
+
+        If instrumentation is enabled, every event is counted and every handler is timed.
+        '''
+        # The strategy is only called with the types of price events it subscribes to
+        strategy = self.strategy
+        strategy_event_types = getattr(strategy, 'event_types', None)
+        if getattr(strategy, 'tickers', None) is not None and not isinstance(strategy, Strategies):
+            # and with the events of the tickers it subscribes to
+            strategy = Strategies(strategy)
+
+        # In BarEvent mode, the statistics are only updated at the last bar of each timestamp
+        can_peek = self._can_peek()
+
+        named_handlers = []
+        for event_type in (EventType.TICK, EventType.BAR, EventType.BAR_SLICE):
+            if self.journal is not None and event_type != EventType.TICK:
+                named_handlers.append((event_type, 'journal.record', self.journal.record))
+            named_handlers.extend([
+                (event_type, 'session.update_time', self._update_time),
+                (event_type, 'portfolio_handler.update_portfolio_value', self._update_portfolio_value),
+            ])
+            if strategy_event_types is None or event_type in strategy_event_types:
+                named_handlers.append((event_type, 'strategy.calculate_signals', strategy.calculate_signals))
+            if event_type == EventType.BAR and can_peek:
+                named_handlers.append((event_type, 'statistics.update', self._update_statistics_per_timestamp))
+            else:
+                named_handlers.append((event_type, 'statistics.update', self._update_statistics))
+        named_handlers.extend([
+            (EventType.SIGNAL, 'portfolio_handler.on_signal', self.portfolio_handler.on_signal),
+            (EventType.ORDER, 'execution_handler.execute_order', self.execution_handler.execute_order),
+            (EventType.FILL, 'portfolio_handler.on_fill', self.portfolio_handler.on_fill),
+        ])
+
+        if self.instrumentation is None:
+            return [(event_type, handler) for event_type, name, handler in named_handlers]
+
+        handlers = [(event_type, self.instrumentation.counter(event_type)) for event_type in EventType]
+        handlers.extend((event_type, self.instrumentation.timed(name, handler))
+                        for event_type, name, handler in named_handlers)
+        return handlers
+
+    def _run_event_bus(self, handlers, until=None):
+        '''
+        Runs the session on a BacktestEventBus. Every pending event is dispatched through the dispatch table of the bus
+        before the next price event is streamed, so events are handled in exactly the same order as when polling a
+        queue.Queue, but without locking or exceptions on the hot path.
+
+        :param handlers: List of (EventType, handler) pairs to subscribe to the bus
+        :param until: Optional timestamp to stop at, before streaming the first price event at or after it
+        '''
+        bus = self.events_queue
+        for event_type, handler in handlers:
+            bus.subscribe(event_type, handler)
+
+        pop = bus.pop
+        dispatch = bus.dispatch
+        stream_next = self.price_handler.stream_next
+        try:
+            while self._continue_loop_condition():
+                event = pop()
+                while event is not None:
+                    dispatch(event)
+                    event = pop()
+                if until is not None:
+                    next_time = self.price_handler.peek_timestamp()
+                    if next_time is None or next_time >= until:
+                        break
+                stream_next()
+        finally:
+            for event_type, handler in handlers:
+                bus.unsubscribe(event_type, handler)
+
+    def _check_can_stop(self):
+        '''
+        Only backtests run on a BacktestEventBus can be stopped at a timestamp. The price events of live sessions on an
+        AsyncEventBus are pushed by their feeds, and cannot be peeked at.
+        '''
+        if isinstance(self.events_queue, AsyncEventBus):
+            raise Exception('Cannot stop or snapshot a live session on an AsyncEventBus')
+        if not isinstance(self.events_queue, BacktestEventBus):
+            raise Exception('Must run on a BacktestEventBus to stop and snapshot a session')
+
+    def run_until(self, timestamp):
+        '''
+        Runs the session up to, but excluding, the first price event at or after timestamp, and handles every event
+        that follows from the earlier ones. The session can then be snapshot, and carries on from there when it is run
+        again.
+
+        :param timestamp: The timestamp to stop at
+        :return:
+        '''
+        self._check_can_stop()
+        try:
+            self._run_event_bus(self._event_handlers(), until=pd.Timestamp(timestamp))
+        finally:
+            if self.journal is not None:
+                self.journal.flush()
+
+    def snapshot(self):
+        '''
+        Freezes the current state of the session, to be forked into several continuations. Typically the session is
+        first run up to the timestamp the continuations diverge at with run_until().
+
+        :return: SessionSnapshot
+        '''
+        self._check_can_stop()
+        return SessionSnapshot(self)
+
+    def save_state(self, filename):
+        '''
+        Saves the state of the session at the end of a run: the portfolio and its positions, the strategy, the
+        statistics recorded so far and the last price of every ticker. The price handler, events queue and config are
+        left out, so that the session can be carried on with new ones over newly arrived bars with extend().
+
+        :param filename: The file to save to
+        :return:
+        '''
+        buffer = io.BytesIO()
+        _SessionPickler(buffer, self).dump(self)
+        state = {
+            'last_timestamp': self.cur_time,
+            'last_prices': {ticker: dict(prices) for ticker, prices in self.price_handler.tickers.items()},
+            'session': buffer.getvalue(),
+        }
+        tmp_file = filename + '.tmp'
+        with open(tmp_file, 'wb') as fd:
+            pickle.dump(state, fd, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, filename)
+
+    @classmethod
+    def extend(cls, filename, config=None, events_queue=None, price_handler=None, end_date=None):
+        '''
+        Restores a session saved by save_state(), to be run over the bars that arrived since its last timestamp. The
+        strategy and portfolio resume from their saved state, and the equity curve and trade ledger of the statistics
+        and portfolio are appended to, so the run only costs as much as the new data.
+
+        Unless a price handler is given, a JsonBarPriceHandler is created on the JSON data directory of the config,
+        starting just after the last timestamp, so only the files that can hold new bars are read. The saved last
+        prices are carried over to the new price handler, so positions in tickers without new bars are still valued.
+
+        :param filename: The file saved by save_state()
+        :param config: The config of the new run
+        :param events_queue: The events queue of the new run, defaults to a new BacktestEventBus
+        :param price_handler: Optional price handler streaming the new bars, created with events_queue
+        :param end_date: Date to stop retrieving bars at
+        :return: The restored TradingSession
+        '''
+        with open(filename, 'rb') as fd:
+            state = pickle.load(fd)
+
+        if events_queue is None:
+            events_queue = BacktestEventBus()
+        if price_handler is None:
+            start_date = None
+            if state['last_timestamp'] is not None:
+                start_date = pd.Timestamp(state['last_timestamp']) + pd.Timedelta(1)
+            price_handler = JsonBarPriceHandler(config.backtester.eod_json_data_dir,
+                                                events_queue,
+                                                list(state['last_prices']),
+                                                start_date=start_date,
+                                                end_date=end_date
+                                                )
+        for ticker, prices in state['last_prices'].items():
+            price_handler.tickers[ticker] = dict(prices)
+
+        external = {'price_handler': price_handler, 'events_queue': events_queue, 'config': config}
+        session = _SessionUnpickler(io.BytesIO(state['session']), external).load()
+        if config is not None:
+            session.config = config
+        session.end_date = end_date
+        return session
 
     def start_trading(self, testing=False):
         """
         Runs either a backtest or live session, and outputs performance when complete.
+
+        If instrumentation is enabled, its report of event counts and handler latencies is returned in the results
+        under 'instrumentation', and can be printed as a table with self.instrumentation.print_table(). Live sessions
+        run on asyncio also return their tick-to-order latency under 'latency'.
         """
         self._run_session()
+        results = self.statistics.get_results()
+        print('---------------------------------')
+        print('Backtest complete.')
+        print('Sharpe Ratio: {0:.2f}'.format(results['sharpe']))
+        print('Max Drawdown: {0:.2f}%'.format(results['max_drawdown_pct'] * 100.0))
+        if self.instrumentation is not None:
+            results['instrumentation'] = self.instrumentation.report()
+        if self.live_latency is not None:
+            results['latency'] = self.live_latency
+        if not testing:
+            self.statistics.plot_results()
+        return results
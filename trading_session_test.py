@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+import pandas as pd
+from event_bus import BacktestEventBus
+from price_handler_daily_bar import JsonBarPriceHandler
+from price_handler_panel import PanelBarPriceHandler
+from trading_session import TradingSession
+
+
+def test_a_fork_carries_on_as_the_full_run(panel, make_session):
+    bus = BacktestEventBus()
+    full = make_session(PanelBarPriceHandler(panel, bus), bus).start_trading(testing=True)
+
+    bus = BacktestEventBus()
+    session = make_session(PanelBarPriceHandler(panel, bus), bus)
+    session.run_until('2018-03-15')
+    snapshot = session.snapshot()
+    forks = [snapshot.fork(), snapshot.fork()]
+    for fork in forks:
+        results = fork.start_trading(testing=True)
+        assert results['equity'].equals(full['equity'])
+        assert len(results['positions']) == len(full['positions'])
+
+    # The forks are independent of the session they were taken from, which carries on as well
+    assert session.start_trading(testing=True)['equity'].equals(full['equity'])
+
+
+def test_an_extended_session_carries_on_as_the_full_run(tmp_path, json_dir, make_session):
+    tickers = ['AAA.TO', 'BBB.TO', 'CCC.TO']
+    bus = BacktestEventBus()
+    full = make_session(JsonBarPriceHandler(json_dir, bus, tickers, start_date='2017-01-01', end_date='2018-01-01'),
+                        bus).start_trading(testing=True)
+
+    bus = BacktestEventBus()
+    session = make_session(JsonBarPriceHandler(json_dir, bus, tickers, start_date='2017-01-01',
+                                               end_date='2017-07-01'), bus)
+    session.start_trading(testing=True)
+    state_file = str(tmp_path / 'state.pkl')
+    session.save_state(state_file)
+
+    config = SimpleNamespace(backtester=SimpleNamespace(eod_json_data_dir=json_dir))
+    extended = TradingSession.extend(state_file, config, end_date='2018-01-01')
+    assert extended.price_handler.start_date > pd.Timestamp('2017-06-30')
+    results = extended.start_trading(testing=True)
+    assert results['equity'].equals(full['equity'])
+    assert len(results['positions']) == len(full['positions'])
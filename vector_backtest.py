@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+from event import EventType, SignalEvent
+from event_bus import BacktestEventBus
+from execution_handler_simulated import SimulatedExecutionHandler
+from position import Position
+from position_sizer_naive import NaivePositionSizer
+from price_handler_panel import PanelBarPriceHandler
+from price_panel import carry_forward
+from price_parser import PriceParser
+from statistics_tearsheet import TearsheetStatistics
+from strategy_base import AbstractStrategy
+from trade_ledger import TradeLedger
+from trading_session import TradingSession
+
+
+def calculate_commissions(quantities):
+    '''
+    Calculates the Questrade commission of every trade of an array at once, with the same schedule as the
+    SimulatedExecutionHandler.
+
+    :param quantities: int64 array of signed trade quantities, 0 where there is no trade
+    :return: int64 array of commissions, as PriceParser prices
+    '''
+    commissions = np.clip(np.abs(quantities) * SimulatedExecutionHandler.COMMISSION_PER_SHARE,
+                          SimulatedExecutionHandler.MIN_COMMISSION, SimulatedExecutionHandler.MAX_COMMISSION)
+    commissions[quantities == 0] = 0
+    return commissions
+
+
+class VectorStatistics(TearsheetStatistics):
+    '''
+    Tearsheet statistics of a VectorBacktest. The equity curve and the trades are computed in one pass by the backtest,
+    so there is nothing to update, and the trade ledger is rebuilt by replaying the trades through Position objects, so
+    that get_results() and plot_results() report exactly what the TearsheetStatistics of an event driven session
+    would.
+    '''
+
+    def __init__(self, config, equity, trades, title=None, benchmark=None, equity_benchmark=None, periods=252,
+                 rolling_sharpe=False):
+        '''
+        :param config:
+        :param equity: Dictionary of timestamp to equity
+        :param trades: DataFrame of the trades, with a timestamp, ticker, action, quantity, price and commission
+        :param title:
+        :param benchmark:
+        :param equity_benchmark: Dictionary of timestamp to benchmark close price
+        :param periods:
+        :param rolling_sharpe:
+        '''
+        self.config = config
+        self.portfolio_handler = None
+        self.price_handler = None
+        self.title = '\n'.join(title) if title is not None else ''
+        self.benchmark = benchmark
+        self.periods = periods
+        self.rolling_sharpe = rolling_sharpe
+        self.equity = equity
+        self.equity_benchmark = equity_benchmark if equity_benchmark is not None else {}
+        self.trades = trades
+        self.log_scale = False
+
+    def update(self, timestamp, portfolio_handler):
+        pass
+
+    def _trade_ledger(self):
+        '''
+        Replays the trades through Position objects, in the same way as the Portfolio, and returns the TradeLedger of
+        the positions that were closed.
+        '''
+        positions = {}
+        ledger = TradeLedger()
+        for timestamp, ticker, action, quantity, price, commission in self.trades.itertuples(index=False):
+            position = positions.get(ticker)
+            if position is None:
+                positions[ticker] = Position(action, ticker, quantity, price, commission, price, price, timestamp)
+            else:
+                position.transact_shares(action, quantity, price, commission)
+                position.update_market_value(price, price)
+                if position.quantity == 0:
+                    ledger.record(positions.pop(ticker), timestamp)
+        return ledger
+
+
+class VectorBacktest(object):
+    '''
+    VectorBacktest runs strategies that can be expressed on whole arrays, such as moving average crossovers or momentum
+    ranks, without the event loop. The strategy is a function taking the PricePanel and returning the target number of
+    shares held of every ticker at every date, and the fills, commissions, cash, equity and trades are then computed
+    with NumPy over the whole panel, in the PriceParser fixed-point representation.
+
+    The targets are only acted upon where a ticker has a bar, and a NaN target keeps the current position. By default
+    the trades are filled at the close of the bar the target is set on, like the SimulatedExecutionHandler, or with
+    fill_at='next_open' at the open of the next bar of the ticker.
+
+    cross_check() runs the same targets through a TradingSession and reports any divergence from the vectorised
+    results, so that the fast path can be trusted.
+    '''
+
+    def __init__(self, panel, strategy, equity, fill_at='close', config=None, title=None, benchmark=None):
+        '''
+        :param panel: PricePanel
+        :param strategy: Function taking the PricePanel and returning the target positions, as an array or DataFrame
+                    of shape (dates, tickers)
+        :param equity: The initial cash of the backtest
+        :param fill_at: 'close' or 'next_open'
+        :param config:
+        :param title:
+        :param benchmark: Optional benchmark ticker of the panel
+        '''
+        if fill_at not in ('close', 'next_open'):
+            raise ValueError("fill_at must be 'close' or 'next_open'")
+        self.panel = panel
+        self.strategy = strategy
+        self.equity = equity
+        self.initial_cash = PriceParser.parse_scalar(equity)
+        self.fill_at = fill_at
+        self.config = config
+        self.title = title
+        self.benchmark = benchmark
+        self.positions = None
+        self.cash = None
+        self.equity_curve = None
+        self.trades = None
+
+    def _target_positions(self):
+        '''
+        Calls the strategy and aligns its targets to the panel.
+
+        :return: float64 array of shape (dates, tickers)
+        '''
+        targets = self.strategy(self.panel)
+        if isinstance(targets, pd.DataFrame):
+            targets = targets.reindex(index=self.panel.dates, columns=self.panel.tickers).values
+        targets = np.asarray(targets, dtype=np.float64)
+        if targets.shape != self.panel.shape:
+            raise ValueError('The strategy returned targets of shape {0}, but the panel is of shape {1}'.format(
+                targets.shape, self.panel.shape))
+        return targets
+
+    def _held_positions(self, targets):
+        '''
+        Converts the targets into the number of shares held of every ticker at every date, after the fills of that
+        date.
+
+        :param targets: float64 array of shape (dates, tickers)
+        :return: int64 array of shape (dates, tickers)
+        '''
+        has_bar = self.panel.has_bar
+        valid = has_bar & ~np.isnan(targets)
+        positions = carry_forward(np.rint(np.nan_to_num(targets)).astype(np.int64), valid, 0)
+        if self.fill_at == 'next_open':
+            # The target set at the previous bar of a ticker is filled at its next bar
+            previous = np.zeros_like(positions)
+            previous[1:] = positions[:-1]
+            positions = carry_forward(previous, has_bar, 0)
+        return positions
+
+    def run(self):
+        '''
+        Runs the backtest over the whole panel.
+
+        :return: VectorStatistics
+        '''
+        panel = self.panel
+        self.positions = self._held_positions(self._target_positions())
+
+        quantities = np.diff(self.positions, axis=0, prepend=np.zeros((1, len(panel.tickers)), dtype=np.int64))
+        prices = panel.close if self.fill_at == 'close' else panel.open
+        commissions = calculate_commissions(quantities)
+
+        cash_flows = -(quantities * prices).sum(axis=1) - commissions.sum(axis=1)
+        self.cash = self.initial_cash + np.cumsum(cash_flows)
+        self.equity_curve = self.cash + (self.positions * panel.last_close()).sum(axis=1)
+
+        # Trades are listed in (timestamp, ticker) order, as the event driven engine fills them
+        rows, columns = np.nonzero(quantities)
+        traded = quantities[rows, columns]
+        self.trades = pd.DataFrame({
+            'timestamp': panel.dates[rows],
+            'ticker': np.asarray(panel.tickers, dtype=object)[columns],
+            'action': np.where(traded > 0, 'BOT', 'SLD'),
+            'quantity': np.abs(traded),
+            'price': prices[rows, columns],
+            'commission': commissions[rows, columns],
+        }, columns=['timestamp', 'ticker', 'action', 'quantity', 'price', 'commission'])
+
+        equity = dict(zip(panel.dates, PriceParser.display_array(self.equity_curve)))
+        equity_benchmark = None
+        if self.benchmark is not None:
+            column = panel.tickers.index(self.benchmark)
+            equity_benchmark = dict(zip(panel.dates, PriceParser.display_array(panel.last_close()[:, column])))
+
+        return VectorStatistics(self.config, equity, self.trades, self.title, self.benchmark, equity_benchmark)
+
+    def cross_check(self, equity_tolerance=0.01):
+        '''
+        Runs the target positions of the strategy through a TradingSession over the same bars, with a
+        NaivePositionSizer so that the signalled quantities are not resized, and compares the fills, cash, positions
+        and equity with those of the vectorised run.
+
+        :param equity_tolerance: The difference in final equity tolerated, as the Position accounting rounds its
+                    average prices
+        :return: Dictionary describing the divergence, with 'diverged' set if any was found
+        '''
+        if self.fill_at != 'close':
+            raise ValueError('Only backtests filled at the close can be cross-checked, as the event driven engine '
+                             'fills at the last close')
+        if self.positions is None:
+            self.run()
+
+        events_queue = BacktestEventBus()
+        price_handler = PanelBarPriceHandler(self.panel, events_queue)
+        fills = _FillRecorder()
+        session = TradingSession(config=self.config,
+                                 strategy=_TargetPositionStrategy(self.panel, self.positions, events_queue),
+                                 tickers=self.panel.tickers,
+                                 equity=self.equity,
+                                 start_date=None,
+                                 end_date=None,
+                                 events_queue=events_queue,
+                                 price_handler=price_handler,
+                                 compliance=fills,
+                                 position_sizer=NaivePositionSizer(),
+                                 title=self.title if self.title is not None else ['Cross-check'])
+        session._run_session()
+        session.portfolio_handler.update_portfolio_value()
+        portfolio = session.portfolio_handler.portfolio
+
+        vector_fills = [(timestamp.value, ticker, action, int(quantity), int(price), int(commission))
+                        for timestamp, ticker, action, quantity, price, commission
+                        in self.trades.itertuples(index=False)]
+        event_fills = [(fill.timestamp.value, fill.ticker, fill.action, fill.quantity, fill.price, fill.commission)
+                       for fill in fills.fills]
+        mismatches = [i for i, (vector_fill, event_fill) in enumerate(zip(vector_fills, event_fills))
+                      if vector_fill != event_fill]
+        mismatches += list(range(min(len(vector_fills), len(event_fills)), max(len(vector_fills), len(event_fills))))
+
+        first_mismatch = None
+        if len(mismatches) > 0:
+            i = mismatches[0]
+            first_mismatch = (i, vector_fills[i] if i < len(vector_fills) else None,
+                              event_fills[i] if i < len(event_fills) else None)
+
+        position_diffs = {}
+        for column, ticker in enumerate(self.panel.tickers):
+            vector_quantity = int(self.positions[-1, column]) if len(self.positions) > 0 else 0
+            event_quantity = portfolio.positions[ticker].net if ticker in portfolio.positions else 0
+            if vector_quantity != event_quantity:
+                position_diffs[ticker] = (vector_quantity, event_quantity)
+
+        final_cash = int(self.cash[-1]) if len(self.cash) > 0 else self.initial_cash
+        final_equity = int(self.equity_curve[-1]) if len(self.equity_curve) > 0 else self.initial_cash
+        cash_diff = PriceParser.display_scalar(portfolio.cur_cash - final_cash)
+        equity_diff = PriceParser.display_scalar(portfolio.equity - final_equity)
+
+        report = {
+            'fills': len(vector_fills),
+            'event_fills': len(event_fills),
+            'fill_mismatches': len(mismatches),
+            'first_fill_mismatch': first_mismatch,
+            'position_diffs': position_diffs,
+            'cash_diff': cash_diff,
+            'equity_diff': equity_diff,
+            'diverged': (len(mismatches) > 0 or len(position_diffs) > 0 or cash_diff != 0
+                         or abs(equity_diff) > equity_tolerance),
+        }
+
+        if report['diverged']:
+            print('Cross-check diverged: {0} of {1} fills differ, {2} positions differ, cash differs by {3:.2f} and '
+                  'equity by {4:.2f}'.format(len(mismatches), len(vector_fills), len(position_diffs), cash_diff,
+                                            equity_diff))
+            if first_mismatch is not None:
+                print('First differing fill {0}: vectorised {1}, event driven {2}'.format(*first_mismatch))
+        else:
+            print('Cross-check passed: {0} fills match, equity differs by {1:.2f}'.format(len(vector_fills),
+                                                                                         equity_diff))
+        return report
+
+
+class _TargetPositionStrategy(AbstractStrategy):
+    '''
+    Signals, on every bar of a ticker, the trade that takes its position to the one held by the VectorBacktest.
+    '''
+    def __init__(self, panel, positions, events_queue):
+        self.positions = positions
+        self.events_queue = events_queue
+        self.rows = {timestamp: row for row, timestamp in enumerate(panel.dates.asi8.tolist())}
+        self.columns = {ticker: column for column, ticker in enumerate(panel.tickers)}
+        self.held = dict.fromkeys(panel.tickers, 0)
+
+    def calculate_signals(self, event):
+        if event.type == EventType.BAR:
+            target = int(self.positions[self.rows[event.time.value], self.columns[event.ticker]])
+            quantity = target - self.held[event.ticker]
+            if quantity != 0:
+                action = 'BOT' if quantity > 0 else 'SLD'
+                self.events_queue.put(SignalEvent(event.ticker, action, suggested_quantity=abs(quantity)))
+                self.held[event.ticker] = target
+
+
+class _FillRecorder(object):
+    '''
+    Compliance component recording every fill of the SimulatedExecutionHandler.
+    '''
+    def __init__(self):
+        self.fills = []
+
+    def record_trade(self, fill_event):
+        self.fills.append(fill_event)
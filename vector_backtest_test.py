@@ -0,0 +1,30 @@
+import pytest
+from vector_backtest import VectorBacktest
+
+
+def sma_cross(panel):
+    '''
+    Holds 100 shares of a ticker while its 5 day average close is above its 20 day average.
+    '''
+    close = panel.frame('close')
+    fast = close.rolling(5, min_periods=5).mean()
+    slow = close.rolling(20, min_periods=20).mean()
+    return (fast > slow).astype(float) * 100
+
+
+def test_the_cross_check_finds_no_divergence(panel):
+    backtest = VectorBacktest(panel, sma_cross, 100000.0, title=['Test'])
+    backtest.run()
+    assert len(backtest.trades) > 0
+
+    report = backtest.cross_check()
+    assert not report['diverged']
+    assert report['fills'] == report['event_fills'] == len(backtest.trades)
+    assert report['fill_mismatches'] == 0
+    assert report['position_diffs'] == {}
+
+
+def test_only_close_fills_can_be_cross_checked(panel):
+    backtest = VectorBacktest(panel, sma_cross, 100000.0, fill_at='next_open')
+    with pytest.raises(ValueError):
+        backtest.cross_check()
@@ -0,0 +1,213 @@
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from parameter_sweep import ParameterSweep, run_task
+from price_store_mmap import UniversePriceStore
+from statistics_tearsheet import TearsheetStatistics
+
+
+class WalkForwardStatistics(TearsheetStatistics):
+    '''
+    Tearsheet statistics of the out-of-sample equity curve stitched together by a WalkForward, so that get_results()
+    and plot_results() report it as they would a single session.
+    '''
+
+    def __init__(self, config, equity, windows, title=None, periods=252, rolling_sharpe=False):
+        '''
+        :param config:
+        :param equity: Dictionary of timestamp to the stitched out-of-sample equity
+        :param windows: DataFrame of the windows, with the parameters chosen in-sample and the out-of-sample results
+        :param title:
+        :param periods:
+        :param rolling_sharpe:
+        '''
+        self.config = config
+        self.portfolio_handler = None
+        self.price_handler = None
+        self.title = '\n'.join(title) if title is not None else ''
+        self.benchmark = None
+        self.periods = periods
+        self.rolling_sharpe = rolling_sharpe
+        self.equity = equity
+        self.equity_benchmark = {}
+        self.windows = windows
+        self.log_scale = False
+
+    def update(self, timestamp, portfolio_handler):
+        pass
+
+    def _get_positions(self):
+        # The trades of the out-of-sample runs are summarised per window in self.windows
+        return None
+
+
+class WalkForward(object):
+    """
+    WalkForward splits [start_date, end_date) into rolling in-sample/out-of-sample windows. The parameter grid of the
+    strategy is swept over every in-sample window, the best variant according to the objective is then run over the
+    following out-of-sample window, and the out-of-sample equity curves are stitched together into a single curve.
+
+    The price data is loaded once into a memory-mapped UniversePriceStore shared by every run, and the in-sample sweeps
+    of all windows are run on a single process pool, followed by the out-of-sample runs, which are independent of
+    each other.
+
+    Each out-of-sample run starts from a flat portfolio. If a warmup is given, it starts that long before its window,
+    so that the indicators of the strategy are already primed when the window opens, but only the returns within the
+    window are stitched into the curve.
+    """
+
+    def __init__(self, store, strategy_cls, param_grid, tickers, equity, start_date, end_date, in_sample,
+                 out_of_sample, step=None, anchored=False, warmup=None, objective='sharpe', maximize=True,
+                 strategy_kwargs=None, queue_arg='events_queue', config=None, session_kwargs=None, workers=None,
+                 periods=252, title=None):
+        """
+        :param store: UniversePriceStore, or the path of its .npy data file
+        :param strategy_cls: The strategy class, called with the parameters of each variant as keyword arguments
+        :param param_grid: Dictionary of parameter name to list of values, or a list of such dictionaries
+        :param tickers: The tickers to trade
+        :param equity: The initial equity of every run and of the stitched curve
+        :param start_date: Date the first in-sample window starts at
+        :param end_date: Date the last out-of-sample window ends at
+        :param in_sample: Length of the in-sample windows, as a pandas DateOffset or timedelta
+        :param out_of_sample: Length of the out-of-sample windows, as a pandas DateOffset or timedelta
+        :param step: How far the windows roll forward each time, defaults to out_of_sample. It cannot be shorter than
+            out_of_sample, as the out-of-sample windows would overlap and their returns be compounded twice
+        :param anchored: Whether every in-sample window starts at start_date, rather than rolling forward
+        :param warmup: Optional length of the warmup of the out-of-sample runs, as a pandas DateOffset or timedelta
+        :param objective: The column of the sweep summary the in-sample variants are ranked by
+        :param maximize: Whether the objective is maximised, rather than minimised
+        :param strategy_kwargs: Dictionary of keyword arguments passed to the strategy of every variant
+        :param queue_arg: The name of the keyword argument the events queue is passed to the strategy as
+        :param config:
+        :param session_kwargs: Dictionary of further keyword arguments of the TradingSession
+        :param workers: Number of worker processes, None uses one per CPU and 1 runs everything in this process
+        :param periods: Number of bars per year
+        :param title:
+        """
+        if not isinstance(store, UniversePriceStore):
+            store = UniversePriceStore(store)
+        self.store = store
+        self.strategy_cls = strategy_cls
+        self.param_grid = param_grid
+        self.tickers = tickers
+        self.equity = equity
+        self.start_date = pd.Timestamp(start_date)
+        self.end_date = pd.Timestamp(end_date)
+        self.in_sample = in_sample
+        self.out_of_sample = out_of_sample
+        self.step = step if step is not None else out_of_sample
+        # Offsets such as months cannot be compared directly, so they are compared from the start date
+        if self.start_date + self.step < self.start_date + out_of_sample:
+            raise ValueError('The step is shorter than the out-of-sample window, so the out-of-sample windows overlap')
+        self.anchored = anchored
+        self.warmup = warmup
+        self.objective = objective
+        self.maximize = maximize
+        self.strategy_kwargs = strategy_kwargs
+        self.queue_arg = queue_arg
+        self.config = config
+        self.session_kwargs = session_kwargs
+        self.workers = workers
+        self.periods = periods
+        self.title = title if title is not None else ['Walk-forward {0}'.format(strategy_cls.__name__)]
+        self.sweeps = []
+
+    def windows(self):
+        '''
+        Returns the windows as a list of (in-sample start, in-sample end, out-of-sample end) timestamps. The
+        out-of-sample window of each starts where its in-sample window ends, and the last is cut short at end_date.
+
+        :return: List of tuples of Timestamps
+        '''
+        windows = []
+        in_sample_start = self.start_date
+        in_sample_end = self.start_date + self.in_sample
+        while in_sample_end < self.end_date:
+            windows.append((in_sample_start, in_sample_end, min(in_sample_end + self.out_of_sample, self.end_date)))
+            if not self.anchored:
+                in_sample_start = in_sample_start + self.step
+            in_sample_end = in_sample_end + self.step
+        return windows
+
+    def _sweep(self, start_date, end_date):
+        return ParameterSweep(self.store, self.strategy_cls, self.param_grid, self.tickers, self.equity,
+                              start_date=start_date, end_date=end_date, strategy_kwargs=self.strategy_kwargs,
+                              queue_arg=self.queue_arg, config=self.config, session_kwargs=self.session_kwargs,
+                              workers=self.workers, periods=self.periods)
+
+    def _best_variant(self, summary):
+        '''
+        Returns the index of the best variant of an in-sample sweep. Ties, and sweeps where the objective could not be
+        calculated, are resolved in favour of the earliest variant of the grid.
+        '''
+        scores = summary[self.objective]
+        if not scores.notnull().any():
+            return 0
+        return scores.idxmax() if self.maximize else scores.idxmin()
+
+    def _map(self, executor, tasks):
+        if executor is None:
+            return [run_task(task) for task in tasks]
+        return list(executor.map(run_task, tasks))
+
+    def run(self):
+        '''
+        Runs the in-sample sweeps and the out-of-sample runs of every window, and stitches the out-of-sample returns.
+
+        :return: WalkForwardStatistics
+        '''
+        windows = self.windows()
+        if len(windows) == 0:
+            raise ValueError('The in-sample window is longer than the backtest, so there is nothing to walk forward')
+
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers != 1 else None
+        try:
+            # The in-sample sweeps of all windows share one pool, and results come back in submission order
+            self.sweeps = [self._sweep(in_sample_start, in_sample_end)
+                           for in_sample_start, in_sample_end, out_of_sample_end in windows]
+            tasks = [task for sweep in self.sweeps for task in sweep.tasks()]
+            results = self._map(executor, tasks)
+
+            chosen = []
+            summaries = []
+            for sweep in self.sweeps:
+                summary = sweep.summarise(results[:len(sweep.variants)])
+                results = results[len(sweep.variants):]
+                best = self._best_variant(summary)
+                chosen.append(sweep.variants[best])
+                summaries.append(summary.iloc[best])
+
+            out_of_sample_tasks = []
+            for (in_sample_start, in_sample_end, out_of_sample_end), params in zip(windows, chosen):
+                run_start = in_sample_end - self.warmup if self.warmup is not None else in_sample_end
+                sweep = self._sweep(run_start, out_of_sample_end)
+                sweep.variants = [params]
+                out_of_sample_tasks.extend(sweep.tasks())
+            out_of_sample_results = self._map(executor, out_of_sample_tasks)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        rows = []
+        returns = []
+        for window, params, in_sample, (summary, equity_s) in zip(windows, chosen, summaries, out_of_sample_results):
+            in_sample_start, in_sample_end, out_of_sample_end = window
+            window_returns = equity_s.pct_change().fillna(0.0)
+            window_returns = window_returns[window_returns.index >= in_sample_end]
+            returns.append(window_returns)
+
+            row = {
+                'in_sample_start': in_sample_start,
+                'in_sample_end': in_sample_end,
+                'out_of_sample_end': out_of_sample_end,
+            }
+            row.update(params)
+            row['in_sample_{0}'.format(self.objective)] = in_sample[self.objective]
+            row['out_of_sample_sharpe'] = summary['sharpe']
+            row['out_of_sample_return'] = (1.0 + window_returns).prod() - 1.0
+            row['out_of_sample_trades'] = summary['trades']
+            rows.append(row)
+
+        returns = pd.concat(returns)
+        stitched = self.equity * (1.0 + returns).cumprod()
+        return WalkForwardStatistics(self.config, stitched.to_dict(), pd.DataFrame(rows), self.title,
+                                     periods=self.periods)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from event import SignalEvent
+from position_sizer_naive import NaivePositionSizer
+from price_store_mmap import UniversePriceStore
+from strategy_base import AbstractStrategy
+from walk_forward import WalkForward
+
+
+class PeriodicStrategy(AbstractStrategy):
+    '''
+    Buys a ticker every period bars and sells it back half a period later.
+    '''
+    def __init__(self, events_queue, period=10):
+        self.events_queue = events_queue
+        self.period = period
+        self.bars = {}
+
+    def calculate_signals(self, event):
+        count = self.bars.get(event.ticker, 0) + 1
+        self.bars[event.ticker] = count
+        if count % self.period == 0:
+            self.events_queue.put(SignalEvent(event.ticker, 'BOT', 100))
+        elif count % self.period == self.period // 2:
+            self.events_queue.put(SignalEvent(event.ticker, 'SLD', 100))
+
+
+def make_walk_forward(store, step=None):
+    return WalkForward(store, PeriodicStrategy, {'period': [4, 10]}, store.symbols, 100000.0, '2018-01-01',
+                       '2018-06-15', pd.DateOffset(months=2), pd.DateOffset(months=1), step=step, workers=1,
+                       session_kwargs={'position_sizer': NaivePositionSizer()})
+
+
+@pytest.fixture
+def store(tmp_path, tickers_data):
+    return UniversePriceStore.build(str(tmp_path / 'store.npy'), tickers_data)
+
+
+def test_the_out_of_sample_windows_do_not_overlap(store):
+    windows = make_walk_forward(store).windows()
+    assert [out_of_sample_end for in_sample_start, in_sample_end, out_of_sample_end in windows] == [
+        pd.Timestamp('2018-04-01'), pd.Timestamp('2018-05-01'), pd.Timestamp('2018-06-01'), pd.Timestamp('2018-06-15')]
+    for previous, window in zip(windows, windows[1:]):
+        assert window[1] == previous[2]
+
+    statistics = make_walk_forward(store).run()
+    dates = pd.DatetimeIndex(sorted(statistics.equity))
+    timestamps = pd.to_datetime(np.unique(store.bars['timestamp']))
+    # Every bar from the end of the first in-sample window is stitched in exactly once
+    expected = timestamps[(timestamps >= windows[0][1]) & (timestamps < pd.Timestamp('2018-06-15'))]
+    assert dates.equals(expected)
+    assert len(statistics.windows) == len(windows)
+
+
+def test_a_step_shorter_than_the_out_of_sample_window_is_rejected(store):
+    with pytest.raises(ValueError):
+        make_walk_forward(store, step=pd.DateOffset(days=10))